@@ -0,0 +1,289 @@
+"""Offline evaluation of recommendation quality and speed.
+
+Splits an interaction log by time: interactions before the cutoff train the
+model, and each known user's later interactions are what it should have
+recommended. For every configuration (a trainer and its parameters, plus
+optional overrides of the recommendation settings) this reports, over all
+test users at once, recall@k, NDCG@k, precision@k and catalog coverage, as
+well as training time and peak traced memory, batch scoring throughput and
+the per-query latency of the serving path. A most-popular baseline is
+included for reference.
+
+The log is NDJSON or CSV with user_id, item_id, an optional rating and a
+timestamp (Unix seconds or ISO 8601). Without --data a synthetic log is
+generated.
+
+Run from the ai-service directory:
+
+    python benchmarks/evaluate_recommendations.py --data interactions.csv
+    python benchmarks/evaluate_recommendations.py --data log.ndjson --k 20 \\
+        --config '{"algorithm": "svd", "n_components": 64}' \\
+        --config '{"algorithm": "als", "factors": 64, "settings": {"precomputed_top_n": 100}}'
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+DEFAULT_CONFIGS = ({'algorithm': 'svd'}, {'algorithm': 'als'})
+
+
+def synthetic_log(path, users, items, interactions, seed=0):
+    """Write a CSV log where users mostly interact with items from a few favourite genres"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    genres = 20
+    item_genre = rng.integers(0, genres, items)
+    by_genre = [np.flatnonzero(item_genre == genre) for genre in range(genres)]
+    favourites = rng.integers(0, genres, (users, 2))
+
+    user = rng.integers(0, users, interactions)
+    genre = favourites[user, rng.integers(0, 2, interactions)]
+    # Zipf-like popularity within each genre, with a share of global picks
+    rank = np.minimum(rng.zipf(1.3, interactions) - 1, items - 1)
+    item = np.array([by_genre[g][r % len(by_genre[g])] if len(by_genre[g]) else r
+                     for g, r in zip(genre.tolist(), rank.tolist())])
+    explore = rng.random(interactions) < 0.2
+    item[explore] = rank[explore]
+
+    pd.DataFrame({
+        'user_id': np.char.add('u', user.astype(str)),
+        'item_id': np.char.add('i', item.astype(str)),
+        'rating': rng.integers(1, 6, interactions),
+        'timestamp': np.sort(rng.uniform(1.7e9, 1.7e9 + 90 * 86400, interactions))
+    }).to_csv(path, index=False)
+
+
+def time_split(interactions, test_fraction):
+    """(train, test, cutoff): the latest test_fraction of interactions are the test set"""
+    from models.interaction_data import Interactions
+
+    cutoff = float(np.quantile(interactions.timestamps, 1.0 - test_fraction))
+    before = interactions.timestamps < cutoff
+
+    def subset(mask):
+        return Interactions(interactions.users[mask], interactions.items[mask], interactions.ratings[mask])
+
+    return subset(before), subset(~before), cutoff
+
+
+def relevance(model, train, test, users, items):
+    """(test user ids, CSR of their held-out items by model item position)
+
+    Test users are those the model knows. Items they already interacted
+    with before the cutoff are dropped; items the model never saw stay
+    relevant (in an extra column) so recall counts them as misses.
+    """
+    import pandas as pd
+    from scipy.sparse import csr_matrix
+
+    user_row = np.full(len(users), -1, dtype=np.int64)
+    user_row[users.encode(pd.Series(model.user_features.index))] = np.arange(len(model.user_features))
+    item_column = np.full(len(items), -1, dtype=np.int64)
+    item_column[items.encode(pd.Series(model.item_features.index))] = np.arange(len(model.item_features))
+
+    seen = np.unique(train.users.astype(np.int64) * len(items) + train.items)
+    fresh = ~np.isin(test.users.astype(np.int64) * len(items) + test.items, seen)
+    rows = user_row[test.users[fresh]]
+    columns = item_column[test.items[fresh]]
+    known = rows >= 0
+    rows, columns = rows[known], columns[known]
+
+    test_rows, rows = np.unique(rows, return_inverse=True)
+    n_items = len(model.item_features)
+    columns = np.where(columns >= 0, columns, n_items)
+    relevant = csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(len(test_rows), n_items + 1))
+    relevant.data[:] = 1.0
+    return [model.user_features.index[row] for row in test_rows], relevant
+
+
+def quality(ranked, relevant, k, n_items):
+    from models.ranking_metrics import ranking_metrics
+
+    metrics = ranking_metrics(ranked, relevant, k)
+    metrics['coverage'] = len(np.unique(ranked[ranked >= 0])) / n_items if n_items else 0.0
+    return metrics
+
+
+def latency(func, user_ids, queries, seed=0):
+    """Per-call milliseconds of func(user_id) over a sample of users"""
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(user_ids), min(queries, len(user_ids)), replace=False)
+    samples = []
+    for index in sample:
+        start = time.perf_counter()
+        func(user_ids[index])
+        samples.append((time.perf_counter() - start) * 1000)
+    samples = np.array(samples) if samples else np.zeros(1)
+    return {
+        'queries': len(sample),
+        'mean_ms': float(samples.mean()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99))
+    }
+
+
+@contextmanager
+def recommendation_settings(overrides):
+    """Temporarily override AI_CONFIG['recommendations'] entries"""
+    from config.ai_config import AI_CONFIG
+
+    settings = AI_CONFIG['recommendations']
+    saved = dict(settings)
+    settings.update(overrides or {})
+    try:
+        yield settings
+    finally:
+        settings.clear()
+        settings.update(saved)
+
+
+def evaluate_config(model, config, train, test, users, items, args):
+    """Train one configuration and measure it"""
+    parameters = {key: value for key, value in config.items() if key != 'settings'}
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        trained = model.train_arrays(train, parameters)
+        training_seconds = time.perf_counter() - start
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        test_users, relevant = relevance(model, train, test, users, items)
+        start = time.perf_counter()
+        ranked = model.rank_users(test_users, args.k)
+        scoring_seconds = time.perf_counter() - start
+
+        model_bytes = sum(array.nbytes for array in (
+            model.user_item_matrix.data, model.user_item_matrix.indices, model.user_item_matrix.indptr,
+            model.user_features.values, model.item_features.values))
+        report = {
+            'config': config,
+            'quality': quality(ranked, relevant, args.k, len(model.item_features)),
+            'training_seconds': training_seconds,
+            'peak_training_mb': peak_bytes / 2 ** 20,
+            'model_mb': model_bytes / 2 ** 20,
+            'scoring_users_per_second': len(test_users) / scoring_seconds if scoring_seconds else None,
+            'latency': latency(lambda user_id: model.get_recommendations(user_id, limit=args.k),
+                               test_users, args.latency_queries),
+            'trainer': {key: value for key, value in trained.items() if key != 'history'}
+        }
+        return report, test_users, relevant
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def popularity_baseline(model, test_users, relevant, k):
+    """Most-interacted training items the user has not seen"""
+    from models.ranking_metrics import top_k_items
+
+    counts = np.asarray((model.user_item_matrix != 0).sum(axis=0), dtype=np.float64).ravel()
+    rows = np.array([model.user_features.index.get_loc(user_id) for user_id in test_users], dtype=np.int64)
+    ranked = np.concatenate([
+        top_k_items(np.ones((len(block), 1)), counts[:, np.newaxis], model.user_item_matrix[block], k)
+        for block in np.array_split(rows, max(1, len(rows) // 1024))
+    ]) if len(rows) else np.empty((0, k), dtype=np.int64)
+    return {'config': {'algorithm': 'popularity'}, 'quality': quality(ranked, relevant, k, len(counts))}
+
+
+def print_table(reports, k):
+    header = (f"{'configuration':44s} {'recall@' + str(k):>10s} {'ndcg@' + str(k):>10s} {'coverage':>9s} "
+              f"{'train s':>9s} {'peak MB':>9s} {'p50 ms':>8s} {'p99 ms':>8s}")
+    print(header, file=sys.stderr)
+    for report in reports:
+        metrics = report['quality']
+        served = report.get('latency', {})
+
+        def cell(value, width, digits):
+            return f"{value:{width}.{digits}f}" if value is not None else f"{'-':>{width}s}"
+
+        print(f"{json.dumps(report['config'])[:44]:44s} {metrics['recall_at_k']:10.4f} {metrics['ndcg_at_k']:10.4f} "
+              f"{metrics['coverage']:9.3f} {cell(report.get('training_seconds'), 9, 2)} "
+              f"{cell(report.get('peak_training_mb'), 9, 1)} {cell(served.get('p50_ms'), 8, 3)} "
+              f"{cell(served.get('p99_ms'), 8, 3)}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate recommendation trainers offline')
+    parser.add_argument('--data', help='NDJSON or CSV interaction log with timestamps (default: synthetic)')
+    parser.add_argument('--format', choices=('ndjson', 'csv'), help='log format (default: from the file name)')
+    parser.add_argument('--synthetic', type=int, nargs=3, default=(5000, 2000, 200000),
+                        metavar=('USERS', 'ITEMS', 'INTERACTIONS'), help='size of the synthetic log')
+    parser.add_argument('--test-fraction', type=float, default=0.2, help='latest share of interactions to test on')
+    parser.add_argument('--k', type=int, default=10, help='recommendation list length')
+    parser.add_argument('--config', action='append', type=json.loads,
+                        help='JSON training parameters, with optional "settings" overrides (repeatable)')
+    parser.add_argument('--latency-queries', type=int, default=500, help='served queries timed per configuration')
+    parser.add_argument('--output', help='write the JSON report to this file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    from config.ai_config import AI_CONFIG
+    from models.interaction_data import detect_format, read_interactions
+    from models.recommendation_model import RecommendationModel
+
+    data_path = os.path.abspath(args.data) if args.data else None
+    output_path = os.path.abspath(args.output) if args.output else None
+    data_format = args.format or (detect_format(data_path) if data_path else 'csv')
+    if data_path and data_format is None:
+        parser.error('cannot tell the log format from the file name; pass --format')
+
+    reports = []
+    # Models, lists and catalogs are written to a scratch directory, never the live ones
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='ai-recommendation-eval-') as workdir:
+        os.chdir(workdir)
+        AI_CONFIG['recommendations']['store_path'] = os.path.join(workdir, 'recommendation_lists.sqlite3')
+        AI_CONFIG['recommendations']['catalog_path'] = os.path.join(workdir, 'item_catalog.db')
+        try:
+            if data_path is None:
+                data_path = os.path.join(workdir, 'interactions.csv')
+                synthetic_log(data_path, *args.synthetic)
+
+            for index, config in enumerate(args.config or DEFAULT_CONFIGS):
+                with recommendation_settings(config.get('settings')):
+                    model = RecommendationModel()
+                    if index == 0:
+                        # Ids are coded with the first model's encoders; training
+                        # saves them, and every later model loads the same codes
+                        users, items = model.encoders()
+                        interactions = read_interactions(data_path, data_format, users, items,
+                                                         AI_CONFIG['recommendations']['ingest_chunk_rows'],
+                                                         timestamps=True)
+                        train, test, cutoff = time_split(interactions, args.test_fraction)
+                        print(f"{len(train.users)} training and {len(test.users)} test interactions, cutoff "
+                              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(cutoff))} UTC", file=sys.stderr)
+
+                    report, test_users, relevant = evaluate_config(model, config, train, test, users, items, args)
+                    if index == 0:
+                        reports.append(popularity_baseline(model, test_users, relevant, args.k))
+                    reports.append(report)
+        finally:
+            os.chdir(original_cwd)
+
+    print_table(reports, args.k)
+    output = json.dumps({'k': args.k, 'test_fraction': args.test_fraction, 'cutoff': cutoff,
+                         'train_interactions': len(train.users), 'test_interactions': len(test.users),
+                         'results': reports}, indent=2, default=float)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
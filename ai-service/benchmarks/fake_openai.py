@@ -0,0 +1,236 @@
+"""Local fake of the OpenAI completions API for offline load testing.
+
+Serves the endpoints the service's OpenAI client calls, with configurable
+latency, error rate, hangs and streaming, so upstream slowness and failures
+can be reproduced without network access or an API key:
+
+    POST /v1/engines/<engine>/completions
+    POST /v1/completions
+    POST /v1/chat/completions
+    GET  /stats
+
+Point the service at it with OPENAI_API_BASE=http://127.0.0.1:8099/v1 and any
+non-empty OPENAI_API_KEY. Run from the ai-service directory:
+
+    python benchmarks/fake_openai.py --port 8099 --latency-ms 800 --jitter-ms 300 --error-rate 0.05
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_WORDS = (
+    'the learning process builds understanding through practice and feedback while each concept '
+    'connects to earlier ideas so that students can reason about new problems with confidence'
+).split()
+
+
+class FakeOpenAIConfig:
+    """Behaviour of the fake server; every field can be changed while it runs"""
+
+    def __init__(self, latency_ms=300.0, jitter_ms=0.0, error_rate=0.0, error_status=500,
+                 hang_rate=0.0, hang_seconds=60.0, token_delay_ms=20.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.token_delay_ms = token_delay_ms
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'hangs': 0, 'streams': 0}
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def roll(self):
+        """Pick this request's outcome and latency under the lock (Random is shared)"""
+        with self._lock:
+            outcome = 'ok'
+            draw = self.random.random()
+            if draw < self.hang_rate:
+                outcome = 'hang'
+            elif draw < self.hang_rate + self.error_rate:
+                outcome = 'error'
+            latency = max(0.0, self.random.gauss(self.latency_ms, self.jitter_ms) if self.jitter_ms
+                          else self.latency_ms)
+            return outcome, latency / 1000.0
+
+
+def _completion_text(prompt, max_tokens):
+    if 'multiple choice question' in prompt:
+        topic = prompt.rsplit('Topic:', 1)[-1].split('\n', 1)[0].strip() or 'the topic'
+        return (f"Question: Which statement about {topic} is correct?\n"
+                f"A) It is studied through observation\nB) It has no rules\n"
+                f"C) It cannot be measured\nD) It was never described\n"
+                f"Correct Answer: A\nExplanation: {topic} is studied through observation.")
+
+    count = max(1, min(int(max_tokens or 16), 256))
+    return ' '.join(_WORDS[i % len(_WORDS)] for i in range(count))
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config: FakeOpenAIConfig = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.config.stats)
+        else:
+            self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self._send_json(400, {'error': {'message': 'Invalid JSON', 'type': 'invalid_request_error'}})
+
+        path = self.path.split('?', 1)[0].rstrip('/')
+        chat = path.endswith('/chat/completions')
+        if not path.endswith('/completions'):
+            return self._send_json(404, {'error': {'message': 'Not found', 'type': 'invalid_request_error'}})
+
+        config = self.config
+        config.count('requests')
+        outcome, latency = config.roll()
+
+        if outcome == 'hang':
+            config.count('hangs')
+            time.sleep(config.hang_seconds)
+        time.sleep(latency)
+
+        if outcome == 'error':
+            config.count('errors')
+            return self._send_json(config.error_status, {
+                'error': {'message': 'Injected upstream failure', 'type': 'server_error'}
+            })
+
+        if chat:
+            prompt = ' '.join(str(message.get('content', '')) for message in body.get('messages', []))
+        else:
+            prompt = body.get('prompt') or ''
+            prompt = prompt[0] if isinstance(prompt, list) and prompt else str(prompt)
+        text = _completion_text(prompt, body.get('max_tokens'))
+        model = body.get('model') or path.split('/engines/', 1)[-1].split('/', 1)[0]
+
+        if body.get('stream'):
+            config.count('streams')
+            return self._stream(text, model, chat)
+
+        choice = {'index': 0, 'finish_reason': 'stop'}
+        if chat:
+            choice['message'] = {'role': 'assistant', 'content': text}
+        else:
+            choice.update({'text': text, 'logprobs': None})
+
+        self._send_json(200, {
+            'id': f"cmpl-fake-{config.stats['requests']}",
+            'object': 'chat.completion' if chat else 'text_completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [choice],
+            'usage': {'prompt_tokens': len(prompt.split()), 'completion_tokens': len(text.split()),
+                      'total_tokens': len(prompt.split()) + len(text.split())}
+        })
+
+    def _stream(self, text, model, chat):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        delay = self.config.token_delay_ms / 1000.0
+        tokens = text.split(' ')
+        for i, token in enumerate(tokens):
+            piece = token if i == 0 else ' ' + token
+            choice = {'index': 0, 'finish_reason': None}
+            if chat:
+                choice['delta'] = {'content': piece}
+            else:
+                choice.update({'text': piece, 'logprobs': None})
+            chunk = {'object': 'chat.completion.chunk' if chat else 'text_completion',
+                     'model': model, 'choices': [choice]}
+            try:
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            except OSError:
+                return
+            if delay:
+                time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out close the socket mid-response; that is
+        # expected under load and not worth a traceback
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_fake_openai(config: FakeOpenAIConfig, host='127.0.0.1', port=0):
+    """Serve the fake API on a daemon thread; returns (server, base_url)"""
+    handler = type('ConfiguredFakeOpenAIHandler', (FakeOpenAIHandler,), {'config': config})
+    server = FakeOpenAIServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='fake-openai', daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/v1"
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='standard deviation of latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected failures')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='fraction of requests that stall')
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help='how long stalled requests wait')
+    parser.add_argument('--token-delay-ms', type=float, default=20.0, help='delay between streamed tokens')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for reproducible runs')
+
+
+def config_from_args(args) -> FakeOpenAIConfig:
+    return FakeOpenAIConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+        token_delay_ms=args.token_delay_ms, seed=args.seed
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake OpenAI completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server, base_url = start_fake_openai(config_from_args(args), args.host, args.port)
+    print(f"Fake OpenAI API listening at {base_url}", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Import-time budget check for the service.
+
+Runs ``python -X importtime -c "import app"`` in a fresh interpreter, reports
+the slowest imports, and fails when the total exceeds the budget or when any
+library that should only load on first use (torch, transformers, sklearn,
+pandas, openai) was imported eagerly. Suitable as a CI step:
+
+    python benchmarks/import_time.py --budget-ms 1500
+
+Run from the ai-service directory. Exits 1 when the check fails.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+LAZY_MODULES = ('torch', 'transformers', 'sklearn', 'pandas', 'openai')
+
+
+def measure_imports(module='app'):
+    """Return [(module, self_us, cumulative_us, depth)] in import order"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    # The warm-up thread imports concurrently, which scrambles -X importtime
+    # nesting; it is start-up work, not import cost
+    env['WARMUP_ENABLED'] = 'false'
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{process.stderr[-2000:]}")
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own_us, cumulative_us, name = line.split('|')
+        own = int(own_us.rsplit(':', 1)[1])
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), own, int(cumulative_us), depth))
+
+    # Children are listed before their parent; keep only the subtree of the
+    # requested module so interpreter start-up (site, .pth files) is excluded
+    end = max(i for i, entry in enumerate(entries) if entry[0] == module and entry[3] == 0)
+    start = end
+    while start > 0 and entries[start - 1][3] > 0:
+        start -= 1
+    return entries[start:end + 1]
+
+
+def check(entries, module, budget_ms, lazy_modules):
+    total_us = next((cumulative for name, _, cumulative, _ in entries if name == module), 0)
+    imported = {name for name, _, _, _ in entries}
+    eager = sorted(
+        name for name in lazy_modules
+        if name in imported or any(other.startswith(name + '.') for other in imported)
+    )
+    return {
+        'module': module,
+        'total_ms': round(total_us / 1000, 1),
+        'budget_ms': budget_ms,
+        'within_budget': total_us / 1000 <= budget_ms,
+        'eager_heavy_imports': eager,
+        'passed': total_us / 1000 <= budget_ms and not eager,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the service import-time budget')
+    parser.add_argument('--module', default='app', help='module to import (default: app)')
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.getenv('IMPORT_TIME_BUDGET_MS', 1500)),
+                        help='maximum cumulative import time')
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    parser.add_argument('--allow', nargs='*', default=[],
+                        help='heavy modules allowed to load at import time')
+    parser.add_argument('--json', action='store_true', help='print the result as JSON')
+    args = parser.parse_args(argv)
+
+    entries = measure_imports(args.module)
+    result = check(entries, args.module, args.budget_ms,
+                   [name for name in LAZY_MODULES if name not in args.allow])
+
+    # The module and its first two levels of imports are what a change can move
+    slowest = sorted(
+        (entry for entry in entries if entry[3] <= 2),
+        key=lambda entry: entry[2], reverse=True
+    )[:args.top]
+    result['slowest'] = [{'module': name, 'cumulative_ms': round(cumulative / 1000, 1),
+                          'self_ms': round(own / 1000, 1)} for name, own, cumulative, _ in slowest]
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {args.module}: {result['total_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for entry in result['slowest']:
+            print(f"  {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+        if result['eager_heavy_imports']:
+            print(f"Imported eagerly: {', '.join(result['eager_heavy_imports'])}")
+        print('PASS' if result['passed'] else 'FAIL')
+
+    return 0 if result['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
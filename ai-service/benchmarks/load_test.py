@@ -0,0 +1,273 @@
+"""Load generator for the OpenAI-backed generation routes.
+
+Drives /api/generate/quiz and /api/generate/text either closed-loop (a fixed
+number of clients sending back to back) or open-loop (a fixed arrival rate,
+with latency measured from each request's scheduled start so a slow server
+cannot hide queueing). Reports throughput, latency percentiles, error and
+status counts, and how many requests fell back from OpenAI, read from the
+service's /metrics.
+
+Against a running service:
+
+    python benchmarks/load_test.py --url http://localhost:8000 --concurrency 32 --duration 30
+
+Fully offline, serving the app in-process against the fake OpenAI server
+(HuggingFace is stubbed so fallbacks stay cheap):
+
+    python benchmarks/load_test.py --serve --rate 20 --duration 30 --latency-ms 800 --error-rate 0.1
+
+Run from the ai-service directory.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import importlib
+import statistics
+import tempfile
+import http.client
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_openai import add_config_arguments, config_from_args, start_fake_openai  # noqa: E402
+from run_benchmarks import SRC_DIR, install_stub_backend  # noqa: E402
+
+ROUTES = {
+    'quiz': '/api/generate/quiz',
+    'text': '/api/generate/text',
+}
+
+
+def _payload(route, index, questions):
+    if route == 'quiz':
+        return {'topic': f"Topic {index % 20}", 'num_questions': questions, 'difficulty': 'medium'}
+    return {'prompt': f"Explain concept number {index % 50}", 'max_length': 100}
+
+
+class LoadClient:
+    def __init__(self, base_url: str, timeout: float):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+
+    def post(self, path, payload):
+        """Return (status, error); status is None when no response arrived"""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request('POST', path, body=json.dumps(payload),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            return response.status, None
+        except Exception as e:
+            return None, type(e).__name__
+        finally:
+            connection.close()
+
+    def get_text(self, path):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            return response.read().decode('utf-8', 'replace') if response.status == 200 else ''
+        except Exception:
+            return ''
+        finally:
+            connection.close()
+
+
+def fallback_counts(client) -> Counter:
+    """ai_openai_fallbacks_total by operation, scraped from /metrics"""
+    counts = Counter()
+    for line in client.get_text('/metrics').splitlines():
+        if line.startswith('ai_openai_fallbacks_total{'):
+            labels, value = line.rsplit(' ', 1)
+            operation = labels.split('operation="', 1)[1].split('"', 1)[0]
+            counts[operation] += float(value)
+    return counts
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {route: [] for route in ROUTES}
+
+    def add(self, route, latency, status, error):
+        with self._lock:
+            self.samples[route].append((latency, status, error))
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def summarize(recorder, wall_seconds):
+    summary = {}
+    for route, samples in recorder.samples.items():
+        if not samples:
+            continue
+        latencies = sorted(latency for latency, _, _ in samples)
+        statuses = Counter(str(status) if status is not None else error for _, status, error in samples)
+        failed = sum(1 for _, status, _ in samples if status is None or status >= 400)
+        summary[route] = {
+            'requests': len(samples),
+            'errors': failed,
+            'error_rate': failed / len(samples),
+            'throughput_rps': len(samples) / wall_seconds if wall_seconds > 0 else None,
+            'latency_seconds': {
+                'mean': statistics.fmean(latencies),
+                'p50': _percentile(latencies, 0.50),
+                'p90': _percentile(latencies, 0.90),
+                'p99': _percentile(latencies, 0.99),
+                'max': latencies[-1],
+            },
+            'statuses': dict(statuses),
+        }
+    return summary
+
+
+def run_closed_loop(client, routes, concurrency, duration, questions, recorder):
+    deadline = time.perf_counter() + duration
+    counter = iter(range(1 << 62))
+    counter_lock = threading.Lock()
+
+    def worker():
+        while time.perf_counter() < deadline:
+            with counter_lock:
+                index = next(counter)
+            route = routes[index % len(routes)]
+            start = time.perf_counter()
+            status, error = client.post(ROUTES[route], _payload(route, index, questions))
+            recorder.add(route, time.perf_counter() - start, status, error)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_open_loop(client, routes, rate, duration, max_in_flight, questions, recorder):
+    total = int(rate * duration)
+
+    def send(index, scheduled):
+        route = routes[index % len(routes)]
+        status, error = client.post(ROUTES[route], _payload(route, index, questions))
+        # Measured from the scheduled start, so time spent queued behind
+        # slow requests counts against the server
+        recorder.add(route, time.perf_counter() - scheduled, status, error)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        for index in range(total):
+            scheduled = start + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, index, scheduled)
+
+
+def serve_in_process(args):
+    """Start the fake OpenAI API and the app on local ports; returns base URL and fake config"""
+    fake_config = config_from_args(args)
+    _, api_base = start_fake_openai(fake_config)
+
+    # The OpenAI client and AI_CONFIG read these at import time
+    os.environ['OPENAI_API_BASE'] = api_base
+    os.environ.setdefault('OPENAI_API_KEY', 'sk-fake-load-test')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # Stubbed models have nothing to warm up
+    os.environ.setdefault('WARMUP_ENABLED', 'false')
+    install_stub_backend(args.backend_latency_ms / 1000.0, stub_openai=False)
+
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    sys.path.insert(0, os.path.abspath(SRC_DIR))
+    flask_app = importlib.import_module('app').app
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, name='ai-service', daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", fake_config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the OpenAI-backed generation routes')
+    parser.add_argument('--url', default='http://localhost:8000', help='service base URL')
+    parser.add_argument('--serve', action='store_true',
+                        help='serve the app in-process against a local fake OpenAI server')
+    parser.add_argument('--routes', nargs='+', choices=sorted(ROUTES), default=sorted(ROUTES))
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds to generate load')
+    parser.add_argument('--concurrency', type=int, default=16, help='closed-loop clients')
+    parser.add_argument('--rate', type=float, default=None,
+                        help='open-loop arrival rate in requests/second (overrides --concurrency)')
+    parser.add_argument('--max-in-flight', type=int, default=256, help='open-loop client threads')
+    parser.add_argument('--timeout', type=float, default=120.0, help='client-side request timeout')
+    parser.add_argument('--questions', type=int, default=5, help='num_questions per quiz request')
+    parser.add_argument('--backend-latency-ms', type=float, default=0.0,
+                        help='latency of the stubbed HuggingFace fallback (--serve only)')
+    parser.add_argument('--output', help='write the JSON report to this file (default: stdout)')
+    add_config_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake_config = None
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = None
+    if args.serve:
+        # Keep logs and saved models out of the tree
+        workdir = tempfile.TemporaryDirectory(prefix='ai-load-test-')
+        os.chdir(workdir.name)
+        base_url, fake_config = serve_in_process(args)
+    else:
+        base_url = args.url
+
+    client = LoadClient(base_url, args.timeout)
+    recorder = Recorder()
+    fallbacks_before = fallback_counts(client)
+
+    start = time.perf_counter()
+    if args.rate:
+        run_open_loop(client, args.routes, args.rate, args.duration, args.max_in_flight,
+                      args.questions, recorder)
+    else:
+        run_closed_loop(client, args.routes, args.concurrency, args.duration, args.questions, recorder)
+    wall = time.perf_counter() - start
+
+    fallbacks = fallback_counts(client) - fallbacks_before
+    report = {
+        'target': base_url,
+        'mode': 'open' if args.rate else 'closed',
+        'rate': args.rate,
+        'concurrency': None if args.rate else args.concurrency,
+        'duration_seconds': wall,
+        'routes': summarize(recorder, wall),
+        'openai_fallbacks': dict(fallbacks),
+    }
+    if fake_config is not None:
+        report['fake_openai'] = {
+            'latency_ms': fake_config.latency_ms,
+            'jitter_ms': fake_config.jitter_ms,
+            'error_rate': fake_config.error_rate,
+            'hang_rate': fake_config.hang_rate,
+            'stats': dict(fake_config.stats),
+        }
+
+    text = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,666 @@
+"""Benchmark harness for the AI service.
+
+Times the text helpers, length-bucketed transformer batching, the
+tokenization cache (when transformers is installed), image feature
+extraction, recommendation training and lookup at several sizes, cold-start
+catalog recommendations, semantic
+vector search (exhaustive and inverted-file), and every HTTP route under
+concurrent load. Model
+backends (HuggingFace and OpenAI) are replaced by deterministic stubs with an
+optional simulated latency, so results measure this service's own code and
+can be compared across commits.
+
+Run from the ai-service directory:
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --quick --only text image
+    python benchmarks/run_benchmarks.py --compare baseline.json results.json
+
+Results are JSON: environment metadata plus one entry per benchmark with
+per-call timings (seconds). --compare exits with status 1 when any median
+regressed by more than --threshold.
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import platform
+import importlib
+import statistics
+import subprocess
+import tempfile
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src')
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+GROUPS = ('text', 'batching', 'tokenization', 'image', 'recommendation', 'search', 'http')
+
+_WORDS = (
+    'learning model quiz question answer student science history language data network '
+    'analysis result energy planet culture theory method system value market music art '
+    'the a of and to in is that for it with as on was by this be are from at an'
+).split()
+
+
+# --- Stubbed model backend --------------------------------------------------
+
+class StubHuggingFaceService:
+    """Deterministic stand-in for HuggingFaceService"""
+
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def analyze_sentiment(self, text, quality=None, deadline=None):
+        self._wait()
+        positive = 0.5 + (len(text) % 50) / 100
+        return {
+            'overall_sentiment': 'positive' if positive >= 0.5 else 'negative',
+            'confidence': positive,
+            'scores': {'positive': positive, 'negative': 1 - positive}
+        }
+
+    def extract_entities(self, text, quality=None, deadline=None):
+        self._wait()
+        return [{'entity': 'MISC', 'word': word, 'score': 0.9}
+                for word in text.split()[:5] if word[:1].isupper()]
+
+    def analyze_sentiment_batch(self, texts, quality=None, deadline=None):
+        self._wait()
+        return [self.analyze_sentiment(text) for text in texts]
+
+    def extract_entities_batch(self, texts, quality=None, deadline=None):
+        self._wait()
+        return [self.extract_entities(text) for text in texts]
+
+    def generate_text(self, prompt, max_length=100, temperature=0.7, quality=None, deadline=None):
+        self._wait()
+        return ' '.join([prompt] + _WORDS[:max(1, max_length // 10)])
+
+    def classify_text(self, text, labels, quality=None, deadline=None):
+        self._wait()
+        return {'labels': list(labels), 'scores': [1.0 / len(labels)] * len(labels)}
+
+
+class StubOpenAIService:
+    """Deterministic stand-in for OpenAIService"""
+
+    latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def generate_text(self, prompt, max_length=100, temperature=0.7):
+        self._wait()
+        return f"{prompt}: " + ' '.join(_WORDS[:max(1, max_length // 10)])
+
+    def generate_quiz_question(self, topic, difficulty='medium'):
+        self._wait()
+        return (f"Question: Which statement about {topic} is true?\n"
+                f"A) First fact about {topic}\nB) Second fact\nC) Third fact\nD) Fourth fact\n"
+                "Correct Answer: A\nExplanation: Stubbed response")
+
+    def is_available(self):
+        return True
+
+
+def install_stub_backend(latency: float = 0.0, stub_openai: bool = True):
+    """Replace the model service modules before any controller imports them"""
+    StubHuggingFaceService.latency = latency
+    StubOpenAIService.latency = latency
+    stubs = [('services.huggingface_service', 'HuggingFaceService', StubHuggingFaceService)]
+    if stub_openai:
+        stubs.append(('services.openai_service', 'OpenAIService', StubOpenAIService))
+    for name, attr, stub in stubs:
+        module = types.ModuleType(name)
+        setattr(module, attr, stub)
+        sys.modules[name] = module
+
+
+# --- Measurement -------------------------------------------------------------
+
+def _summarize(samples, extra=None):
+    samples = sorted(samples)
+    stats = {
+        'rounds': len(samples),
+        'min': samples[0],
+        'max': samples[-1],
+        'mean': statistics.fmean(samples),
+        'median': statistics.median(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'p90': samples[min(len(samples) - 1, int(len(samples) * 0.90))],
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+    stats['ops_per_second'] = 1.0 / stats['median'] if stats['median'] > 0 else None
+    if extra:
+        stats.update(extra)
+    return stats
+
+
+def measure(func, rounds: int, min_time: float):
+    """Per-call seconds over `rounds` rounds, each looping long enough to time"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples, number
+
+
+class BenchmarkRunner:
+    def __init__(self, rounds: int, min_time: float):
+        self.rounds = rounds
+        self.min_time = min_time
+        self.results = []
+
+    def bench(self, group, name, params, func, rounds=None):
+        samples, number = measure(func, rounds or self.rounds, self.min_time)
+        self.record(group, name, params, _summarize(samples, {'calls_per_round': number}))
+
+    def record(self, group, name, params, stats):
+        label = ','.join(f"{key}={value}" for key, value in params.items())
+        full_name = f"{group}.{name}[{label}]" if label else f"{group}.{name}"
+        self.results.append({'name': full_name, 'group': group, 'params': params, 'stats': stats})
+        print(f"{full_name:60s} median {stats['median'] * 1000:10.3f} ms", file=sys.stderr)
+
+
+def _text(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(6, 18))
+        sentence = ' '.join(rng.choice(_WORDS) for _ in range(length))
+        sentences.append(sentence.capitalize() + rng.choice('.!?'))
+        words -= length
+    return ' '.join(sentences)
+
+
+# --- Benchmarks --------------------------------------------------------------
+
+def bench_text(runner, sizes):
+    from services.preprocessing import PreprocessingService
+    from controllers.analysis_controller import AnalysisController
+
+    preprocessing = PreprocessingService()
+    controller = AnalysisController()
+
+    for words in sizes:
+        text = _text(words)
+        runner.bench('text', 'clean_text', {'words': words}, lambda: preprocessing.clean_text(text))
+        runner.bench('text', 'extract_keywords', {'words': words}, lambda: controller.extract_keywords(text))
+        runner.bench('text', 'calculate_readability', {'words': words},
+                     lambda: controller.calculate_readability(text))
+
+
+class _PaddedCostPipeline:
+    """Pipeline stand-in that takes time per padded token, like a forward pass"""
+
+    tokenizer = None
+    seconds_per_token = 2e-6
+
+    def __call__(self, texts, batch_size=None, **kwargs):
+        longest = max(len(text.split()) for text in texts)
+        time.sleep(len(texts) * longest * self.seconds_per_token)
+        return [[{'label': 'positive', 'score': 0.9}] for _ in texts]
+
+
+def _load_real_huggingface_service():
+    # install_stub_backend replaced the module in sys.modules
+    import importlib.util
+
+    path = os.path.join(SRC_DIR, 'services', 'huggingface_service.py')
+    spec = importlib.util.spec_from_file_location('_benchmark_huggingface_service', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_batching(runner, counts):
+    from config.ai_config import AI_CONFIG
+
+    module = _load_real_huggingface_service()
+    service = module.HuggingFaceService()
+    pipeline = _PaddedCostPipeline()
+    service._pipelines['sentiment'] = pipeline
+    batch_size = AI_CONFIG['batching']['batch_size']
+
+    for count in counts:
+        rng = random.Random(count)
+        # Mostly short posts with a long tail, as in real submissions
+        lengths = [rng.randint(200, 400) if rng.random() < 0.1 else rng.randint(5, 40) for _ in range(count)]
+        texts = [_text(length, seed=i) for i, length in enumerate(lengths)]
+        uniform = [_text(sum(lengths) // count, seed=i) for i in range(count)]
+
+        def unsorted():
+            for start in range(0, count, batch_size):
+                pipeline(texts[start:start + batch_size])
+
+        def uniform_length():
+            for start in range(0, count, batch_size):
+                pipeline(uniform[start:start + batch_size])
+
+        params = {'texts': count, 'batch_size': batch_size}
+        runner.bench('batching', 'unsorted', params, unsorted)
+        runner.bench('batching', 'bucketed', params, lambda: service.analyze_sentiment_batch(texts))
+        runner.bench('batching', 'uniform_length', params, uniform_length)
+
+
+def _local_fast_tokenizer():
+    """A small WordPiece tokenizer trained in memory, so no model download is needed"""
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors, trainers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.WordPiece(unk_token='[UNK]'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(
+        [_text(2000, seed=i) for i in range(20)],
+        trainers.WordPieceTrainer(vocab_size=500, special_tokens=['[UNK]', '[CLS]', '[SEP]', '[PAD]'])
+    )
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single='[CLS] $A [SEP]', pair='[CLS] $A [SEP] $B [SEP]', special_tokens=[('[CLS]', 1), ('[SEP]', 2)])
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token='[UNK]', cls_token='[CLS]',
+                                   sep_token='[SEP]', pad_token='[PAD]')
+
+
+def bench_tokenization(runner, sizes):
+    try:
+        plain = _local_fast_tokenizer()
+        cached = _local_fast_tokenizer()
+    except ImportError:
+        print("tokenization: transformers/tokenizers not installed, skipped", file=sys.stderr)
+        return
+
+    from services.tokenization_cache import enable_tokenization_cache
+    enable_tokenization_cache(cached)
+    options = {'truncation': True, 'max_length': 512, 'return_offsets_mapping': True}
+
+    for words in sizes:
+        document = _text(words, seed=words)
+        params = {'words': words}
+        # Sentiment, NER and zero-shot each tokenizing the same document
+        runner.bench('tokenization', 'uncached', params, lambda: [plain(document, **options) for _ in range(3)])
+        runner.bench('tokenization', 'cached', params, lambda: [cached(document, **options) for _ in range(3)])
+
+
+def _image(size, seed=0):
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    width, height = size
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    noise = rng.integers(0, 64, (height, width, 3)).astype(np.float32)
+    return Image.fromarray(np.clip(gradient + noise, 0, 255).astype(np.uint8), 'RGB')
+
+
+def bench_images(runner, sizes):
+    from models.image_model import ImageModel
+
+    model = ImageModel()
+    for size in sizes:
+        image = _image(size)
+        runner.bench('image', 'extract_features', {'size': f"{size[0]}x{size[1]}"},
+                     lambda: model.extract_features(image))
+
+
+def _interactions(users, items, count, seed=0):
+    rng = random.Random(seed)
+    # Skewed item popularity, like real interaction logs
+    weights = [1.0 / (rank + 1) ** 0.8 for rank in range(items)]
+    item_ids = rng.choices(range(items), weights=weights, k=count)
+    return [
+        {'user_id': f"user_{rng.randrange(users)}", 'item_id': f"item_{item}",
+         'rating': rng.randint(1, 5)}
+        for item in item_ids
+    ]
+
+
+def bench_recommendations(runner, sizes):
+    from models.recommendation_model import RecommendationModel
+
+    for users, items, count in sizes:
+        params = {'users': users, 'items': items, 'interactions': count}
+        interactions = _interactions(users, items, count)
+        parameters = {'n_components': min(50, items - 1)}
+
+        model = RecommendationModel()
+        runner.bench('recommendation', 'train', params,
+                     lambda: model.train(interactions, parameters), rounds=min(runner.rounds, 3))
+
+        als_parameters = {'algorithm': 'als', 'factors': parameters['n_components']}
+        runner.bench('recommendation', 'train_als', params,
+                     lambda: model.train(interactions, als_parameters), rounds=min(runner.rounds, 3))
+        # Train last with SVD so the serving benchmarks below are unchanged
+        model.train(interactions, parameters)
+
+        user_ids = list(model.user_features.index)
+        cursor = iter(range(1 << 62))
+        runner.bench('recommendation', 'recommend', params,
+                     lambda: model.get_recommendations(user_ids[next(cursor) % len(user_ids)], limit=10))
+        runner.bench('recommendation', 'similar_users', params,
+                     lambda: model.get_similar_users(user_ids[next(cursor) % len(user_ids)], limit=10))
+        runner.bench('recommendation', 'similar_users_batch', dict(params, batch=100),
+                     lambda: model.get_similar_users_batch(user_ids[:100], limit=10))
+
+
+def _catalog_items(count, seed=0):
+    rng = random.Random(seed)
+    categories = [f"category_{i}" for i in range(max(10, count // 2000))]
+    tags = [f"tag_{i}" for i in range(max(50, count // 50))]
+    return [
+        {'id': f"item_{i}", 'title': _text(6, seed * count + i), 'category': rng.choice(categories),
+         'tags': rng.sample(tags, 3), 'popularity': int(rng.paretovariate(1.2))}
+        for i in range(count)
+    ]
+
+
+def bench_catalog(runner, sizes):
+    from models.item_catalog import ItemCatalog
+
+    queries = [
+        ('category', {'categories': ['category_1']}),
+        ('tags', {'tags': ['tag_1', 'tag_2']}),
+        ('mixed', {'categories': ['category_1', 'category_2'], 'tags': ['tag_3'], 'keywords': ['model data']}),
+        ('popular', {}),
+    ]
+    for count in sizes:
+        items = _catalog_items(count)
+
+        def build():
+            catalog = ItemCatalog()
+            catalog.add(items)
+            catalog.recommend({}, 1)
+
+        runner.bench('recommendation', 'catalog_build', {'items': count}, build, rounds=min(runner.rounds, 3))
+
+        catalog = ItemCatalog()
+        catalog.add(items)
+        for name, preferences in queries:
+            runner.bench('recommendation', 'catalog_recommend', {'items': count, 'query': name},
+                         lambda: catalog.recommend(preferences, 10))
+
+
+def _clustered_vectors(count, dimension, seed=0):
+    import numpy as np
+
+    # Topics as cluster centres with noisy posts around them, like real embeddings
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(8, count // 500), dimension)).astype(np.float32)
+    vectors = centres[rng.integers(len(centres), size=count)] + \
+        0.5 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def bench_search(runner, sizes, dimension=384, queries=50):
+    import numpy as np
+    from models.vector_index import VectorIndex
+
+    for count in sizes:
+        vectors = _clustered_vectors(count, dimension)
+        ids = [str(i) for i in range(count)]
+        probes = vectors[np.random.default_rng(1).choice(count, queries, replace=False)]
+
+        flat = VectorIndex(ivf_threshold=count + 1)
+        flat.add(ids, vectors)
+        ivf = VectorIndex(ivf_threshold=min(count, 2000))
+        ivf.add(ids, vectors)
+
+        expected = [{match['id'] for match in flat.search(query, 10)} for query in probes]
+        found = [{match['id'] for match in ivf.search(query, 10)} for query in probes]
+        recall = sum(len(e & f) for e, f in zip(expected, found)) / (10.0 * queries)
+
+        for name, index in (('flat', flat), ('ivf', ivf)):
+            cursor = iter(range(1 << 62))
+            samples, number = measure(lambda: index.search(probes[next(cursor) % queries], 10),
+                                      runner.rounds, runner.min_time)
+            runner.record('search', name, {'vectors': count, 'dimension': dimension},
+                          _summarize(samples, {'calls_per_round': number,
+                                               'recall_at_10': 1.0 if name == 'flat' else round(recall, 3)}))
+
+
+def _multipart(field, filename, payload, content_type):
+    boundary = 'benchmark-boundary'
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def _json_body(data):
+    return json.dumps(data).encode(), 'application/json'
+
+
+def _png(seed):
+    buffer = io.BytesIO()
+    _image((256, 256), seed).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _route_scenarios(total_requests, seed):
+    """(name, path, list of request bodies); every body is built before timing"""
+    text = _text(120, seed)
+    interactions = _interactions(50, 40, 600, seed)
+    training_texts = [
+        {'text': _text(30, seed + i), 'label': 'science' if i % 2 else 'history'} for i in range(40)
+    ]
+
+    return [
+        ('analyze_text', '/api/analyze/text', [_json_body({'text': text})]),
+        ('analyze_sentiment', '/api/analyze/sentiment', [_json_body({'text': text})]),
+        ('analyze_entities_batch', '/api/analyze/entities', [_json_body({'texts': [text, text[:80], text[:20]]})]),
+        # Distinct images, so the duplicate cache never short-circuits analysis
+        ('analyze_image', '/api/analyze/image', [
+            _multipart('image', f"{seed}_{i}.png", _png(seed * 100000 + i), 'image/png')
+            for i in range(total_requests)
+        ]),
+        ('generate_text', '/api/generate/text', [_json_body({'prompt': 'photosynthesis', 'max_length': 100})]),
+        ('generate_quiz', '/api/generate/quiz', [_json_body({'topic': 'Science', 'num_questions': 5})]),
+        ('recommendations', '/api/recommendations', [
+            _json_body({'user_id': f"user_{i % 50}", 'limit': 10}) for i in range(50)
+        ]),
+        ('train_text_classification', '/api/train/model', [_json_body({
+            'model_type': 'text_classification', 'training_data': training_texts
+        })]),
+        ('train_recommendation', '/api/train/model', [_json_body({
+            'model_type': 'recommendation', 'training_data': interactions,
+            'parameters': {'n_components': 10}
+        })]),
+    ]
+
+
+def _send(port, path, body, content_type):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        start = time.perf_counter()
+        connection.request('POST', path, body=body, headers={'Content-Type': content_type})
+        response = connection.getresponse()
+        response.read()
+        return time.perf_counter() - start, response.status
+    finally:
+        connection.close()
+
+
+def bench_http(runner, concurrency_levels, total_requests):
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    flask_app = importlib.import_module('app').app
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True, request_handler=QuietRequestHandler)
+    port = server.server_port
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        # Recommendations need a trained model on disk
+        interactions = _interactions(50, 40, 600)
+        _send(port, '/api/train/model', *_json_body({
+            'model_type': 'recommendation', 'training_data': interactions, 'parameters': {'n_components': 10}
+        }))
+
+        for level, concurrency in enumerate(concurrency_levels):
+            for name, path, bodies in _route_scenarios(total_requests, seed=level + 1):
+                requests = [bodies[i % len(bodies)] for i in range(total_requests)]
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                    outcomes = list(executor.map(lambda request: _send(port, path, *request), requests))
+                wall = time.perf_counter() - start
+
+                errors = sum(1 for _, status in outcomes if status >= 400)
+                runner.record('http', name, {'concurrency': concurrency}, _summarize(
+                    [latency for latency, _ in outcomes],
+                    {'requests': total_requests, 'errors': errors,
+                     'throughput_rps': total_requests / wall if wall > 0 else None}
+                ))
+    finally:
+        server.shutdown()
+
+
+# --- Results -------------------------------------------------------------------
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _environment(args):
+    import numpy
+    return {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'quick': args.quick,
+        'backend_latency_ms': args.backend_latency_ms,
+    }
+
+
+def compare(baseline_path, current_path, threshold):
+    """Print median changes between two result files; return regressed names"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {result['name']: result['stats'] for result in json.load(f)['results']}
+    with open(current_path, encoding='utf-8') as f:
+        current = {result['name']: result['stats'] for result in json.load(f)['results']}
+
+    regressions = []
+    print(f"{'benchmark':60s} {'baseline ms':>12s} {'current ms':>12s} {'change':>8s}")
+    for name in sorted(set(baseline) & set(current)):
+        old, new = baseline[name]['median'], current[name]['median']
+        change = (new - old) / old if old else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:60s} {old * 1000:12.3f} {new * 1000:12.3f} {change:+8.1%}{flag}")
+
+    for name in sorted(set(current) - set(baseline)):
+        print(f"{name:60s} {'-':>12s} {current[name]['median'] * 1000:12.3f}      new")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the AI service')
+    parser.add_argument('--output', help='write JSON results to this file (default: stdout)')
+    parser.add_argument('--only', nargs='+', choices=GROUPS, help='benchmark groups to run')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes and fewer rounds')
+    parser.add_argument('--rounds', type=int, default=None, help='timing rounds per benchmark')
+    parser.add_argument('--min-time', type=float, default=0.05, help='minimum seconds per round')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=None, help='HTTP client threads')
+    parser.add_argument('--requests', type=int, default=None, help='HTTP requests per route and level')
+    parser.add_argument('--backend-latency-ms', type=float, default=0.0,
+                        help='simulated latency of each stubbed model call')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative median slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(args.compare[0], args.compare[1], args.threshold)
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    groups = args.only or GROUPS
+    rounds = args.rounds or (3 if args.quick else 7)
+    runner = BenchmarkRunner(rounds, args.min_time)
+
+    # Keep per-request logging and metrics from dominating the measurements
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # Stubbed models have nothing to warm up
+    os.environ.setdefault('WARMUP_ENABLED', 'false')
+    install_stub_backend(args.backend_latency_ms / 1000.0)
+
+    # Models and indexes are written relative to the working directory
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='ai-benchmark-') as workdir:
+        os.chdir(workdir)
+
+        if 'text' in groups:
+            bench_text(runner, (100, 1000) if args.quick else (100, 1000, 10000))
+        if 'batching' in groups:
+            bench_batching(runner, (64, 256) if args.quick else (64, 256, 1024))
+        if 'tokenization' in groups:
+            bench_tokenization(runner, (1000, 10000) if args.quick else (1000, 10000, 50000))
+        if 'image' in groups:
+            bench_images(runner, ((256, 256), (1024, 768)) if args.quick
+                         else ((256, 256), (1024, 768), (2048, 1536)))
+        if 'recommendation' in groups:
+            bench_recommendations(runner, ((200, 100, 2000), (1000, 400, 20000)) if args.quick
+                                  else ((200, 100, 2000), (1000, 400, 20000), (5000, 1500, 100000)))
+            bench_catalog(runner, (10000, 100000) if args.quick else (10000, 100000, 500000))
+        if 'search' in groups:
+            bench_search(runner, (10000, 50000) if args.quick else (10000, 50000, 200000))
+        if 'http' in groups:
+            bench_http(runner, args.concurrency or ((1, 4) if args.quick else (1, 4, 16)),
+                       args.requests or (50 if args.quick else 200))
+
+        os.chdir(original_cwd)
+
+    report = json.dumps({'environment': _environment(args), 'results': runner.results}, indent=2)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
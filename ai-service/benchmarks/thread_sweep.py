@@ -0,0 +1,222 @@
+"""Sweep per-worker thread settings and recommend the fastest.
+
+Launches N worker processes at once, each configured through
+utils.parallelism exactly as the service configures its gunicorn workers,
+runs a model workload in all of them for a fixed time and measures total
+throughput and per-call latency. Every combination of intra-op threads,
+inter-op threads and CPU pinning is tried; the best is printed as the
+environment settings to deploy with.
+
+Workloads:
+    encoder   a torch transformer encoder layer (falls back to numpy matmuls
+              when torch is not installed)
+    pipeline  the service's real sentiment pipeline (models must be cached)
+
+Run from the ai-service directory:
+
+    python benchmarks/thread_sweep.py --workers 4 --duration 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import subprocess
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'src'))
+
+_TEXTS = [
+    'The new quiz format made revising for the exam far less stressful than I expected.',
+    'I did not enjoy the last chapter at all; the questions were confusing and unfair.',
+    'Photosynthesis converts light energy into chemical energy stored in glucose molecules.',
+] * 3
+
+
+def _encoder_workload():
+    try:
+        import torch
+    except ImportError:
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        inputs = rng.standard_normal((8 * 128, 512), dtype=np.float32)
+        weights = rng.standard_normal((512, 2048), dtype=np.float32)
+        return lambda: inputs @ weights, 'numpy_matmul'
+
+    from utils.parallelism import configure_torch
+    configure_torch()
+
+    layer = torch.nn.TransformerEncoderLayer(d_model=512, nhead=8, dim_feedforward=2048, batch_first=True).eval()
+    inputs = torch.randn(8, 128, 512)
+
+    def run():
+        with torch.inference_mode():
+            layer(inputs)
+    return run, 'torch_encoder'
+
+
+def _pipeline_workload():
+    from services.huggingface_service import HuggingFaceService
+
+    service = HuggingFaceService()
+    pipeline = service.sentiment_pipeline
+    if pipeline is None:
+        raise RuntimeError('Sentiment pipeline unavailable')
+    return lambda: pipeline(_TEXTS), 'sentiment_pipeline'
+
+
+def run_worker(workload, duration):
+    """Child process: configure threads, signal READY, wait for GO, then measure"""
+    sys.path.insert(0, SRC_DIR)
+    from utils.parallelism import configure_process
+
+    plan = configure_process(int(os.environ.get('WORKER_INDEX', 0)))
+    run, name = _pipeline_workload() if workload == 'pipeline' else _encoder_workload()
+    run()  # first call allocates buffers and thread pools
+
+    print('READY', flush=True)
+    sys.stdin.readline()
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+
+    print(json.dumps({'workload': name, 'plan': plan, 'latencies': latencies}), flush=True)
+
+
+def run_setting(workers, intra_op, inter_op, affinity, workload, duration):
+    """Run one setting across all workers; returns the aggregated result"""
+    env_base = dict(
+        os.environ,
+        WORKERS=str(workers),
+        TORCH_INTRA_OP_THREADS=str(intra_op),
+        TORCH_INTEROP_THREADS=str(inter_op),
+        CPU_AFFINITY='true' if affinity else 'false',
+        LOG_LEVEL='WARNING',
+    )
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS'):
+        env_base.pop(name, None)
+
+    processes = []
+    for index in range(workers):
+        env = dict(env_base, WORKER_INDEX=str(index))
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', '--workload', workload,
+             '--duration', str(duration)],
+            cwd=SRC_DIR, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        ))
+
+    for process in processes:
+        line = process.stdout.readline().strip()
+        if line != 'READY':
+            for other in processes:
+                other.kill()
+            raise RuntimeError(f"Worker failed to start: {line or process.wait()}")
+
+    for process in processes:
+        process.stdin.write('GO\n')
+        process.stdin.flush()
+
+    latencies = []
+    workload_name = None
+    for process in processes:
+        output, _ = process.communicate()
+        result = json.loads(output.strip().splitlines()[-1])
+        workload_name = result['workload']
+        latencies.extend(result['latencies'])
+
+    latencies.sort()
+    return {
+        'intra_op_threads': intra_op,
+        'inter_op_threads': inter_op,
+        'cpu_affinity': affinity,
+        'workload': workload_name,
+        'calls': len(latencies),
+        'throughput_per_second': len(latencies) / duration,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+def _candidates(cores, workers):
+    share = max(1, cores // workers)
+    values = {1, share}
+    value = 2
+    while value <= cores:
+        values.add(value)
+        value *= 2
+    return sorted(values)
+
+
+def recommend(results, latency_slack):
+    """Highest throughput among settings whose p99 stays near the best p99"""
+    best_p99 = min(result['p99_ms'] for result in results)
+    eligible = [result for result in results if result['p99_ms'] <= best_p99 * latency_slack]
+    return max(eligible, key=lambda result: result['throughput_per_second'])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep torch/OpenMP thread settings per worker')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: Config.WORKERS)')
+    parser.add_argument('--intra-op', type=int, nargs='+', default=None, help='intra-op thread counts to try')
+    parser.add_argument('--inter-op', type=int, nargs='+', default=[1, 2], help='inter-op thread counts to try')
+    parser.add_argument('--affinity', choices=('off', 'on', 'both'), default='both', help='CPU pinning to try')
+    parser.add_argument('--workload', choices=('encoder', 'pipeline'), default='encoder')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds measured per setting')
+    parser.add_argument('--latency-slack', type=float, default=2.0,
+                        help='ignore settings whose p99 exceeds the best p99 by this factor')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.workload, args.duration)
+        return 0
+
+    sys.path.insert(0, SRC_DIR)
+    from config.settings import get_config
+
+    config = get_config()
+    workers = args.workers or config.WORKERS
+    intra_values = args.intra_op or _candidates(config.CPU_CORES, workers)
+    affinity_values = {'off': [False], 'on': [True], 'both': [False, True]}[args.affinity]
+    if not hasattr(os, 'sched_setaffinity'):
+        affinity_values = [False]
+
+    results = []
+    for intra_op, inter_op, affinity in itertools.product(intra_values, args.inter_op, affinity_values):
+        result = run_setting(workers, intra_op, inter_op, affinity, args.workload, args.duration)
+        results.append(result)
+        print(f"intra={intra_op:<3d} inter={inter_op:<2d} pinned={str(affinity):5s} "
+              f"{result['throughput_per_second']:9.2f} calls/s  p50 {result['p50_ms']:8.2f} ms  "
+              f"p99 {result['p99_ms']:8.2f} ms", file=sys.stderr)
+
+    best = recommend(results, args.latency_slack)
+    report = {
+        'workers': workers,
+        'cores': config.CPU_CORES,
+        'results': results,
+        'recommended': best,
+        'environment': {
+            'WORKERS': str(workers),
+            'TORCH_INTRA_OP_THREADS': str(best['intra_op_threads']),
+            'TORCH_INTEROP_THREADS': str(best['inter_op_threads']),
+            'CPU_AFFINITY': 'true' if best['cpu_affinity'] else 'false',
+        }
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    print('\nRecommended settings:', file=sys.stderr)
+    for name, value in report['environment'].items():
+        print(f"{name}={value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
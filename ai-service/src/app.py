@@ -1,55 +1,125 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 import logging
-from routes.api_routes import api_bp
-from utils.logger import setup_logger
 
-# Load environment variables
-load_dotenv()
-
-app = Flask(__name__)
-
-# Configure CORS
-CORS(app, origins=[
-    "http://localhost:3000",  # React frontend
-    "http://localhost:5000"   # Node.js backend
-])
-
-# Setup logging
-setup_logger()
 logger = logging.getLogger(__name__)
 
-# Register blueprints
-app.register_blueprint(api_bp, url_prefix='/api')
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'service': 'AI Service',
-        'version': '1.0.0'
-    }), 200
+def create_app():
+    from utils.parallelism import configure_process
+    
+    # Thread budgets must be in place before numpy/torch load their thread pools;
+    # WORKER_INDEX is set per worker by gunicorn.conf.py
+    thread_plan = configure_process(int(os.environ['WORKER_INDEX']) if 'WORKER_INDEX' in os.environ else None)
+    
+    from routes.api_routes import api_bp, analysis_controller, prediction_controller
+    from utils.logger import setup_logger, request_id_var
+    from utils.metrics import REGISTRY
+    from utils.profiling import PROFILER
+    from utils.readiness import READINESS
+    from services.warmup import start_warmup
+    
+    # Load environment variables
+    load_dotenv()
+    
+    app = Flask(__name__)
+    
+    # Configure CORS
+    CORS(app, origins=[
+        "http://localhost:3000",  # React frontend
+        "http://localhost:5000"   # Node.js backend
+    ])
+    
+    # Setup logging
+    setup_logger()
+    
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_id_token = request_id_var.set(g.request_id)
+        g.started_at = time.perf_counter()
+    
+    @app.after_request
+    def log_request(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        if 'started_at' in g:
+            logger.info(
+                "%s %s %s",
+                request.method, request.path, response.status_code,
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duration_ms': round((time.perf_counter() - g.started_at) * 1000, 2)
+                }
+            )
+        return response
+    
+    @app.teardown_request
+    def clear_request_id(error=None):
+        token = g.pop('request_id_token', None)
+        if token is not None:
+            request_id_var.reset(token)
+    
+    # Register blueprints
+    app.register_blueprint(api_bp, url_prefix='/api')
+    
+    # Profiling hooks and admin routes are only installed when opted in
+    if PROFILER.enabled:
+        from routes.profiling_routes import profiling_bp
+        app.register_blueprint(profiling_bp, url_prefix='/admin')
+        if not PROFILER.token:
+            logger.warning("PROFILING_ENABLED is set without PROFILING_TOKEN; profiling admin routes refuse every request")
+    
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            'status': 'healthy',
+            'service': 'AI Service',
+            'version': '1.0.0'
+        }), 200
+    
+    @app.route('/ready', methods=['GET'])
+    def readiness_check():
+        status = READINESS.status()
+        return jsonify(status), 200 if status['ready'] else 503
+    
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+    
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({
+            'success': False,
+            'message': 'Endpoint not found'
+        }), 404
+    
+    @app.errorhandler(500)
+    def internal_error(error):
+        logger.error("Internal server error: %s", error)
+        return jsonify({
+            'success': False,
+            'message': 'Internal server error'
+        }), 500
+    
+    # Load models and run dummy batches, then flip /ready (immediately if
+    # WARMUP_ENABLED is false)
+    READINESS.set_detail('threads', thread_plan)
+    start_warmup(analysis_controller, prediction_controller)
+    
+    return app
 
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({
-        'success': False,
-        'message': 'Endpoint not found'
-    }), 404
 
-@app.errorhandler(500)
-def internal_error(error):
-    logger.error(f"Internal server error: {str(error)}")
-    return jsonify({
-        'success': False,
-        'message': 'Internal server error'
-    }), 500
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 8000))
     debug = os.getenv('FLASK_ENV') == 'development'
     
-    logger.info(f"Starting AI Service on port {port}")
+    logger.info("Starting AI Service on port %s", port)
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
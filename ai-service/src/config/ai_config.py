@@ -4,6 +4,10 @@ import os
 AI_CONFIG = {
     'openai': {
         'api_key': os.getenv('OPENAI_API_KEY'),
+        # Override to point at a proxy or the local fake server used for load tests
+        'api_base': os.getenv('OPENAI_API_BASE'),
+        # Seconds before an upstream call is abandoned and the fallback used
+        'request_timeout': float(os.getenv('OPENAI_REQUEST_TIMEOUT', 30)),
         'text_model': 'text-davinci-003',
         'chat_model': 'gpt-3.5-turbo',
         'max_tokens': 1000,
@@ -14,7 +18,22 @@ AI_CONFIG = {
         'sentiment_model': 'cardiffnlp/twitter-roberta-base-sentiment-latest',
         'text_generation_model': 'gpt2',
         'ner_model': 'dbmdz/bert-large-cased-finetuned-conll03-english',
-        'classification_model': 'facebook/bart-large-mnli'
+        'classification_model': 'facebook/bart-large-mnli',
+        # Distilled models used for quality='fast', and by 'auto' under load
+        'fast_models': {
+            'sentiment': os.getenv('FAST_SENTIMENT_MODEL', 'distilbert-base-uncased-finetuned-sst-2-english'),
+            'ner': os.getenv('FAST_NER_MODEL', 'elastic/distilbert-base-cased-finetuned-conll03-english'),
+            'zero_shot_classification': os.getenv('FAST_CLASSIFICATION_MODEL', 'valhalla/distilbart-mnli-12-1'),
+            'text_generation': os.getenv('FAST_TEXT_GENERATION_MODEL', 'distilgpt2')
+        }
+    },
+    'quality': {
+        # fast, accurate or auto; requests may override with 'quality'
+        'default': os.getenv('MODEL_QUALITY', 'auto'),
+        # auto: use the fast tier once this many calls of a task are in flight
+        'max_queue_depth': int(os.getenv('MODEL_QUALITY_QUEUE_DEPTH', 4)),
+        # Weight of the newest call in each tier's latency estimate
+        'latency_smoothing': 0.2
     },
     'models': {
         'cache_dir': './models/cache',
@@ -26,6 +45,86 @@ AI_CONFIG = {
         'batch_size': 32,
         'timeout': 30
     },
+    'batching': {
+        # Inputs per forward pass; batches are cut from length-sorted inputs
+        # so each one pads only to its own longest member
+        'batch_size': int(os.getenv('HF_BATCH_SIZE', 16)),
+        # Hard cap on tokens per input, including special tokens
+        'max_sequence_length': int(os.getenv('HF_MAX_SEQUENCE_LENGTH', 512)),
+        # Cap a request's inputs at this quantile of their token lengths so a
+        # few very long posts don't set the cost of a batch; truncates those
+        # outliers (0 disables)
+        'dynamic_length_quantile': float(os.getenv('HF_DYNAMIC_LENGTH_QUANTILE', 0)),
+        # Dynamic caps never go below this many tokens
+        'min_sequence_length': int(os.getenv('HF_MIN_SEQUENCE_LENGTH', 64))
+    },
+    'embeddings': {
+        # Sentence-embedding model for semantic search (mean-pooled)
+        'model': os.getenv('EMBEDDING_MODEL', 'sentence-transformers/all-MiniLM-L6-v2'),
+        'batch_size': int(os.getenv('EMBEDDING_BATCH_SIZE', 32)),
+        'max_length': 256,
+        # Size of the hashed bag-of-words vectors used if the model can't load
+        'fallback_dimension': 512,
+        'index_path': os.getenv('SEMANTIC_INDEX_PATH', 'models/semantic_index'),
+        # Above this many vectors queries probe an inverted file instead of
+        # scanning every vector
+        'ivf_threshold': int(os.getenv('SEMANTIC_IVF_THRESHOLD', 50000)),
+        'nprobe': int(os.getenv('SEMANTIC_NPROBE', 8)),
+        'save_every': 500,
+        'max_posts_per_request': 1000
+    },
+    'tokenization': {
+        # Shared LRU of tokenizer outputs, so repeated and multi-stage
+        # analyses of the same text don't tokenize it again
+        'cache_enabled': os.getenv('TOKENIZATION_CACHE_ENABLED', 'true').lower() == 'true',
+        'max_entries': int(os.getenv('TOKENIZATION_CACHE_ENTRIES', 4096)),
+        # Total tokens held across entries (roughly 40 bytes each)
+        'max_tokens': int(os.getenv('TOKENIZATION_CACHE_TOKENS', 500000))
+    },
+    'warmup': {
+        # Run dummy batches through the models before /ready reports ready
+        'enabled': os.getenv('WARMUP_ENABLED', 'true').lower() == 'true',
+        # Pipelines to load: sentiment, ner, text_generation, zero_shot_classification
+        # (plus their ':fast' tiers unless MODEL_QUALITY=accurate)
+        'models': [name.strip() for name in os.getenv('WARMUP_MODELS', 'sentiment,ner').split(',') if name.strip()],
+        # Approximate token lengths of the dummy inputs
+        'sequence_lengths': [int(n) for n in os.getenv('WARMUP_SEQUENCE_LENGTHS', '16,64,256').split(',') if n.strip()],
+        'batch_size': int(os.getenv('WARMUP_BATCH_SIZE', 4)),
+        # Warm up on a background thread so the server can answer /health meanwhile
+        'background': os.getenv('WARMUP_BACKGROUND', 'true').lower() == 'true'
+    },
+    'language': {
+        'default': 'english',
+        'profiles_path': os.getenv('LANGUAGE_PROFILES_PATH'),
+        'max_chars': 1000,
+        # Shorter texts, or texts whose best language doesn't beat the
+        # runner-up by this log-likelihood ratio, are reported as unknown
+        'min_chars': 3,
+        'min_log_odds': 4.0
+    },
+    'image': {
+        # Images above this pixel count are box-reduced before statistics
+        # are computed; 0 analyses every pixel
+        'max_analysis_pixels': int(os.getenv('IMAGE_MAX_ANALYSIS_PIXELS', 0)),
+        # Limits applied before any pixel data is decoded
+        'max_upload_bytes': int(os.getenv('IMAGE_MAX_UPLOAD_BYTES', 10 * 1024 * 1024)),
+        'max_pixels': int(os.getenv('IMAGE_MAX_PIXELS', 40000000)),
+        'spool_max_memory': 1024 * 1024,
+        'download_timeout': 10,
+        'max_redirects': 3,
+        # Image URLs resolving to private, loopback or link-local addresses
+        # are refused unless this is set
+        'allow_private_urls': os.getenv('IMAGE_ALLOW_PRIVATE_URLS', 'false').lower() == 'true',
+        # JPEGs are decoded at a reduced scale close to this size unless
+        # full resolution is requested
+        'draft_size': (1024, 1024),
+        # Perceptual hash index used to spot near-duplicate uploads, shared
+        # by every worker
+        'hash_index_path': os.getenv('IMAGE_HASH_INDEX_PATH', 'models/image_hash_index.db'),
+        'hash_type': 'phash',
+        'duplicate_distance': 4,
+        'analysis_cache_size': 1024
+    },
     'quiz': {
         'max_questions': 20,
         'min_questions': 1,
@@ -33,10 +132,103 @@ AI_CONFIG = {
         'difficulties': ['easy', 'medium', 'hard'],
         'default_difficulty': 'medium'
     },
+    'text_training': {
+        # Streaming classifier training: rows parsed per chunk, the only
+        # directory server-side file paths may point into, and the
+        # per-epoch checkpoint used to resume (one per training file and
+        # model settings, named after this path)
+        'chunk_rows': int(os.getenv('TEXT_TRAINING_CHUNK_ROWS', 10000)),
+        'ingest_dir': os.getenv('TEXT_TRAINING_INGEST_DIR', './data'),
+        'checkpoint_path': os.getenv('TEXT_TRAINING_CHECKPOINT_PATH', 'models/text_classifier.checkpoint.pkl'),
+        # Largest hashed feature space, epoch count and chunk a request may ask for
+        'max_n_features': int(os.getenv('TEXT_TRAINING_MAX_FEATURES', 2 ** 22)),
+        'max_epochs': int(os.getenv('TEXT_TRAINING_MAX_EPOCHS', 50)),
+        'max_chunk_rows': int(os.getenv('TEXT_TRAINING_MAX_CHUNK_ROWS', 100000)),
+        # Defaults for out-of-core training; every key but processes can be
+        # overridden per request, within the limits above (max_validation_rows
+        # can only be lowered)
+        'out_of_core': {
+            # 'sgd' (logistic loss) or 'naive_bayes'
+            'classifier': 'sgd',
+            # Regularization (SGD) or smoothing (naive Bayes); None picks 1e-5 or 1.0
+            'alpha': None,
+            # Hashed feature space; collisions are rare below a few million terms
+            'n_features': 2 ** 20,
+            'ngram_range': [1, 2],
+            'epochs': 5,
+            # Share of rows held out for accuracy, capped in size
+            'validation_fraction': 0.05,
+            'max_validation_rows': 20000,
+            # Vectorizer processes, at most one per core; 0 uses every core
+            'processes': int(os.getenv('TEXT_TRAINING_PROCESSES', 0))
+        },
+        # Opt-in hyperparameter search (parameters['search']) for the
+        # classifier and sentiment analyzer; a request may override any key
+        # but folds, max_candidates and processes
+        'search': {
+            # 'grid' tries every candidate, 'random' samples n_iter of them
+            'method': 'grid',
+            'n_iter': 20,
+            'folds': 5,
+            'max_candidates': 200,
+            # Cross-validation processes, at most one per core; 0 uses every core
+            'processes': int(os.getenv('TEXT_SEARCH_PROCESSES', 0)),
+            'space': {
+                'vectorizer': {
+                    'max_features': [3000, 10000],
+                    'ngram_range': [[1, 1], [1, 2]],
+                    'sublinear_tf': [False, True]
+                },
+                'classifiers': {
+                    'naive_bayes': {'alpha': [0.1, 0.5, 1.0]},
+                    'logistic_regression': {'C': [1.0, 10.0]}
+                }
+            }
+        }
+    },
     'recommendations': {
         'max_recommendations': 50,
         'default_recommendations': 10,
-        'min_score_threshold': 0.1
+        'min_score_threshold': 0.1,
+        # Item metadata used for cold-start recommendations
+        'catalog_path': os.getenv('ITEM_CATALOG_PATH', 'models/item_catalog.db'),
+        # Weight of a matching category, tag or title/description keyword
+        'term_weights': {'category': 1.0, 'tag': 0.6, 'keyword': 0.2},
+        # Share of an item's score that comes from its popularity
+        'popularity_weight': float(os.getenv('ITEM_POPULARITY_WEIGHT', 0.3)),
+        'max_items_per_request': 5000,
+        # Per-user top-N lists materialized after training
+        'store_path': os.getenv('RECOMMENDATION_STORE_PATH', 'models/recommendation_lists.sqlite3'),
+        'precomputed_top_n': int(os.getenv('RECOMMENDATION_PRECOMPUTED_TOP_N', 50)),
+        # Similar-user queries switch from an exact scan to an approximate
+        # inverted-file index at this many users
+        'similar_users_ann': os.getenv('SIMILAR_USERS_ANN', 'true').lower() == 'true',
+        'similar_users_ann_threshold': int(os.getenv('SIMILAR_USERS_ANN_THRESHOLD', 100000)),
+        'similar_users_nprobe': 8,
+        'max_similar_users_batch': 1000,
+        # Streaming training uploads: rows parsed per chunk, and the only
+        # directory server-side file paths may point into
+        'ingest_chunk_rows': int(os.getenv('RECOMMENDATION_INGEST_CHUNK_ROWS', 100000)),
+        'ingest_dir': os.getenv('RECOMMENDATION_INGEST_DIR', './data'),
+        # Trainer used when a request does not set parameters['algorithm']
+        'algorithm': os.getenv('RECOMMENDATION_ALGORITHM', 'svd'),
+        # Implicit-feedback ALS defaults; every key can be overridden per request
+        'als': {
+            'factors': 64,
+            'regularization': 0.01,
+            # Confidence of an interaction is 1 + alpha * rating
+            'alpha': 40.0,
+            'iterations': 15,
+            'cg_steps': 3,
+            # Share of each user's interactions held out for early stopping
+            # and ranking metrics (0 disables both)
+            'validation_fraction': 0.1,
+            'patience': 2,
+            'k': 10,
+            'eval_users': 2000,
+            # 0 uses this worker's intra-op thread budget
+            'threads': int(os.getenv('RECOMMENDATION_ALS_THREADS', 0))
+        }
     }
 }
 
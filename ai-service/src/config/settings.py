@@ -4,6 +4,12 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+def _available_cores():
+    """CPUs this process may run on (respects cgroup/taskset restrictions)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 class Config:
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -41,6 +47,15 @@ class Config:
     MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 32))
     REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 30))
     
+    # Parallelism: each worker gets an equal share of the cores, so that
+    # workers x torch threads never oversubscribes the host
+    WORKERS = int(os.getenv('WEB_CONCURRENCY', os.getenv('WORKERS', 1)))
+    CPU_CORES = int(os.getenv('CPU_CORES', 0)) or _available_cores()
+    TORCH_INTRA_OP_THREADS = int(os.getenv('TORCH_INTRA_OP_THREADS', 0)) or max(1, CPU_CORES // max(1, WORKERS))
+    TORCH_INTEROP_THREADS = int(os.getenv('TORCH_INTEROP_THREADS', 1))
+    # Pin each worker to its own block of cores (Linux only)
+    CPU_AFFINITY = os.getenv('CPU_AFFINITY', 'false').lower() == 'true'
+    
     # Database settings (if needed for future extensions)
     DATABASE_URL = os.getenv('DATABASE_URL')
     
@@ -1,7 +1,13 @@
 import logging
+import threading
+from collections import OrderedDict
+from config.ai_config import AI_CONFIG
+from utils.metrics import STAGE_LATENCY, CACHE_REQUESTS
 from services.huggingface_service import HuggingFaceService
 from services.preprocessing import PreprocessingService
 from services.postprocessing import PostprocessingService
+from models.image_model import ImageModel
+from models.image_hash_index import ImageHashIndex
 
 logger = logging.getLogger(__name__)
 
@@ -10,12 +16,21 @@ class AnalysisController:
         self.hf_service = HuggingFaceService()
         self.preprocessing = PreprocessingService()
         self.postprocessing = PostprocessingService()
+        self.image_model = ImageModel()
+        self.hash_index = ImageHashIndex(AI_CONFIG['image']['hash_index_path'])
+        self._image_results = OrderedDict()
+        self._image_lock = threading.Lock()
     
-    def analyze_text(self, text):
+    def analyze_text(self, text, quality=None, deadline=None):
         """Perform comprehensive text analysis"""
         try:
+            # The detected language picks the cleaning rules and stop words
+            with STAGE_LATENCY.time('language'):
+                language = self.preprocessing.detect_language(text)
+            
             # Preprocess text
-            processed_text = self.preprocessing.clean_text(text)
+            with STAGE_LATENCY.time('preprocess'):
+                processed_text = self.preprocessing.clean_text(text, language)
             
             # Perform various analyses
             results = {
@@ -23,59 +38,99 @@ class AnalysisController:
                 'processed_text': processed_text,
                 'word_count': len(processed_text.split()),
                 'character_count': len(processed_text),
-                'sentiment': self.analyze_sentiment(text),
-                'entities': self.extract_entities(processed_text),
-                'keywords': self.extract_keywords(processed_text),
-                'readability_score': self.calculate_readability(processed_text)
+                'language': language
             }
             
+            with STAGE_LATENCY.time('sentiment'):
+                results['sentiment'] = self.analyze_sentiment(text, quality, deadline)
+            with STAGE_LATENCY.time('entities'):
+                results['entities'] = self.extract_entities(processed_text, quality, deadline)
+            with STAGE_LATENCY.time('keywords'):
+                results['keywords'] = self.extract_keywords(processed_text, language)
+            with STAGE_LATENCY.time('readability'):
+                results['readability_score'] = self.calculate_readability(processed_text)
+            
             return results
             
         except Exception as e:
-            logger.error(f"Text analysis failed: {str(e)}")
+            logger.error("Text analysis failed: %s", e)
             raise
     
-    def analyze_sentiment(self, text):
+    def analyze_sentiment(self, text, quality=None, deadline=None):
         """Analyze sentiment of text"""
         try:
-            result = self.hf_service.analyze_sentiment(text)
+            result = self.hf_service.analyze_sentiment(text, quality, deadline)
             
             # Post-process results
             processed_result = self.postprocessing.format_sentiment_result(result)
+            if 'model_tier' in result:
+                processed_result['model_tier'] = result['model_tier']
             
             return processed_result
             
         except Exception as e:
-            logger.error(f"Sentiment analysis failed: {str(e)}")
+            logger.error("Sentiment analysis failed: %s", e)
             raise
     
-    def extract_entities(self, text):
-        """Extract named entities from text"""
+    def analyze_sentiment_batch(self, texts, quality=None, deadline=None):
+        """Analyze sentiment of several texts in one batched model pass"""
         try:
-            entities = self.hf_service.extract_entities(text)
+            results = self.hf_service.analyze_sentiment_batch(texts, quality, deadline)
+            processed_results = []
+            for result in results:
+                processed_result = self.postprocessing.format_sentiment_result(result)
+                if 'model_tier' in result:
+                    processed_result['model_tier'] = result['model_tier']
+                processed_results.append(processed_result)
+            return processed_results
             
-            # Group entities by type
-            grouped_entities = {}
-            for entity in entities:
-                entity_type = entity.get('entity_group', 'MISC')
-                if entity_type not in grouped_entities:
-                    grouped_entities[entity_type] = []
-                grouped_entities[entity_type].append({
-                    'text': entity.get('word', ''),
-                    'confidence': entity.get('score', 0.0)
-                })
+        except Exception as e:
+            logger.error("Batch sentiment analysis failed: %s", e)
+            raise
+    
+    def extract_entities(self, text, quality=None, deadline=None):
+        """Extract named entities from text"""
+        try:
+            entities = self.hf_service.extract_entities(text, quality, deadline)
             
-            return grouped_entities
+            return self._group_entities(entities)
             
         except Exception as e:
-            logger.error(f"Entity extraction failed: {str(e)}")
+            logger.error("Entity extraction failed: %s", e)
             return {}
     
-    def extract_keywords(self, text):
-        """Extract keywords from text"""
+    def extract_entities_batch(self, texts, quality=None, deadline=None):
+        """Extract named entities from several texts in one batched model pass"""
+        try:
+            results = self.hf_service.extract_entities_batch(texts, quality, deadline)
+            
+            return [self._group_entities(entities) for entities in results]
+            
+        except Exception as e:
+            logger.error("Batch entity extraction failed: %s", e)
+            return [{} for _ in texts]
+    
+    def _group_entities(self, entities):
+        """Group entities by type"""
+        grouped_entities = {}
+        for entity in entities:
+            entity_type = entity.get('entity_group', 'MISC')
+            if entity_type not in grouped_entities:
+                grouped_entities[entity_type] = []
+            grouped_entities[entity_type].append({
+                'text': entity.get('word', ''),
+                'confidence': entity.get('score', 0.0)
+            })
+        
+        return grouped_entities
+    
+    def extract_keywords(self, text, language=None):
+        """Extract keywords from text, also dropping the stop words of its language when given"""
         try:
             # Simple keyword extraction using word frequency
             words = text.lower().split()
+            if language:
+                words = self.preprocessing.remove_stop_words(words, language)
             word_freq = {}
             
             # Filter out common stop words
@@ -91,9 +146,94 @@ class AnalysisController:
             return [{'word': word, 'frequency': freq} for word, freq in keywords]
             
         except Exception as e:
-            logger.error(f"Keyword extraction failed: {str(e)}")
+            logger.error("Keyword extraction failed: %s", e)
             return []
     
+    def analyze_image(self, image_stream=None, image_url=None, full_resolution=False, image_id=None, user_id=None):
+        """Analyze an uploaded image stream or an image URL
+        
+        Uploads whose perceptual hash is within the configured duplicate
+        distance of an image the same user_id already analysed reuse that
+        image's results. Without a user_id results are never reused.
+        """
+        try:
+            settings = AI_CONFIG['image']
+            image = self._load_image(image_stream, image_url, full_resolution)
+            
+            hashes = self.image_model.perceptual_hashes(image)
+            image_hash = hashes[settings['hash_type']]
+            
+            if user_id is not None:
+                for match in self.hash_index.search(image_hash, settings['duplicate_distance'], limit=5):
+                    cached = self._cached_image_results(match['image_id'], user_id)
+                    if cached is not None:
+                        CACHE_REQUESTS.inc('image_analysis', 'hit')
+                        return dict(cached, duplicate_of=match)
+            
+            CACHE_REQUESTS.inc('image_analysis', 'miss')
+            with STAGE_LATENCY.time('image_analysis'):
+                results = self.image_model.analyze_all(image)
+            
+            original_width, original_height = image.info.get('original_size', image.size)
+            results['source'] = {
+                'width': original_width,
+                'height': original_height,
+                'decoded_width': image.width,
+                'decoded_height': image.height
+            }
+            results['image_id'] = image_id or f"{image_hash:016x}"
+            results['hashes'] = {name: f"{value:016x}" for name, value in hashes.items()}
+            
+            self._register_image(results['image_id'], image_hash, results, user_id)
+            
+            return results
+            
+        except Exception as e:
+            logger.error("Image analysis failed: %s", e)
+            raise
+    
+    def find_similar_images(self, image_stream=None, image_url=None, max_distance=10, limit=10):
+        """Find indexed images whose perceptual hash is close to the given image"""
+        try:
+            image = self._load_image(image_stream, image_url, full_resolution=False)
+            hashes = self.image_model.perceptual_hashes(image)
+            image_hash = hashes[AI_CONFIG['image']['hash_type']]
+            
+            return {
+                'hashes': {name: f"{value:016x}" for name, value in hashes.items()},
+                'max_distance': max_distance,
+                'indexed_images': len(self.hash_index),
+                'matches': self.hash_index.search(image_hash, max_distance, limit)
+            }
+            
+        except Exception as e:
+            logger.error("Similar image search failed: %s", e)
+            raise
+    
+    def _load_image(self, image_stream, image_url, full_resolution):
+        if image_stream is not None:
+            return self.image_model.open_image(image_stream, full_resolution)
+        return self.image_model.load_image_from_url(image_url, full_resolution)
+    
+    def _cached_image_results(self, image_id, user_id):
+        with self._image_lock:
+            entry = self._image_results.get(image_id)
+            if entry is None or entry[0] != user_id:
+                return None
+            self._image_results.move_to_end(image_id)
+            return entry[1]
+    
+    def _register_image(self, image_id, image_hash, results, user_id=None):
+        """Index a newly analysed image and keep its results for the same user's duplicates"""
+        settings = AI_CONFIG['image']
+        
+        self.hash_index.add(image_id, image_hash)
+        with self._image_lock:
+            if user_id is not None:
+                self._image_results[image_id] = (user_id, results)
+                while len(self._image_results) > settings['analysis_cache_size']:
+                    self._image_results.popitem(last=False)
+    
     def calculate_readability(self, text):
         """Calculate readability score"""
         try:
@@ -112,7 +252,7 @@ class AnalysisController:
             return max(0, min(100, readability_score))
             
         except Exception as e:
-            logger.error(f"Readability calculation failed: {str(e)}")
+            logger.error("Readability calculation failed: %s", e)
             return 0
     
     def _count_syllables(self, word):
@@ -3,23 +3,26 @@ import random
 from services.huggingface_service import HuggingFaceService
 from services.openai_service import OpenAIService
 from models.recommendation_model import RecommendationModel
+from utils.metrics import OPENAI_FALLBACKS
 
 logger = logging.getLogger(__name__)
 
 class PredictionController:
-    def __init__(self):
-        self.hf_service = HuggingFaceService()
+    def __init__(self, hf_service=None):
+        # Pass the analysis controller's service so each model loads once per worker
+        self.hf_service = hf_service or HuggingFaceService()
         self.openai_service = OpenAIService()
         self.recommendation_model = RecommendationModel()
     
-    def generate_text(self, prompt, max_length=100, temperature=0.7):
+    def generate_text(self, prompt, max_length=100, temperature=0.7, quality=None, deadline=None):
         """Generate text based on prompt"""
         try:
             # Try OpenAI first, fallback to HuggingFace
             try:
                 result = self.openai_service.generate_text(prompt, max_length, temperature)
             except:
-                result = self.hf_service.generate_text(prompt, max_length, temperature)
+                OPENAI_FALLBACKS.inc('generate_text')
+                result = self.hf_service.generate_text(prompt, max_length, temperature, quality, deadline)
             
             return {
                 'generated_text': result,
@@ -31,7 +34,7 @@ class PredictionController:
             }
             
         except Exception as e:
-            logger.error(f"Text generation failed: {str(e)}")
+            logger.error("Text generation failed: %s", e)
             raise
     
     def generate_quiz(self, topic, num_questions=5, difficulty='medium'):
@@ -47,6 +50,7 @@ class PredictionController:
                     question_text = self.openai_service.generate_quiz_question(topic, difficulty)
                 except:
                     # Fallback to template-based generation
+                    OPENAI_FALLBACKS.inc('generate_quiz')
                     question_text = self._generate_fallback_question(topic, difficulty, i + 1)
                 
                 # Parse the generated question
@@ -61,7 +65,7 @@ class PredictionController:
             }
             
         except Exception as e:
-            logger.error(f"Quiz generation failed: {str(e)}")
+            logger.error("Quiz generation failed: %s", e)
             raise
     
     def get_recommendations(self, user_id, preferences=None, limit=10):
@@ -83,7 +87,42 @@ class PredictionController:
             }
             
         except Exception as e:
-            logger.error(f"Recommendations failed: {str(e)}")
+            logger.error("Recommendations failed: %s", e)
+            raise
+    
+    def get_similar_users(self, user_ids, limit=10):
+        """Most similar users for each requested user"""
+        try:
+            similar = self.recommendation_model.get_similar_users_batch(user_ids, limit)
+            
+            return {
+                'similar_users': [
+                    {'user_id': user_id, 'similar_users': similar.get(user_id, [])}
+                    for user_id in user_ids
+                ],
+                'total_count': len(user_ids)
+            }
+            
+        except Exception as e:
+            logger.error("Similar users lookup failed: %s", e)
+            raise
+    
+    def index_items(self, items=None, removed=None):
+        """Update the item catalog used for new users' recommendations"""
+        try:
+            return self.recommendation_model.index_items(items, removed)
+            
+        except Exception as e:
+            logger.error("Item indexing failed: %s", e)
+            raise
+    
+    def record_interactions(self, interactions):
+        """Invalidate precomputed recommendations of users with new interactions"""
+        try:
+            return self.recommendation_model.record_interactions(interactions)
+            
+        except Exception as e:
+            logger.error("Recording interactions failed: %s", e)
             raise
     
     def _generate_fallback_question(self, topic, difficulty, question_num):
@@ -158,7 +197,7 @@ class PredictionController:
             }
             
         except Exception as e:
-            logger.error(f"Question parsing failed: {str(e)}")
+            logger.error("Question parsing failed: %s", e)
             return {
                 'id': question_num,
                 'question': f"Sample question {question_num}",
@@ -0,0 +1,48 @@
+import logging
+from utils.metrics import STAGE_LATENCY
+from services.semantic_search import get_semantic_search
+
+logger = logging.getLogger(__name__)
+
+class SearchController:
+    def __init__(self):
+        self.semantic_search = get_semantic_search()
+    
+    def index_posts(self, posts, persist=False):
+        """Embed posts and add them to the semantic index"""
+        try:
+            with STAGE_LATENCY.time('embed_posts'):
+                return self.semantic_search.index_posts(posts, persist)
+            
+        except Exception as e:
+            logger.error("Post indexing failed: %s", e)
+            raise
+    
+    def remove_posts(self, post_ids):
+        """Remove posts from the semantic index"""
+        try:
+            return {'removed': self.semantic_search.remove_posts(post_ids)}
+            
+        except Exception as e:
+            logger.error("Post removal failed: %s", e)
+            raise
+    
+    def search(self, query=None, post_ids=None, limit=10, category=None):
+        """Posts similar to a query text, or to the given posts"""
+        try:
+            with STAGE_LATENCY.time('semantic_search'):
+                if post_ids:
+                    results = self.semantic_search.similar_to_posts(post_ids, limit, category)
+                else:
+                    results = self.semantic_search.search(query, limit, category)
+            
+            return {
+                'query': query,
+                'post_ids': post_ids,
+                'results': results,
+                'total_count': len(results)
+            }
+            
+        except Exception as e:
+            logger.error("Semantic search failed: %s", e)
+            raise
@@ -1,11 +1,19 @@
+import os
+import shutil
 import logging
 import json
+import tempfile
 from datetime import datetime
 from models.text_model import TextModel
 from models.recommendation_model import RecommendationModel
+from models.interaction_data import read_interactions
+from config.ai_config import AI_CONFIG
+from utils.metrics import BATCH_SIZE, STAGE_LATENCY
 
 logger = logging.getLogger(__name__)
 
+MODEL_TYPES = ('text_classification', 'recommendation', 'sentiment_analysis')
+
 class TrainingController:
     def __init__(self):
         self.text_model = TextModel()
@@ -17,16 +25,23 @@ class TrainingController:
             if parameters is None:
                 parameters = {}
             
+            # Checked before model_type becomes a metric label, so callers
+            # can't create new label values
+            if model_type not in MODEL_TYPES:
+                raise ValueError(f"Unsupported model type: {model_type}")
+            
             training_id = f"training_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            if model_type == 'text_classification':
-                result = self._train_text_classification(training_data, parameters, training_id)
-            elif model_type == 'recommendation':
-                result = self._train_recommendation_model(training_data, parameters, training_id)
-            elif model_type == 'sentiment_analysis':
-                result = self._train_sentiment_model(training_data, parameters, training_id)
-            else:
-                raise ValueError(f"Unsupported model type: {model_type}")
+            if isinstance(training_data, list):
+                BATCH_SIZE.observe(len(training_data), f"train_{model_type}")
+            
+            with STAGE_LATENCY.time(f"train_{model_type}"):
+                if model_type == 'text_classification':
+                    result = self._train_text_classification(training_data, parameters, training_id)
+                elif model_type == 'recommendation':
+                    result = self._train_recommendation_model(training_data, parameters, training_id)
+                else:
+                    result = self._train_sentiment_model(training_data, parameters, training_id)
             
             return {
                 'training_id': training_id,
@@ -38,7 +53,7 @@ class TrainingController:
             }
             
         except Exception as e:
-            logger.error(f"Model training failed: {str(e)}")
+            logger.error("Model training failed: %s", e)
             raise
     
     def get_training_status(self, training_id):
@@ -58,7 +73,7 @@ class TrainingController:
             }
             
         except Exception as e:
-            logger.error(f"Failed to get training status: {str(e)}")
+            logger.error("Failed to get training status: %s", e)
             raise
     
     def _train_text_classification(self, training_data, parameters, training_id):
@@ -89,7 +104,7 @@ class TrainingController:
             }
             
         except Exception as e:
-            logger.error(f"Text classification training failed: {str(e)}")
+            logger.error("Text classification training failed: %s", e)
             raise
     
     def _train_recommendation_model(self, training_data, parameters, training_id):
@@ -99,33 +114,96 @@ class TrainingController:
             if not isinstance(training_data, list) or len(training_data) == 0:
                 raise ValueError("Training data must be a non-empty list")
             
-            # Extract user-item interactions
-            interactions = []
-            
             for item in training_data:
                 if 'user_id' not in item or 'item_id' not in item:
                     raise ValueError("Each training item must have 'user_id' and 'item_id' fields")
-                interactions.append({
-                    'user_id': item['user_id'],
-                    'item_id': item['item_id'],
-                    'rating': item.get('rating', 1.0),
-                    'timestamp': item.get('timestamp', datetime.now().isoformat())
-                })
             
-            # Train the model
-            model_result = self.recommendation_model.train(interactions, parameters)
+            # Train the model; interactions are encoded straight into typed arrays
+            model_result = self.recommendation_model.train(training_data, parameters)
+            
+            return self._recommendation_result(model_result, training_id)
+            
+        except Exception as e:
+            logger.error("Recommendation model training failed: %s", e)
+            raise
+    
+    def train_recommendation_stream(self, source, data_format, parameters=None):
+        """Train the recommendation model from an NDJSON or CSV stream or file path"""
+        try:
+            if parameters is None:
+                parameters = {}
+            
+            training_id = f"training_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            users, items = self.recommendation_model.encoders()
+            
+            with STAGE_LATENCY.time('ingest_recommendation'):
+                interactions = read_interactions(source, data_format, users, items,
+                                                 AI_CONFIG['recommendations']['ingest_chunk_rows'])
+            BATCH_SIZE.observe(len(interactions.users), 'train_recommendation')
+            
+            with STAGE_LATENCY.time('train_recommendation'):
+                model_result = self.recommendation_model.train_arrays(interactions, parameters)
             
             return {
-                'model_path': f"models/recommendation_{training_id}.pkl",
-                'training_interactions': len(interactions),
-                'unique_users': len(set(item['user_id'] for item in interactions)),
-                'unique_items': len(set(item['item_id'] for item in interactions)),
-                'model_metrics': model_result
+                'training_id': training_id,
+                'model_type': 'recommendation',
+                'status': 'initiated',
+                'parameters': parameters,
+                'result': self._recommendation_result(model_result, training_id),
+                'timestamp': datetime.now().isoformat()
+            }
+            
+        except Exception as e:
+            logger.error("Streaming recommendation training failed: %s", e)
+            raise
+    
+    def train_text_classification_stream(self, source, data_format, parameters=None):
+        """Train the text classifier out of core from an NDJSON or CSV stream or file path"""
+        spooled = None
+        try:
+            if parameters is None:
+                parameters = {}
+            
+            training_id = f"training_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            
+            if not isinstance(source, str):
+                # Every epoch rereads the data, so uploads are spooled to disk first
+                with tempfile.NamedTemporaryFile(suffix=f".{data_format}", delete=False) as f:
+                    shutil.copyfileobj(source, f, 1 << 20)
+                    spooled = source = f.name
+            
+            with STAGE_LATENCY.time('train_text_classification'):
+                model_result = self.text_model.train_classifier_stream(source, data_format, parameters)
+            
+            return {
+                'training_id': training_id,
+                'model_type': 'text_classification',
+                'status': 'initiated',
+                'parameters': parameters,
+                'result': {
+                    'model_path': f"models/text_classifier_{training_id}.pkl",
+                    'training_samples': model_result['training_samples'],
+                    'unique_labels': len(model_result['classes']),
+                    'model_metrics': model_result
+                },
+                'timestamp': datetime.now().isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Recommendation model training failed: {str(e)}")
+            logger.error("Streaming text classification training failed: %s", e)
             raise
+        finally:
+            if spooled is not None:
+                os.remove(spooled)
+    
+    def _recommendation_result(self, model_result, training_id):
+        return {
+            'model_path': f"models/recommendation_{training_id}.pkl",
+            'training_interactions': model_result['n_interactions'],
+            'unique_users': model_result['n_users'],
+            'unique_items': model_result['n_items'],
+            'model_metrics': model_result
+        }
     
     def _train_sentiment_model(self, training_data, parameters, training_id):
         """Train sentiment analysis model"""
@@ -155,5 +233,5 @@ class TrainingController:
             }
             
         except Exception as e:
-            logger.error(f"Sentiment model training failed: {str(e)}")
+            logger.error("Sentiment model training failed: %s", e)
             raise
\ No newline at end of file
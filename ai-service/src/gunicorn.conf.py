@@ -0,0 +1,29 @@
+"""Gunicorn settings derived from config.settings.Config
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Workers come from WEB_CONCURRENCY/WORKERS. Each worker is given a stable slot
+number (WORKER_INDEX), which app.py uses to size its torch/OpenMP thread
+pools and, with CPU_AFFINITY=true, to pin it to its own block of cores.
+"""
+import os
+from config.settings import get_config
+
+_config = get_config()
+
+bind = f"{_config.HOST}:{_config.PORT}"
+workers = _config.WORKERS
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+
+def pre_fork(server, worker):
+    # Runs in the master: hand the new worker the lowest slot not held by a
+    # live worker, so a replacement reuses the slot of the one it replaces
+    used = {getattr(other, 'slot', None) for other in server.WORKERS.values()}
+    free = [slot for slot in range(workers) if slot not in used]
+    worker.slot = free[0] if free else (worker.age - 1) % workers
+
+
+def post_fork(server, worker):
+    os.environ['WORKER_INDEX'] = str(worker.slot)
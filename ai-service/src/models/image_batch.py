@@ -0,0 +1,136 @@
+"""Batch image feature extraction.
+
+Decodes images and extracts ImageModel feature vectors in a process pool,
+writing a columnar result that downstream similarity search can memory-map:
+
+    features.npy   float32 matrix, one row per successfully processed image
+    index.json     row ids, feature names and per-source errors
+
+Run from the ai-service/src directory:
+
+    python -m models.image_batch uploads/ --output features/ --workers 8
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List
+import numpy as np
+from models.image_model import ImageModel, FEATURE_NAMES
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp')
+
+_worker_model = None
+_worker_full_resolution = False
+
+
+def collect_sources(inputs: Iterable[str]) -> List[str]:
+    """Expand directories into image paths; URLs and files pass through"""
+    sources = []
+    for item in inputs:
+        if item.startswith(('http://', 'https://')) or not os.path.isdir(item):
+            sources.append(item)
+            continue
+
+        for root, dirs, files in os.walk(item):
+            dirs.sort()
+            for filename in sorted(files):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    sources.append(os.path.join(root, filename))
+
+    return sources
+
+
+def _init_worker(full_resolution):
+    global _worker_model, _worker_full_resolution
+    _worker_model = ImageModel()
+    _worker_full_resolution = full_resolution
+
+
+def _extract_one(source):
+    """Worker: decode one source and return (source, vector or None, error)"""
+    try:
+        if source.startswith(('http://', 'https://')):
+            image = _worker_model.load_image_from_url(source, _worker_full_resolution)
+        else:
+            image = _worker_model.load_image_from_path(source, _worker_full_resolution)
+
+        return source, _worker_model.feature_vector(image), None
+
+    except Exception as e:
+        return source, None, str(e)
+
+
+def extract_features_batch(sources: Iterable[str], output_dir: str, workers: int = None,
+                           full_resolution: bool = False, chunksize: int = 16) -> dict:
+    """Extract feature vectors for many images and save them to output_dir"""
+    try:
+        sources = collect_sources(sources)
+        os.makedirs(output_dir, exist_ok=True)
+
+        features = np.empty((len(sources), len(FEATURE_NAMES)), dtype=np.float32)
+        ids = []
+        errors = {}
+        start_time = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(full_resolution,)) as executor:
+            for source, vector, error in executor.map(_extract_one, sources, chunksize=chunksize):
+                if vector is None:
+                    errors[source] = error
+                    continue
+                features[len(ids)] = vector
+                ids.append(source)
+
+        elapsed = time.perf_counter() - start_time
+
+        features_path = os.path.join(output_dir, 'features.npy')
+        index_path = os.path.join(output_dir, 'index.json')
+        np.save(features_path, features[:len(ids)])
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'ids': ids,
+                'feature_names': FEATURE_NAMES,
+                'errors': errors
+            }, f)
+
+        logger.info("Extracted features for %s/%s images in %.2fs", len(ids), len(sources), elapsed)
+
+        return {
+            'features_path': features_path,
+            'index_path': index_path,
+            'processed': len(ids),
+            'failed': len(errors),
+            'feature_count': len(FEATURE_NAMES),
+            'elapsed_seconds': round(elapsed, 3),
+            'images_per_second': round(len(ids) / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    except Exception as e:
+        logger.error("Batch feature extraction failed: %s", e)
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract image features in a process pool')
+    parser.add_argument('inputs', nargs='+', help='image files, directories or URLs')
+    parser.add_argument('--output', required=True, help='directory for features.npy and index.json')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--full-resolution', action='store_true', help='decode JPEGs at full resolution')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Per-image load messages would drown out the batch summary
+    logging.getLogger('models.image_model').setLevel(logging.WARNING)
+    result = extract_features_batch(args.inputs, args.output, args.workers, args.full_resolution)
+    print(json.dumps(result, indent=2))
+    return 0 if result['processed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
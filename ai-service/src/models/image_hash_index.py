@@ -0,0 +1,221 @@
+import os
+import sqlite3
+import logging
+import threading
+from typing import List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Multi-index hashing: each 64-bit hash is split into four 16-bit chunks. Two
+# hashes within Hamming distance r must agree to within r // 4 bits on at
+# least one chunk, so a query only probes chunk values near its own.
+_CHUNKS = 4
+_CHUNK_BITS = 16
+_CHUNK_MASK = np.uint64((1 << _CHUNK_BITS) - 1)
+_CHUNK_SHIFTS = [np.uint64(_CHUNK_BITS * i) for i in range(_CHUNKS)]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (seq INTEGER PRIMARY KEY AUTOINCREMENT, image_id TEXT NOT NULL UNIQUE,
+                                   hash TEXT NOT NULL);
+"""
+
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(hashes: np.ndarray, query: int) -> np.ndarray:
+    """Hamming distance from query to every uint64 hash"""
+    xor = np.bitwise_xor(hashes, np.uint64(query))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(xor)
+    return _BYTE_POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1, dtype=np.uint8)
+
+
+def _flip_masks(max_bits: int) -> np.ndarray:
+    """Every 16-bit mask with at most max_bits bits set"""
+    values = np.arange(1 << _CHUNK_BITS, dtype=np.uint32)
+    counts = _BYTE_POPCOUNT[values & 0xFF] + _BYTE_POPCOUNT[values >> 8]
+    return values[counts <= max_bits].astype(np.uint16)
+
+
+class ImageHashIndex:
+    """Bit-packed perceptual hash index with Hamming radius search.
+
+    Hashes are kept as one uint64 array (8 bytes per image) alongside their
+    ids. For each chunk the index keeps its chunk values sorted with the
+    matching row numbers, so probing a chunk value is a binary search. Newly
+    added hashes are scanned directly until enough accumulate to be worth
+    rebuilding the sorted tables.
+
+    With an index path the hashes live in a SQLite table shared by every
+    worker, one row per image id. Adding an image that is already there
+    with another hash moves it to a new sequence number, and each worker
+    replays the rows after the last sequence number it has seen before
+    searching. Without a path the index is in memory only.
+    """
+    
+    rebuild_threshold = 4096
+
+    def __init__(self, index_path: str = None):
+        self.index_path = index_path
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.ids: List[str] = []
+        self._row_of = {}
+        self._pending_hashes = []
+        self._tables = None
+        self._table_rows = 0
+        self._seen_seq = 0
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._mask_cache = {}
+
+        if index_path:
+            directory = os.path.dirname(index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self.ids)
+
+    def add(self, image_id: str, image_hash: int):
+        """Add an image's hash, replacing the hash it was indexed with before"""
+        image_id = str(image_id)
+        with self._lock:
+            if not self.index_path:
+                self._apply(image_id, image_hash)
+                return
+
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                row = db.execute('SELECT hash FROM hashes WHERE image_id = ?', (image_id,)).fetchone()
+                if row is None or int(row[0], 16) != image_hash:
+                    # A new sequence number, so every worker replays the change
+                    db.execute('DELETE FROM hashes WHERE image_id = ?', (image_id,))
+                    db.execute('INSERT INTO hashes (image_id, hash) VALUES (?, ?)', (image_id, f"{image_hash:016x}"))
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            self._sync()
+
+    def search(self, image_hash: int, max_distance: int = 8, limit: int = 10) -> List[dict]:
+        """Return ids within max_distance bits of image_hash, closest first"""
+        with self._lock:
+            self._sync()
+            if self._tables is None or len(self.ids) - self._table_rows >= self.rebuild_threshold:
+                self._build_tables()
+            if len(self.ids) == 0:
+                return []
+
+            # Distances above 15 would probe too many chunk values; those
+            # queries scan the whole array, which is still one vectorized pass
+            if max_distance // _CHUNKS > 3:
+                candidates = np.arange(self._table_rows)
+            else:
+                candidates = self._candidates(image_hash, max_distance // _CHUNKS)
+
+            distances = hamming_distances(self.hashes[candidates], image_hash)
+
+            # Hashes added since the last rebuild follow the indexed rows
+            if len(self.ids) > self._table_rows:
+                candidates = np.concatenate((candidates, np.arange(self._table_rows, len(self.ids))))
+                distances = np.concatenate((distances, hamming_distances(self._tail(self._table_rows), image_hash)))
+
+            within = distances <= max_distance
+            candidates, first = np.unique(candidates[within], return_index=True)
+            distances = distances[within][first]
+
+            order = np.lexsort((candidates, distances))[:limit]
+            return [
+                {'image_id': self.ids[candidates[i]], 'distance': int(distances[i])}
+                for i in order
+            ]
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.index_path, check_same_thread=False, timeout=30,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _sync(self):
+        """Apply rows other workers added since the last one seen (call with the lock held)"""
+        if not self.index_path:
+            return
+        rows = self._db().execute('SELECT seq, image_id, hash FROM hashes WHERE seq > ? ORDER BY seq',
+                                  (self._seen_seq,)).fetchall()
+        for seq, image_id, image_hash in rows:
+            self._apply(image_id, int(image_hash, 16))
+            self._seen_seq = seq
+
+    def _apply(self, image_id: str, image_hash: int):
+        row = self._row_of.get(image_id)
+        if row is None:
+            self._row_of[image_id] = len(self.ids)
+            self.ids.append(image_id)
+            self._pending_hashes.append(image_hash)
+            return
+
+        if row < len(self.hashes):
+            self.hashes[row] = np.uint64(image_hash)
+        else:
+            self._pending_hashes[row - len(self.hashes)] = image_hash
+        if row < self._table_rows:
+            # The sorted tables hold the old hash
+            self._tables = None
+
+    def _tail(self, start: int) -> np.ndarray:
+        """Hashes of rows start onwards, whether flushed to the array or still pending"""
+        pending = np.array(self._pending_hashes, dtype=np.uint64)
+        if start >= len(self.hashes):
+            return pending[start - len(self.hashes):]
+        return np.concatenate((self.hashes[start:], pending))
+
+    def _flush_pending(self):
+        if self._pending_hashes:
+            pending = np.array(self._pending_hashes, dtype=np.uint64)
+            self.hashes = np.concatenate((self.hashes, pending))
+            self._pending_hashes = []
+
+    def _build_tables(self):
+        self._flush_pending()
+
+        tables = []
+        for shift in _CHUNK_SHIFTS:
+            chunks = ((self.hashes >> shift) & _CHUNK_MASK).astype(np.uint16)
+            order = np.argsort(chunks, kind='stable').astype(np.uint32)
+            tables.append((chunks[order], order))
+        self._tables = tables
+        self._table_rows = len(self.hashes)
+
+    def _candidates(self, image_hash: int, chunk_radius: int) -> np.ndarray:
+        masks = self._mask_cache.get(chunk_radius)
+        if masks is None:
+            masks = self._mask_cache[chunk_radius] = _flip_masks(chunk_radius)
+
+        query = np.uint64(image_hash)
+        found = []
+        for shift, (sorted_chunks, rows) in zip(_CHUNK_SHIFTS, self._tables):
+            probes = np.bitwise_xor(masks, np.uint16((query >> shift) & _CHUNK_MASK))
+            starts = np.searchsorted(sorted_chunks, probes, side='left')
+            ends = np.searchsorted(sorted_chunks, probes, side='right')
+            # Expand the [start, end) ranges into positions without a Python loop
+            lengths = ends - starts
+            total = int(lengths.sum())
+            if total:
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                found.append(rows[offsets + np.arange(total)])
+
+        # A row can be found through several chunks; search() deduplicates
+        # the few rows that survive the distance filter
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found).astype(np.int64)
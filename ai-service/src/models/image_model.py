@@ -1,54 +1,333 @@
+import socket
 import logging
+import math
+import ipaddress
+import tempfile
+from urllib.parse import urljoin, urlparse
+from functools import cached_property
+from typing import Optional
 import numpy as np
-from PIL import Image
-import requests
+from PIL import Image, UnidentifiedImageError
 from io import BytesIO
+from config.ai_config import AI_CONFIG
 
 logger = logging.getLogger(__name__)
 
+GRAYSCALE_MODES = ('1', 'L', 'LA', 'I', 'I;16', 'F')
+
+# Layout of the flat vector returned by ImageModel.feature_vector
+FEATURE_NAMES = (
+    [f"hist_{color}_{i}" for color in ('red', 'green', 'blue') for i in range(32)]
+    + [f"{moment}_{color}" for moment in ('mean', 'std', 'skew') for color in ('red', 'green', 'blue')]
+    + ['contrast', 'homogeneity', 'energy', 'gradient_magnitude']
+)
+
+HASH_TYPES = ('ahash', 'dhash', 'phash')
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Orthonormal DCT-II basis, so a 2-D DCT is two matrix products"""
+    k = np.arange(size)[:, np.newaxis]
+    n = np.arange(size)[np.newaxis, :]
+    basis = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+_DCT_32 = _dct_matrix(32)
+
+def _pack_bits(bits: np.ndarray) -> int:
+    """Pack 64 booleans into an unsigned 64-bit integer, first bit highest"""
+    return int(np.packbits(bits.ravel()).view('>u8')[0])
+
+# Bytes per pixel for modes whose raw size isn't one byte per band
+_MODE_BYTES = {'I': 4, 'F': 4, 'I;16': 2, 'I;16L': 2, 'I;16B': 2}
+
+class ImageStats:
+    """Pixel statistics for one image, computed from a single uint8 array.
+
+    The image is converted once to an 8-bit ``L`` or ``RGB`` array (box-reduced
+    first when it exceeds ``max_pixels``). Histograms come from one
+    ``np.bincount`` over all channels, and every moment is derived from those
+    histograms, so each pixel is only read once however many statistics are
+    requested. Statistics are computed lazily and cached on the instance.
+    """
+    
+    def __init__(self, image: Image.Image, max_pixels: int = 0):
+        if image.mode in GRAYSCALE_MODES:
+            converted = image if image.mode == 'L' else image.convert('L')
+        else:
+            converted = image if image.mode == 'RGB' else image.convert('RGB')
+        
+        pixel_count = converted.width * converted.height
+        if max_pixels and pixel_count > max_pixels:
+            factor = math.ceil(math.sqrt(pixel_count / max_pixels))
+            converted = converted.reduce(factor)
+        
+        self.array = np.asarray(converted)
+        self.is_color = self.array.ndim == 3
+        self.channels = 3 if self.is_color else 1
+        self.pixel_count = self.array.shape[0] * self.array.shape[1]
+    
+    @cached_property
+    def histograms(self) -> np.ndarray:
+        """256-bin histogram per channel, shape (channels, 256)"""
+        if not self.is_color:
+            return np.bincount(self.array.ravel(), minlength=256)[np.newaxis, :]
+        
+        # Offset each channel into its own 256-bin range so one bincount
+        # covers all three
+        offsets = np.array([0, 256, 512], dtype=np.uint16)
+        codes = self.array.reshape(-1, 3).astype(np.uint16) + offsets
+        return np.bincount(codes.ravel(), minlength=768).reshape(3, 256)
+    
+    @cached_property
+    def moments(self) -> dict:
+        """Mean, standard deviation and skewness per channel"""
+        return _histogram_moments(self.histograms, np.arange(256, dtype=np.float64), self.pixel_count)
+    
+    @cached_property
+    def _gray_sum(self) -> np.ndarray:
+        # Gray is the channel mean; keep the integer channel sum (0..765)
+        # and divide by three only where a statistic needs real values
+        if self.is_color:
+            return self.array.sum(axis=2, dtype=np.uint16)
+        return self.array
+    
+    @cached_property
+    def texture_features(self) -> dict:
+        """Contrast, homogeneity, energy and mean gradient magnitude of gray"""
+        scale = 3.0 if self.is_color else 1.0
+        gray_sum = self._gray_sum
+        
+        gray_histogram = np.bincount(gray_sum.ravel(), minlength=766 if self.is_color else 256)
+        gray_values = np.arange(len(gray_histogram), dtype=np.float64) / scale
+        moments = _histogram_moments(gray_histogram[np.newaxis, :], gray_values, self.pixel_count)
+        mean, std = moments['mean'][0], moments['std'][0]
+        variance = std ** 2
+        
+        gradient_magnitude = 0.0
+        if gray_sum.shape[0] > 1 and gray_sum.shape[1] > 1:
+            grad_y, grad_x = np.gradient(gray_sum.astype(np.float32))
+            np.hypot(grad_x, grad_y, out=grad_x)
+            gradient_magnitude = float(grad_x.mean(dtype=np.float64)) / scale
+        
+        return {
+            'contrast': float(std),
+            'homogeneity': float(1.0 / (1.0 + variance)),
+            'energy': float(variance + mean ** 2),
+            'gradient_magnitude': gradient_magnitude
+        }
+
+
+def _pinned_host_adapter(hostname: str):
+    """A requests adapter whose TLS connections use hostname for SNI and the certificate check"""
+    from requests.adapters import HTTPAdapter
+    
+    class PinnedHostAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs['server_hostname'] = hostname
+            kwargs['assert_hostname'] = hostname
+            super().init_poolmanager(*args, **kwargs)
+    
+    return PinnedHostAdapter()
+
+
+def _histogram_moments(histograms: np.ndarray, values: np.ndarray, count: int) -> dict:
+    """Per-row mean, std and skewness of histograms over the given bin values"""
+    weights = histograms / max(count, 1)
+    mean = weights @ values
+    deviations = values[np.newaxis, :] - mean[:, np.newaxis]
+    variance = np.sum(weights * deviations ** 2, axis=1)
+    std = np.sqrt(variance)
+    third = np.sum(weights * deviations ** 3, axis=1)
+    skew = np.divide(third, std ** 3, out=np.zeros_like(third), where=std > 0)
+    
+    return {'mean': mean, 'std': std, 'skew': skew}
+
 class ImageModel:
     def __init__(self):
         self.model_loaded = False
         self.supported_formats = ['JPEG', 'PNG', 'GIF', 'BMP', 'WEBP']
+        self.max_analysis_pixels = AI_CONFIG['image']['max_analysis_pixels']
+        self.max_upload_bytes = AI_CONFIG['image']['max_upload_bytes']
+        self.max_pixels = AI_CONFIG['image']['max_pixels']
+        self.spool_max_memory = AI_CONFIG['image']['spool_max_memory']
+        self.download_timeout = AI_CONFIG['image']['download_timeout']
+        self.max_redirects = AI_CONFIG['image']['max_redirects']
+        self.allow_private_urls = AI_CONFIG['image']['allow_private_urls']
+        self.draft_size = AI_CONFIG['image']['draft_size']
     
-    def load_image_from_url(self, image_url: str) -> Image.Image:
-        """Load image from URL"""
+    def compute_stats(self, image: Image.Image) -> ImageStats:
+        """Convert image once into the array shared by the analysis methods"""
+        return ImageStats(image, self.max_analysis_pixels)
+    
+    def analyze_all(self, image: Image.Image) -> dict:
+        """Run every analysis on image from a single pixel conversion"""
         try:
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
+            stats = self.compute_stats(image)
             
-            image = Image.open(BytesIO(response.content))
+            return {
+                'analysis': self.analyze_image(image, stats),
+                'classification': self.classify_image(image, stats),
+                'objects': self.detect_objects(image, stats),
+                'features': self.extract_features(image, stats)
+            }
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
+        except Exception as e:
+            logger.error("Image analysis failed: %s", e)
+            raise
+    
+    def open_image(self, stream, full_resolution: bool = True) -> Image.Image:
+        """Decode an image from a seekable stream with bounded memory
+        
+        Only the header is parsed before the format and size checks, so
+        decompression bombs are rejected without decoding any pixels. Unless
+        full_resolution is set, JPEGs are decoded at a reduced DCT scale.
+        """
+        try:
+            image = Image.open(stream)
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"Image rejected as a decompression bomb: {str(e)}")
+        except UnidentifiedImageError:
+            raise ValueError("Unrecognized or corrupt image data")
+        
+        if image.format not in self.supported_formats:
+            raise ValueError(f"Unsupported image format: {image.format}")
+        
+        if image.width * image.height > self.max_pixels:
+            raise ValueError(
+                f"Image too large: {image.width}x{image.height} exceeds {self.max_pixels} pixels"
+            )
+        
+        original_size = image.size
+        if not full_resolution:
+            image.draft(None, self.draft_size)
+        
+        image.load()
+        
+        # Convert to RGB if necessary
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        image.info['original_size'] = original_size
+        return image
+    
+    def load_image_from_url(self, image_url: str, full_resolution: bool = True) -> Image.Image:
+        """Load image from URL, streaming the body into a spooled temp file
+        
+        Only http(s) URLs whose host resolves to public addresses are
+        fetched, and every redirect is checked the same way. The connection
+        goes to the address that was checked, so a host can't resolve to a
+        public address for the check and a private one for the fetch. Fetch
+        failures raise ValueError.
+        """
+        try:
+            import requests
+
+            with tempfile.SpooledTemporaryFile(max_size=self.spool_max_memory) as buffer:
+                url = image_url
+                for _ in range(self.max_redirects + 1):
+                    address = self.check_url(url)
+                    try:
+                        response = self._get(url, address)
+                    except requests.RequestException as e:
+                        raise ValueError(f"Could not fetch image: {e}") from e
+                    if not response.is_redirect:
+                        break
+                    response.close()
+                    url = urljoin(url, response.headers['Location'])
+                else:
+                    raise ValueError(f"Image URL redirected more than {self.max_redirects} times")
+                
+                with response:
+                    if response.status_code >= 400:
+                        raise ValueError(f"Could not fetch image: HTTP {response.status_code}")
+                    
+                    declared_length = int(response.headers.get('Content-Length') or 0)
+                    if declared_length > self.max_upload_bytes:
+                        raise ValueError(f"Image too large: {declared_length} bytes")
+                    
+                    received = 0
+                    try:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            received += len(chunk)
+                            if received > self.max_upload_bytes:
+                                raise ValueError(f"Image too large: more than {self.max_upload_bytes} bytes")
+                            buffer.write(chunk)
+                    except requests.RequestException as e:
+                        raise ValueError(f"Could not fetch image: {e}") from e
+                
+                buffer.seek(0)
+                image = self.open_image(buffer, full_resolution)
             
-            logger.info(f"Image loaded from URL: {image_url}")
+            logger.info("Image loaded from URL: %s", image_url)
             return image
             
         except Exception as e:
-            logger.error(f"Failed to load image from URL {image_url}: {str(e)}")
+            logger.error("Failed to load image from URL %s: %s", image_url, e)
             raise
     
-    def load_image_from_path(self, image_path: str) -> Image.Image:
+    def check_url(self, url: str) -> Optional[str]:
+        """Raise ValueError unless url is http(s) and its host resolves only to public addresses.
+
+        Returns the checked address to connect to, or None when private
+        URLs are allowed and the host is left to the usual lookup.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise ValueError("Image URL must be an http or https URL")
+        
+        if self.allow_private_urls:
+            return
+        
+        try:
+            port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+            addresses = socket.getaddrinfo(parsed.hostname, port, proto=socket.IPPROTO_TCP)
+        except (socket.gaierror, UnicodeError) as e:
+            raise ValueError(f"Could not resolve image URL host {parsed.hostname}") from e
+        
+        for address in addresses:
+            ip = ipaddress.ip_address(address[4][0].split('%')[0])
+            if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+                ip = ip.ipv4_mapped
+            if not ip.is_global or ip.is_multicast:
+                raise ValueError("Image URL must point to a public address")
+        return addresses[0][4][0]
+    
+    def _get(self, url: str, address: Optional[str]):
+        """Streamed GET of url, connecting to address when given while keeping its Host header and TLS name"""
+        import requests
+        
+        if address is None:
+            return requests.get(url, timeout=self.download_timeout, stream=True, allow_redirects=False)
+        
+        parsed = urlparse(url)
+        host = f"[{address}]" if ':' in address else address
+        pinned = parsed._replace(netloc=host if parsed.port is None else f"{host}:{parsed.port}")
+        session = requests.Session()
+        if parsed.scheme == 'https':
+            session.mount('https://', _pinned_host_adapter(parsed.hostname))
+        return session.get(pinned.geturl(), headers={'Host': parsed.netloc.rpartition('@')[2]},
+                           timeout=self.download_timeout, stream=True, allow_redirects=False)
+    
+    def load_image_from_path(self, image_path: str, full_resolution: bool = True) -> Image.Image:
         """Load image from local path"""
         try:
-            image = Image.open(image_path)
+            with open(image_path, 'rb') as f:
+                image = self.open_image(f, full_resolution)
             
-            # Convert to RGB if necessary
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            logger.info(f"Image loaded from path: {image_path}")
+            logger.info("Image loaded from path: %s", image_path)
             return image
             
         except Exception as e:
-            logger.error(f"Failed to load image from path {image_path}: {str(e)}")
+            logger.error("Failed to load image from path %s: %s", image_path, e)
             raise
     
-    def analyze_image(self, image: Image.Image) -> dict:
+    def analyze_image(self, image: Image.Image, stats: ImageStats = None) -> dict:
         """Analyze image and extract basic information"""
         try:
+            if stats is None:
+                stats = self.compute_stats(image)
+            
             analysis = {
                 'dimensions': {
                     'width': image.width,
@@ -56,38 +335,38 @@ class ImageModel:
                 },
                 'format': image.format or 'Unknown',
                 'mode': image.mode,
-                'size_bytes': len(image.tobytes()),
+                'size_bytes': self._raw_size(image),
                 'aspect_ratio': round(image.width / image.height, 2),
                 'is_grayscale': image.mode in ['L', 'LA'],
                 'has_transparency': image.mode in ['RGBA', 'LA'] or 'transparency' in image.info
             }
             
             # Calculate basic statistics
-            img_array = np.array(image)
-            if len(img_array.shape) == 3:  # Color image
+            moments = stats.moments
+            if stats.is_color:
                 analysis['color_stats'] = {
-                    'mean_rgb': [float(np.mean(img_array[:, :, i])) for i in range(3)],
-                    'std_rgb': [float(np.std(img_array[:, :, i])) for i in range(3)]
+                    'mean_rgb': moments['mean'].tolist(),
+                    'std_rgb': moments['std'].tolist()
                 }
             else:  # Grayscale
                 analysis['brightness'] = {
-                    'mean': float(np.mean(img_array)),
-                    'std': float(np.std(img_array))
+                    'mean': float(moments['mean'][0]),
+                    'std': float(moments['std'][0])
                 }
             
             return analysis
             
         except Exception as e:
-            logger.error(f"Image analysis failed: {str(e)}")
+            logger.error("Image analysis failed: %s", e)
             raise
     
-    def classify_image(self, image: Image.Image) -> dict:
+    def classify_image(self, image: Image.Image, stats: ImageStats = None) -> dict:
         """Classify image content (basic implementation)"""
         try:
             # This is a simplified classification
             # In a real implementation, you would use a pre-trained model
             
-            analysis = self.analyze_image(image)
+            analysis = self.analyze_image(image, stats)
             
             # Simple heuristic-based classification
             classification = {
@@ -126,10 +405,10 @@ class ImageModel:
             return classification
             
         except Exception as e:
-            logger.error(f"Image classification failed: {str(e)}")
+            logger.error("Image classification failed: %s", e)
             raise
     
-    def detect_objects(self, image: Image.Image) -> dict:
+    def detect_objects(self, image: Image.Image, stats: ImageStats = None) -> dict:
         """Detect objects in image (placeholder implementation)"""
         try:
             # This is a placeholder implementation
@@ -142,7 +421,7 @@ class ImageModel:
             }
             
             # Placeholder detection based on image properties
-            analysis = self.analyze_image(image)
+            analysis = self.analyze_image(image, stats)
             
             # Simple heuristic detection
             if analysis['dimensions']['width'] > analysis['dimensions']['height']:
@@ -157,14 +436,14 @@ class ImageModel:
             return objects
             
         except Exception as e:
-            logger.error(f"Object detection failed: {str(e)}")
+            logger.error("Object detection failed: %s", e)
             raise
     
-    def extract_features(self, image: Image.Image) -> dict:
+    def extract_features(self, image: Image.Image, stats: ImageStats = None) -> dict:
         """Extract visual features from image"""
         try:
-            # Convert image to numpy array
-            img_array = np.array(image)
+            if stats is None:
+                stats = self.compute_stats(image)
             
             features = {
                 'histogram': {},
@@ -172,83 +451,99 @@ class ImageModel:
                 'color_features': {}
             }
             
-            if len(img_array.shape) == 3:  # Color image
-                # Color histogram
+            # 32-bin histograms are the 256-bin ones summed in groups of 8
+            histograms = stats.histograms.reshape(stats.channels, 32, 8).sum(axis=2)
+            moments = stats.moments
+            
+            if stats.is_color:
                 for i, color in enumerate(['red', 'green', 'blue']):
-                    hist, _ = np.histogram(img_array[:, :, i], bins=32, range=(0, 256))
-                    features['histogram'][color] = hist.tolist()
+                    features['histogram'][color] = histograms[i].tolist()
                 
                 # Color moments
                 features['color_features'] = {
-                    'mean_rgb': [float(np.mean(img_array[:, :, i])) for i in range(3)],
-                    'std_rgb': [float(np.std(img_array[:, :, i])) for i in range(3)],
-                    'skew_rgb': [float(self._calculate_skewness(img_array[:, :, i])) for i in range(3)]
+                    'mean_rgb': moments['mean'].tolist(),
+                    'std_rgb': moments['std'].tolist(),
+                    'skew_rgb': moments['skew'].tolist()
                 }
             else:  # Grayscale
-                hist, _ = np.histogram(img_array, bins=32, range=(0, 256))
-                features['histogram']['grayscale'] = hist.tolist()
+                features['histogram']['grayscale'] = histograms[0].tolist()
                 
                 features['color_features'] = {
-                    'mean': float(np.mean(img_array)),
-                    'std': float(np.std(img_array)),
-                    'skew': float(self._calculate_skewness(img_array))
+                    'mean': float(moments['mean'][0]),
+                    'std': float(moments['std'][0]),
+                    'skew': float(moments['skew'][0])
                 }
             
             # Basic texture features
-            features['texture_features'] = self._calculate_texture_features(img_array)
+            features['texture_features'] = stats.texture_features
             
             return features
             
         except Exception as e:
-            logger.error(f"Feature extraction failed: {str(e)}")
+            logger.error("Feature extraction failed: %s", e)
             raise
     
-    def _calculate_skewness(self, data: np.ndarray) -> float:
-        """Calculate skewness of data"""
-        try:
-            mean = np.mean(data)
-            std = np.std(data)
-            if std == 0:
-                return 0.0
-            return float(np.mean(((data - mean) / std) ** 3))
-        except:
-            return 0.0
+    def feature_vector(self, image: Image.Image, stats: ImageStats = None) -> np.ndarray:
+        """Flatten extracted features into a float32 vector laid out as FEATURE_NAMES
+        
+        Histograms are normalized by pixel count so images of different sizes
+        are comparable.
+        """
+        if stats is None:
+            stats = self.compute_stats(image if image.mode == 'RGB' else image.convert('RGB'))
+        
+        histograms = stats.histograms.reshape(stats.channels, 32, 8).sum(axis=2)
+        histograms = np.broadcast_to(histograms, (3, 32)) / max(stats.pixel_count, 1)
+        moments = stats.moments
+        texture = stats.texture_features
+        
+        return np.concatenate([
+            histograms.ravel(),
+            np.broadcast_to(moments['mean'], 3),
+            np.broadcast_to(moments['std'], 3),
+            np.broadcast_to(moments['skew'], 3),
+            [texture['contrast'], texture['homogeneity'], texture['energy'], texture['gradient_magnitude']]
+        ]).astype(np.float32)
     
-    def _calculate_texture_features(self, img_array: np.ndarray) -> dict:
-        """Calculate basic texture features"""
+    def perceptual_hashes(self, image: Image.Image) -> dict:
+        """Compute 64-bit average, difference and DCT perceptual hashes"""
         try:
-            # Convert to grayscale if color
-            if len(img_array.shape) == 3:
-                gray = np.mean(img_array, axis=2)
-            else:
-                gray = img_array
-            
-            # Calculate gradients
-            grad_x = np.gradient(gray, axis=1)
-            grad_y = np.gradient(gray, axis=0)
-            
-            # Texture measures
-            texture_features = {
-                'contrast': float(np.std(gray)),
-                'homogeneity': float(1.0 / (1.0 + np.var(gray))),
-                'energy': float(np.sum(gray ** 2) / gray.size),
-                'gradient_magnitude': float(np.mean(np.sqrt(grad_x**2 + grad_y**2)))
-            }
+            gray = image.convert('L')
+            
+            small = np.asarray(self.resize_image(gray, (8, 8)), dtype=np.float32)
+            ahash = _pack_bits(small > small.mean())
+            
+            wide = np.asarray(self.resize_image(gray, (9, 8)), dtype=np.int16)
+            dhash = _pack_bits(wide[:, 1:] > wide[:, :-1])
             
-            return texture_features
+            # pHash keeps the lowest 8x8 DCT frequencies of a 32x32 thumbnail
+            # and thresholds them at their median, ignoring the DC term
+            thumbnail = np.asarray(self.resize_image(gray, (32, 32)), dtype=np.float64)
+            low_frequencies = (_DCT_32 @ thumbnail @ _DCT_32.T)[:8, :8].ravel()
+            phash = _pack_bits(low_frequencies > np.median(low_frequencies[1:]))
+            
+            return {'ahash': ahash, 'dhash': dhash, 'phash': phash}
             
         except Exception as e:
-            logger.error(f"Texture feature calculation failed: {str(e)}")
-            return {}
+            logger.error("Perceptual hashing failed: %s", e)
+            raise
+    
+    def _raw_size(self, image: Image.Image) -> int:
+        """Size of the decoded pixel data, without materializing it"""
+        if image.mode == '1':
+            return ((image.width + 7) // 8) * image.height
+        bytes_per_pixel = _MODE_BYTES.get(image.mode, len(image.getbands()))
+        return image.width * image.height * bytes_per_pixel
     
     def resize_image(self, image: Image.Image, target_size: tuple) -> Image.Image:
         """Resize image to target size"""
         try:
-            resized_image = image.resize(target_size, Image.Resampling.LANCZOS)
-            logger.info(f"Image resized to {target_size}")
+            # reducing_gap box-reduces large sources before the Lanczos pass
+            resized_image = image.resize(target_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            logger.debug("Image resized to %s", target_size)
             return resized_image
         except Exception as e:
-            logger.error(f"Image resizing failed: {str(e)}")
+            logger.error("Image resizing failed: %s", e)
             raise
     
     def validate_image(self, image_data: bytes) -> bool:
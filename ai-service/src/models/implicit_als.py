@@ -0,0 +1,147 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from models.ranking_metrics import top_k_items, ranking_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ImplicitALS:
+    """Alternating least squares for implicit feedback (Hu, Koren & Volinsky).
+
+    Every rating r is a preference of 1 with confidence 1 + alpha * r, and
+    unobserved pairs are preferences of 0 with confidence 1. Each half-step
+    fixes one side's factors and solves every row of the other side. The
+    solves use a few warm-started conjugate-gradient steps applied to blocks
+    of rows at once, touching only each row's nonzeros. Blocks run on a
+    thread pool; numpy and scipy release the GIL for the heavy array work.
+    """
+
+    def __init__(self, factors: int = 64, regularization: float = 0.01, alpha: float = 40.0,
+                 iterations: int = 15, cg_steps: int = 3, threads: int = 1, block_size: int = 4096,
+                 random_state: int = 42):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.cg_steps = cg_steps
+        self.threads = max(1, threads)
+        self.block_size = block_size
+        self.random_state = random_state
+        self.user_factors = None
+        self.item_factors = None
+
+    def fit(self, matrix, validation=None, k: int = 10, patience: int = 2, eval_users: int = 2000) -> dict:
+        """Factorize a users x items CSR matrix of ratings.
+
+        With a ``validation`` matrix of held-out interactions, ranking
+        metrics are computed after every iteration; training stops once NDCG
+        has not improved for ``patience`` iterations and keeps the best
+        factors.
+        """
+        start = time.perf_counter()
+        confidence = matrix.astype(np.float32, copy=True).tocsr()
+        confidence.data *= self.alpha
+        confidence_t = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        self.user_factors = (rng.standard_normal((matrix.shape[0], self.factors)) * 0.01).astype(np.float32)
+        self.item_factors = (rng.standard_normal((matrix.shape[1], self.factors)) * 0.01).astype(np.float32)
+
+        eval_rows = None
+        if validation is not None:
+            candidates = np.flatnonzero(np.diff(validation.indptr))
+            eval_rows = rng.choice(candidates, min(eval_users, len(candidates)), replace=False) \
+                if len(candidates) else candidates
+
+        history = []
+        best = None
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for iteration in range(1, self.iterations + 1):
+                self._solve(pool, confidence, self.user_factors, self.item_factors)
+                self._solve(pool, confidence_t, self.item_factors, self.user_factors)
+
+                entry = {'iteration': iteration, 'seconds': round(time.perf_counter() - start, 3)}
+                if eval_rows is not None and len(eval_rows):
+                    entry.update(self.evaluate(matrix, validation, eval_rows, k))
+                    if best is None or entry['ndcg_at_k'] > best[0]['ndcg_at_k'] + 1e-4:
+                        best = (entry, self.user_factors.copy(), self.item_factors.copy())
+                history.append(entry)
+                logger.info("ALS iteration %s: %s", iteration, entry)
+
+                if best is not None and iteration - best[0]['iteration'] >= patience:
+                    break
+
+        if best is not None:
+            _, self.user_factors, self.item_factors = best
+        return {
+            'training_seconds': round(time.perf_counter() - start, 3),
+            'iterations': len(history),
+            'best_iteration': best[0]['iteration'] if best is not None else len(history),
+            'metrics': {key: value for key, value in best[0].items() if key not in ('iteration', 'seconds')}
+            if best is not None else {},
+            'history': history
+        }
+
+    def evaluate(self, train, validation, rows, k: int = 10, block_size: int = 256) -> dict:
+        """Ranking metrics for the given users' held-out items, skipping items they trained on"""
+        recommended = np.concatenate([
+            top_k_items(self.user_factors[rows[i:i + block_size]], self.item_factors,
+                        train[rows[i:i + block_size]], k)
+            for i in range(0, len(rows), block_size)
+        ])
+        return ranking_metrics(recommended, validation[rows], k)
+
+    def fold_in(self, ratings: np.ndarray) -> np.ndarray:
+        """Factors for a new rating row against the trained item factors (exact solve)"""
+        return fold_in(ratings, self.item_factors, self.regularization, self.alpha)
+
+    def _solve(self, pool, confidence, target, fixed):
+        """Update every row of ``target`` with ``fixed`` held constant"""
+        gram = fixed.T @ fixed + self.regularization * np.eye(self.factors, dtype=np.float32)
+        blocks = range(0, target.shape[0], self.block_size)
+        list(pool.map(lambda first: self._solve_block(confidence, target, fixed, gram, first), blocks))
+
+    def _solve_block(self, confidence, target, fixed, gram, first):
+        rows = confidence[first:first + self.block_size]
+        x = target[first:first + rows.shape[0]]
+        local = np.repeat(np.arange(rows.shape[0]), np.diff(rows.indptr))
+        neighbours = fixed[rows.indices]
+        weights = rows.data
+
+        def apply(vectors):
+            # (Y'Y + reg*I) x + Y' (C_u - I) Y x, using only the row's nonzeros
+            projected = np.einsum('nf,nf->n', vectors[local], neighbours) * weights
+            return vectors @ gram + _scatter(projected, rows) @ fixed
+
+        # Y' C_u p(u): confidence 1 + alpha * r on each observed item
+        residual = _scatter(weights + 1.0, rows) @ fixed - apply(x)
+        direction = residual.copy()
+        norms = np.einsum('nf,nf->n', residual, residual)
+        for _ in range(self.cg_steps):
+            product = apply(direction)
+            step = norms / np.maximum(np.einsum('nf,nf->n', direction, product), 1e-12)
+            x += step[:, np.newaxis] * direction
+            residual -= step[:, np.newaxis] * product
+            updated = np.einsum('nf,nf->n', residual, residual)
+            direction = residual + (updated / np.maximum(norms, 1e-12))[:, np.newaxis] * direction
+            norms = updated
+        target[first:first + rows.shape[0]] = x
+
+
+def fold_in(ratings: np.ndarray, item_factors: np.ndarray, regularization: float, alpha: float) -> np.ndarray:
+    """Least-squares user factors for a dense rating row, with item factors fixed"""
+    observed = np.flatnonzero(ratings)
+    neighbours = item_factors[observed]
+    confidence = 1.0 + alpha * ratings[observed]
+    system = item_factors.T @ item_factors + (neighbours.T * (confidence - 1.0)) @ neighbours \
+        + regularization * np.eye(item_factors.shape[1])
+    return np.linalg.solve(system, neighbours.T @ confidence).astype(np.float32)
+
+
+def _scatter(values, rows):
+    """A CSR matrix with ``rows``' sparsity pattern and the given values"""
+    from scipy.sparse import csr_matrix
+
+    return csr_matrix((values, rows.indices, rows.indptr), shape=rows.shape)
@@ -0,0 +1,200 @@
+import os
+import io
+import math
+import pickle
+import tempfile
+import logging
+import threading
+from array import array
+from collections import namedtuple
+from typing import Iterable, List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('ndjson', 'csv')
+
+# Parallel typed arrays: int32 user and item codes, float32 ratings and,
+# when requested, float64 Unix timestamps
+Interactions = namedtuple('Interactions', ['users', 'items', 'ratings', 'timestamps'], defaults=(None,))
+
+
+class IdEncoder:
+    """Stable mapping from external string ids to dense int32 codes.
+
+    Codes never change once assigned, so interactions ingested in separate
+    uploads or chunks line up, and the encoder is saved with the model.
+    Assigning codes is locked, so concurrent uploads never give two ids
+    the same code.
+    """
+
+    def __init__(self, ids: Iterable[str] = ()):
+        self.ids: List[str] = []
+        self._codes = {}
+        self._lock = threading.Lock()
+        for item_id in ids:
+            self._code(item_id)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def code(self, value) -> int:
+        with self._lock:
+            return self._code(value)
+
+    def _code(self, value) -> int:
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.ids)
+            self.ids.append(value)
+        return code
+
+    def encode(self, values) -> np.ndarray:
+        """int32 codes for a pandas Series of ids, looking up each distinct id once"""
+        import pandas as pd
+
+        inverse, uniques = pd.factorize(values)
+        with self._lock:
+            codes = np.fromiter((self._code(value) for value in uniques), dtype=np.int32, count=len(uniques))
+        return codes[inverse]
+
+    def decode(self, codes) -> List[str]:
+        return [self.ids[code] for code in codes]
+
+
+def load_encoders(path: str):
+    """(user encoder, item encoder) saved at path, or empty ones"""
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            return IdEncoder(data['users']), IdEncoder(data['items'])
+        except Exception as e:
+            logger.error("Failed to load id encoders %s: %s", path, e)
+    return IdEncoder(), IdEncoder()
+
+
+def save_encoders(path: str, users: IdEncoder, items: IdEncoder):
+    # A temp file of its own, so concurrent trainers never move each other's file
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp', delete=False) as f:
+        pickle.dump({'users': list(users.ids), 'items': list(items.ids)}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f.name, path)
+
+
+def detect_format(filename: str = None, content_type: str = None) -> str:
+    """'ndjson' or 'csv' from a file name or content type, else None"""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    return None
+
+
+def read_interactions(source, data_format: str, users: IdEncoder, items: IdEncoder,
+                      chunk_rows: int = 100000, timestamps: bool = False) -> Interactions:
+    """Parse an NDJSON or CSV stream chunk by chunk into typed arrays.
+
+    ``source`` is a path or a binary file object with ``user_id``,
+    ``item_id`` and optional ``rating`` fields, plus a ``timestamp`` field
+    (Unix seconds or ISO 8601) when ``timestamps`` is set. Only one chunk of
+    parsed rows is held at a time; each becomes typed arrays before the
+    next is read.
+    """
+    import pandas as pd
+
+    if data_format not in FORMATS:
+        raise ValueError(f"Unsupported interaction format: {data_format}")
+    if not isinstance(source, str):
+        source = io.TextIOWrapper(source, encoding='utf-8', newline='')
+
+    dtype = {'user_id': str, 'item_id': str}
+    columns = ('user_id', 'item_id', 'rating', 'timestamp') if timestamps else ('user_id', 'item_id', 'rating')
+    required = {'user_id', 'item_id', 'timestamp'} if timestamps else {'user_id', 'item_id'}
+    if data_format == 'csv':
+        chunks = pd.read_csv(source, chunksize=chunk_rows, dtype=dtype,
+                             usecols=lambda column: column in columns)
+    else:
+        chunks = pd.read_json(source, lines=True, chunksize=chunk_rows, dtype=dtype)
+
+    user_codes, item_codes, ratings, times = [], [], [], []
+    rows = 0
+    for chunk in chunks:
+        missing = required - set(chunk.columns)
+        if missing:
+            raise ValueError(f"Interactions are missing fields: {', '.join(sorted(missing))}")
+        chunk = chunk.dropna(subset=['user_id', 'item_id'])
+        if 'rating' in chunk.columns:
+            chunk_ratings = pd.to_numeric(chunk['rating'], errors='coerce')
+            # A missing rating counts as one interaction; one that isn't a number is an error
+            if (chunk_ratings.isna() & chunk['rating'].notna()).any():
+                raise ValueError("Ratings must be numbers")
+            chunk_ratings = chunk_ratings.fillna(1.0)
+        else:
+            chunk_ratings = pd.Series(1.0, index=chunk.index)
+        if not np.isfinite(chunk_ratings).all():
+            raise ValueError("Ratings must be numbers")
+        if (chunk_ratings < 0).any():
+            raise ValueError("Ratings must not be negative")
+
+        user_codes.append(users.encode(chunk['user_id'].astype(str)))
+        item_codes.append(items.encode(chunk['item_id'].astype(str)))
+        ratings.append(chunk_ratings.to_numpy(dtype=np.float32))
+        if timestamps:
+            times.append(_seconds(chunk['timestamp']))
+        rows += len(chunk)
+        logger.debug("Parsed %s interactions", rows)
+
+    return _concatenate(user_codes, item_codes, ratings, times if timestamps else None)
+
+
+def _seconds(values) -> np.ndarray:
+    """float64 Unix seconds from numeric or ISO 8601 timestamps"""
+    import pandas as pd
+
+    # read_json already turns a 'timestamp' column into datetimes
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        numeric = pd.to_numeric(values, errors='coerce')
+        if numeric.notna().all():
+            return numeric.to_numpy(dtype=np.float64)
+    parsed = pd.to_datetime(values, utc=True, errors='coerce', format='ISO8601')
+    if parsed.isna().any():
+        raise ValueError("Timestamps must be Unix seconds or ISO 8601 dates")
+    return (parsed - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy(dtype=np.float64)
+
+
+def interactions_from_records(records, users: IdEncoder, items: IdEncoder) -> Interactions:
+    """Typed arrays from already-parsed interaction dicts (e.g. a JSON request body)"""
+    user_codes, item_codes, ratings = array('i'), array('i'), array('f')
+    for record in records:
+        user_codes.append(users.code(record['user_id']))
+        item_codes.append(items.code(record['item_id']))
+        ratings.append(parse_rating(record.get('rating')))
+    return Interactions(np.frombuffer(user_codes, dtype=np.int32), np.frombuffer(item_codes, dtype=np.int32),
+                        np.frombuffer(ratings, dtype=np.float32))
+
+
+def parse_rating(value) -> float:
+    """A record's rating, 1.0 when missing; rejects values that aren't non-negative numbers"""
+    if value is None:
+        return 1.0
+    try:
+        rating = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Ratings must be numbers, got {value!r}")
+    if not math.isfinite(rating):
+        raise ValueError(f"Ratings must be numbers, got {value!r}")
+    if rating < 0:
+        raise ValueError("Ratings must not be negative")
+    return rating
+
+
+def _concatenate(user_codes, item_codes, ratings, times=None) -> Interactions:
+    if not user_codes:
+        return Interactions(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32),
+                            np.empty(0, dtype=np.float32),
+                            None if times is None else np.empty(0, dtype=np.float64))
+    return Interactions(np.concatenate(user_codes), np.concatenate(item_codes), np.concatenate(ratings),
+                        None if times is None else np.concatenate(times))
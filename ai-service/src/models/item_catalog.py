@@ -0,0 +1,391 @@
+import os
+import re
+import json
+import heapq
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'are', 'was', 'were', 'been', 'being', 'have', 'has', 'had',
+    'does', 'did', 'will', 'would', 'could', 'should', 'this', 'that', 'these', 'those', 'from',
+    'into', 'your', 'you', 'our', 'its', 'not', 'but', 'how', 'what', 'which', 'who', 'about'
+}
+
+# Rows read from each posting list per round of the top-k search
+_STEP = 16
+# Queries whose lists share few items stop early; broad ones that would
+# read more rows than this score every item with numpy instead
+_READ_BUDGET = 512
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, record TEXT NOT NULL, count REAL NOT NULL);
+"""
+
+
+def _keywords(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return [word for word in _WORD_PATTERN.findall(text.lower())
+            if len(word) > 2 and word not in _STOP_WORDS]
+
+
+def _values(value) -> List[str]:
+    """A metadata field as a list of normalized strings"""
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple, set)):
+        return []
+    return [str(item).strip().lower() for item in value if str(item).strip()]
+
+
+def item_terms(item: dict) -> set:
+    """The (kind, value) terms an item is indexed under"""
+    terms = {('category', value) for value in _values(item.get('category')) + _values(item.get('categories'))}
+    terms.update(('tag', value) for value in _values(item.get('tags')))
+    for field in ('title', 'description', 'text'):
+        terms.update(('keyword', word) for word in _keywords(item.get(field)))
+    return terms
+
+
+def preference_terms(preferences: dict) -> set:
+    """The (kind, value) terms a user's stated preferences ask for"""
+    terms = {('category', value) for value in _values(preferences.get('categories'))}
+    terms.update(('tag', value) for value in _values(preferences.get('tags')))
+    for keyword in _values(preferences.get('keywords')):
+        terms.update(('keyword', word) for word in _keywords(keyword))
+    return terms
+
+
+class ItemCatalog:
+    """Item metadata with an inverted index for content-based recommendations.
+
+    Every item is indexed under its category, its tags and the keywords of
+    its title, description and text. Each posting list holds item rows
+    sorted by precomputed popularity, so a query reads its lists from the
+    most popular item down and stops as soon as no unread item could still
+    enter the top k (the threshold algorithm). An item's score is the share
+    of the query's term weight it matches, blended with its popularity; an
+    extra popularity-ordered list lets popular items fill in when few items
+    match.
+
+    With a catalog path the items live in SQLite, shared by every worker:
+    each change is written in one transaction that bumps the catalog
+    version, and a worker reloads its index whenever the version moved
+    since it last read or wrote. Without a path the catalog is in memory
+    only.
+    """
+
+    def __init__(self, catalog_path: str = None, term_weights: Dict[str, float] = None,
+                 popularity_weight: float = 0.3):
+        self.catalog_path = catalog_path
+        self.term_weights = term_weights or {'category': 1.0, 'tag': 0.6, 'keyword': 0.2}
+        self.popularity_weight = popularity_weight
+
+        self.items: List[dict] = []
+        self._row_of: Dict[str, int] = {}
+        self._terms: List[frozenset] = []
+        self._counts = np.empty(0, dtype=np.float64)
+        self._popularity = np.empty(0, dtype=np.float32)
+        self._postings: Optional[Dict[tuple, np.ndarray]] = None
+        self._by_popularity = np.empty(0, dtype=np.int32)
+        self._lock = threading.Lock()
+        # Catalog version the in-memory index reflects; None until first read
+        self._version = None
+        self._connection = None
+        self._pid = None
+
+        if catalog_path:
+            directory = os.path.dirname(catalog_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        with self._lock:
+            self._sync()
+            return len(self._row_of)
+
+    def __contains__(self, item_id):
+        with self._lock:
+            self._sync()
+            return str(item_id) in self._row_of
+
+    def add(self, items: List[dict]) -> int:
+        """Add or replace items ({'id', 'title', 'description', 'category', 'tags', 'popularity'})"""
+        with self._writing() as db:
+            counts = []
+            for item in items:
+                item_id = str(item['id'])
+                record = {key: value for key, value in item.items() if key != 'popularity'}
+                record['id'] = item_id
+                row = self._row_of.get(item_id)
+                if row is None:
+                    row = len(self.items)
+                    self._row_of[item_id] = row
+                    self.items.append(record)
+                    self._terms.append(frozenset(item_terms(record)))
+                    counts.append((row, float(item.get('popularity') or 0.0)))
+                else:
+                    self.items[row] = record
+                    self._terms[row] = frozenset(item_terms(record))
+                    if item.get('popularity') is not None:
+                        counts.append((row, float(item['popularity'])))
+
+            if len(self._counts) < len(self.items):
+                self._counts = np.concatenate([self._counts, np.zeros(len(self.items) - len(self._counts))])
+            for row, count in counts:
+                self._counts[row] = max(count, 0.0)
+            self._invalidate()
+
+            if db is not None:
+                rows = sorted({self._row_of[str(item['id'])] for item in items})
+                db.executemany(
+                    'INSERT INTO items (id, record, count) VALUES (?, ?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET record = excluded.record, count = excluded.count',
+                    ((self.items[row]['id'], json.dumps(self.items[row]), float(self._counts[row])) for row in rows)
+                )
+            return len(items)
+
+    def remove(self, ids) -> int:
+        """Drop items; their rows are reused by compacting the catalog"""
+        with self._writing() as db:
+            drop = {self._row_of[str(item_id)] for item_id in ids if str(item_id) in self._row_of}
+            if drop and db is not None:
+                db.executemany('DELETE FROM items WHERE id = ?', ((self.items[row]['id'],) for row in drop))
+            if drop:
+                keep = [row for row in range(len(self.items)) if row not in drop]
+                self._set_rows([self.items[row] for row in keep], [self._terms[row] for row in keep],
+                               self._counts[keep])
+            return len(drop)
+
+    def set_popularity(self, counts: Dict[str, float]):
+        """Replace popularity (e.g. interaction counts) for the given item ids"""
+        with self._writing() as db:
+            rows = []
+            for item_id, count in counts.items():
+                row = self._row_of.get(str(item_id))
+                if row is not None:
+                    self._counts[row] = max(float(count), 0.0)
+                    rows.append(row)
+            self._invalidate()
+
+            if db is not None:
+                db.executemany('UPDATE items SET count = ? WHERE id = ?',
+                               ((float(self._counts[row]), self.items[row]['id']) for row in rows))
+
+    def item(self, item_id) -> Optional[dict]:
+        with self._lock:
+            self._sync()
+            row = self._row_of.get(str(item_id))
+            return None if row is None else self.items[row]
+
+    def recommend(self, preferences: dict, limit: int = 10, exclude=None) -> List[dict]:
+        """Top items for stated preferences, best first, each with its score and matched terms"""
+        exclude = {str(item_id) for item_id in exclude or ()}
+        with self._lock:
+            self._sync()
+            if not self.items or limit <= 0:
+                return []
+            self._ensure_index()
+
+            query = {term: self.term_weights.get(term[0], 0.0) for term in preference_terms(preferences)}
+            lists = [(self._postings[term], weight) for term, weight in query.items() if term in self._postings]
+            # Popular items compete too, with no term weight of their own
+            lists.append((self._by_popularity, 0.0))
+            total = sum(query.values()) or 1.0
+            match_share = (1.0 - self.popularity_weight) / total
+
+            ranked = self._threshold_top_k(query, lists, limit, exclude, match_share)
+            if ranked is None:
+                ranked = self._dense_top_k(lists, limit, exclude, match_share)
+
+            return [
+                {
+                    'item': self.items[row],
+                    'score': score,
+                    'matched': sorted(value for kind, value in query if (kind, value) in self._terms[row])
+                }
+                for score, row in ranked
+            ]
+
+    def _threshold_top_k(self, query, lists, limit, exclude, match_share):
+        """(score, row) best first, or None once more than _READ_BUDGET rows were read"""
+        heap = []
+        seen = set()
+        cursors = [0] * len(lists)
+        popularity = self._popularity
+        while True:
+            active = False
+            for index, (rows, _) in enumerate(lists):
+                start = cursors[index]
+                if start >= len(rows):
+                    continue
+                active = True
+                cursors[index] = start + _STEP
+                for row in rows[start:start + _STEP].tolist():
+                    if row in seen:
+                        continue
+                    seen.add(row)
+                    if self.items[row]['id'] in exclude:
+                        continue
+                    terms = self._terms[row]
+                    matched = sum(weight for term, weight in query.items() if term in terms)
+                    entry = (matched * match_share + self.popularity_weight * float(popularity[row]), -row)
+                    if len(heap) < limit:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+            if not active:
+                break
+            if len(heap) == limit and heap[0][0] >= self._bound(lists, cursors, match_share):
+                break
+            if len(seen) > _READ_BUDGET:
+                return None
+        return [(score, -negative_row) for score, negative_row in sorted(heap, reverse=True)]
+
+    def _dense_top_k(self, lists, limit, exclude, match_share):
+        """(score, row) best first, scoring every item at once"""
+        weighted = [(rows, weight) for rows, weight in lists if weight > 0]
+        matched = np.zeros(len(self.items))
+        if weighted:
+            matched = np.bincount(np.concatenate([rows for rows, _ in weighted]),
+                                  weights=np.concatenate([np.full(len(rows), weight) for rows, weight in weighted]),
+                                  minlength=len(self.items))
+        scores = matched * match_share + self.popularity_weight * self._popularity
+        for item_id in exclude:
+            row = self._row_of.get(item_id)
+            if row is not None:
+                scores[row] = -np.inf
+        limit = min(limit, len(scores) - len(exclude & self._row_of.keys()))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((top, -scores[top]))]
+        return [(float(scores[row]), int(row)) for row in top]
+
+    def _bound(self, lists, cursors, match_share) -> float:
+        """Best score any unread item could still reach.
+
+        An unread item is only in lists that are still open, and is no more
+        popular than the next unread row of each of them. So for each open
+        list's next popularity p, it can at most match every open list whose
+        next row is at least that popular and have popularity p.
+        """
+        frontier = sorted(((float(self._popularity[rows[cursor]]), weight)
+                           for (rows, weight), cursor in zip(lists, cursors) if cursor < len(rows)),
+                          reverse=True)
+        bound = 0.0
+        weight_above = 0.0
+        for next_popularity, weight in frontier:
+            weight_above += weight
+            bound = max(bound, weight_above * match_share + self.popularity_weight * next_popularity)
+        return bound
+
+    def _invalidate(self):
+        self._postings = None
+
+    def _ensure_index(self):
+        if self._postings is not None:
+            return
+        # Log-scaled so a handful of viral items don't flatten everyone else
+        scaled = np.log1p(self._counts)
+        peak = scaled.max() if len(scaled) else 0.0
+        self._popularity = (scaled / peak if peak > 0 else np.zeros_like(scaled)).astype(np.float32)
+        self._by_popularity = np.argsort(-self._popularity, kind='stable').astype(np.int32)
+        rank = np.empty(len(self.items), dtype=np.int64)
+        rank[self._by_popularity] = np.arange(len(self.items))
+
+        term_ids = {}
+        pair_terms, pair_rows = [], []
+        for row, terms in enumerate(self._terms):
+            for term in terms:
+                pair_terms.append(term_ids.setdefault(term, len(term_ids)))
+                pair_rows.append(row)
+        pair_terms = np.array(pair_terms, dtype=np.int32)
+        pair_rows = np.array(pair_rows, dtype=np.int32)
+        # Group by term, most popular row first within each group
+        order = np.lexsort((rank[pair_rows], pair_terms))
+        pair_terms, pair_rows = pair_terms[order], pair_rows[order]
+        bounds = np.searchsorted(pair_terms, np.arange(len(term_ids) + 1))
+        self._postings = {term: pair_rows[bounds[i]:bounds[i + 1]] for term, i in term_ids.items()}
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.catalog_path, check_same_thread=False, timeout=30,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def _stored_version(db) -> int:
+        row = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _sync(self):
+        """Reload the items if another worker changed the catalog (call with the lock held)"""
+        if not self.catalog_path:
+            return
+        db = self._db()
+        if self._stored_version(db) == self._version:
+            return
+
+        # Read the version and the items in one transaction so they agree
+        owned = not db.in_transaction
+        if owned:
+            db.execute('BEGIN')
+        try:
+            version = self._stored_version(db)
+            rows = db.execute('SELECT record, count FROM items ORDER BY rowid').fetchall()
+        finally:
+            if owned:
+                db.execute('COMMIT')
+
+        items = [json.loads(record) for record, _ in rows]
+        self._set_rows(items, [frozenset(item_terms(item)) for item in items],
+                       np.array([count for _, count in rows], dtype=np.float64))
+        self._version = version
+        logger.info("Loaded item catalog version %s with %s items", version, len(items))
+
+    @contextmanager
+    def _writing(self):
+        """Hold the lock and, with a catalog path, a write transaction over an up-to-date catalog.
+
+        Yields the connection the change must also be written to, or None
+        for an in-memory catalog.
+        """
+        with self._lock:
+            if not self.catalog_path:
+                yield None
+                return
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                self._sync()
+                yield db
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)",
+                           (str(self._version + 1),))
+                db.execute('COMMIT')
+                self._version += 1
+            except Exception:
+                db.execute('ROLLBACK')
+                # The in-memory index may be ahead of the file; reload it next time
+                self._version = None
+                raise
+
+    def _set_rows(self, items, terms, counts):
+        self.items = list(items)
+        self._terms = list(terms)
+        self._counts = counts
+        self._row_of = {item['id']: row for row, item in enumerate(self.items)}
+        self._invalidate()
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+def top_k_items(user_vectors: np.ndarray, item_vectors: np.ndarray, seen=None, k: int = 10) -> np.ndarray:
+    """Positions of each user's k highest-scoring items, best first.
+
+    ``seen`` is an optional CSR matrix (one row per user vector) of items
+    to leave out, such as those the user trained on.
+    """
+    scores = user_vectors @ item_vectors.T
+    if seen is not None:
+        rows = np.repeat(np.arange(seen.shape[0]), np.diff(seen.indptr))
+        scores[rows, seen.indices] = -np.inf
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+def ranking_metrics(recommended: np.ndarray, relevant, k: int = None) -> dict:
+    """Mean precision, recall and NDCG at k.
+
+    ``recommended`` holds one row of item positions per user, best first,
+    padded with -1; ``relevant`` is a CSR matrix whose row i marks user i's
+    held-out items. Users without relevant items are skipped.
+    """
+    k = k or recommended.shape[1]
+    recommended = recommended[:, :k]
+    counts = np.diff(relevant.indptr)
+    users = np.flatnonzero(counts)
+    if not len(users):
+        return {'precision_at_k': 0.0, 'recall_at_k': 0.0, 'ndcg_at_k': 0.0, 'users': 0}
+
+    n_items = relevant.shape[1]
+    relevant_keys = np.repeat(np.arange(relevant.shape[0], dtype=np.int64), counts) * n_items + relevant.indices
+    recommended_keys = np.arange(len(recommended), dtype=np.int64)[:, np.newaxis] * n_items + recommended
+    hits = np.isin(recommended_keys[users], relevant_keys) & (recommended[users] >= 0)
+
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    ideal = np.cumsum(discounts)[np.minimum(counts[users], k) - 1]
+    return {
+        'precision_at_k': float(np.mean(hits.sum(axis=1) / k)),
+        'recall_at_k': float(np.mean(hits.sum(axis=1) / counts[users])),
+        'ndcg_at_k': float(np.mean((hits * discounts).sum(axis=1) / ideal)),
+        'users': int(len(users))
+    }
+
+
+def split_holdout(matrix, fraction: float = 0.1, random_state: int = 42):
+    """(train, held-out) CSR matrices with a random share of each user's interactions held out.
+
+    Every user keeps at least one training interaction.
+    """
+    from scipy.sparse import csr_matrix
+
+    rng = np.random.default_rng(random_state)
+    held = rng.random(matrix.nnz) < fraction
+    counts = np.diff(matrix.indptr)
+    nonempty = np.flatnonzero(counts)
+    if len(nonempty):
+        held_per_user = np.add.reduceat(held.astype(np.int64), matrix.indptr[nonempty])
+        held[matrix.indptr[nonempty[held_per_user == counts[nonempty]]]] = False
+
+    rows = np.repeat(np.arange(matrix.shape[0]), counts)
+
+    def subset(mask):
+        return csr_matrix((matrix.data[mask], (rows[mask], matrix.indices[mask])), shape=matrix.shape)
+
+    return subset(~held), subset(held)
@@ -1,86 +1,226 @@
 import logging
 import numpy as np
-import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.decomposition import TruncatedSVD
 import pickle
 import os
+import time
+import tempfile
+import threading
 from datetime import datetime
+from config.ai_config import AI_CONFIG
+from models.item_catalog import ItemCatalog
+from models.recommendation_store import RecommendationStore
+from models.interaction_data import interactions_from_records, load_encoders, save_encoders
 
 logger = logging.getLogger(__name__)
 
+
+def _unit_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
 class RecommendationModel:
     def __init__(self):
         self.user_item_matrix = None
         self.item_features = None
         self.user_features = None
         self.svd_model = None
+        self.algorithm = 'svd'
+        self.als_parameters = None
+        self.model_version = None
         self.model_path = "models/"
+        self._item_vectors = None
+        self._item_position = None
+        self._user_unit = None
+        self._user_position = {}
+        self._user_index = None
+        self._user_of_key = None
+        self._encoders = None
+        # (store version, model file mtime) of the last reload attempt
+        self._reload_attempt = None
+        # One training at a time; requests keep the previous model until the new one is swapped in
+        self._training_lock = threading.Lock()
         
         # Create models directory if it doesn't exist
         os.makedirs(self.model_path, exist_ok=True)
+        self._encoders_path = f"{self.model_path}recommendation_ids.pkl"
+        
+        settings = AI_CONFIG['recommendations']
+        self.catalog = ItemCatalog(
+            settings['catalog_path'],
+            term_weights=settings['term_weights'],
+            popularity_weight=settings['popularity_weight']
+        )
+        # Top-N lists per user, computed after training and served directly
+        self.store = RecommendationStore(settings['store_path'])
+        self.top_n = settings['precomputed_top_n']
     
     def train(self, interactions, parameters=None):
         """Train recommendation model"""
+        users, items = self.encoders()
+        return self.train_arrays(interactions_from_records(interactions, users, items), parameters)
+    
+    def train_arrays(self, interactions, parameters=None):
+        """Train from typed interaction arrays (codes from this model's id encoders)"""
         try:
+            import pandas as pd
+            from scipy.sparse import csr_matrix
+
             if parameters is None:
                 parameters = {}
             
-            # Convert interactions to DataFrame
-            df = pd.DataFrame(interactions)
+            algorithm = parameters.get('algorithm') or AI_CONFIG['recommendations']['algorithm']
+            if algorithm not in ('svd', 'als'):
+                raise ValueError(f"Unsupported recommendation algorithm: {algorithm}")
             
-            # Create user-item matrix
-            self.user_item_matrix = df.pivot_table(
-                index='user_id',
-                columns='item_id',
-                values='rating',
-                fill_value=0
-            )
+            if not len(interactions.users):
+                raise ValueError("No interactions to train on")
             
-            # Apply SVD for dimensionality reduction
-            n_components = parameters.get('n_components', 50)
-            self.svd_model = TruncatedSVD(n_components=n_components, random_state=42)
-            
-            # Fit SVD model
-            user_factors = self.svd_model.fit_transform(self.user_item_matrix)
-            item_factors = self.svd_model.components_.T
-            
-            # Store factors
-            self.user_features = pd.DataFrame(
-                user_factors,
-                index=self.user_item_matrix.index
-            )
-            self.item_features = pd.DataFrame(
-                item_factors,
-                index=self.user_item_matrix.columns
-            )
+            with self._training_lock:
+                start = time.perf_counter()
+                
+                user_encoder, item_encoder = self.encoders()
+                
+                # Rows and columns for the users and items present in this data
+                user_codes, user_rows = np.unique(interactions.users, return_inverse=True)
+                item_codes, item_columns = np.unique(interactions.items, return_inverse=True)
+                shape = (len(user_codes), len(item_codes))
+                
+                # Create sparse user-item matrix; repeated interactions average
+                user_item_matrix = csr_matrix(
+                    (interactions.ratings.astype(np.float64), (user_rows, item_columns)), shape=shape)
+                counts = csr_matrix((np.ones(len(user_rows)), (user_rows, item_columns)), shape=shape)
+                user_item_matrix.sum_duplicates()
+                counts.sum_duplicates()
+                user_item_matrix.data /= counts.data
+                
+                user_ids = pd.Index(user_encoder.decode(user_codes))
+                item_ids = pd.Index(item_encoder.decode(item_codes))
+                
+                # Interaction counts rank catalog items for new users
+                if len(self.catalog):
+                    item_counts = np.bincount(item_columns, minlength=len(item_ids))
+                    self.catalog.set_popularity(dict(zip(item_ids, item_counts.tolist())))
+                
+                if algorithm == 'als':
+                    user_factors, item_factors, details, fitted = self._fit_als(user_item_matrix, parameters)
+                else:
+                    user_factors, item_factors, details, fitted = self._fit_svd(user_item_matrix, parameters)
+                
+                model_data = {
+                    'user_item_matrix': user_item_matrix,
+                    'user_features': pd.DataFrame(user_factors, index=user_ids),
+                    'item_features': pd.DataFrame(item_factors, index=item_ids),
+                    'svd_model': fitted['svd_model'],
+                    'algorithm': algorithm,
+                    'als_parameters': fitted['als_parameters'],
+                    'model_version': datetime.now().strftime('%Y%m%d%H%M%S%f')
+                }
+                
+                # Save model; other workers only ever see a complete file
+                model_filename = f"{self.model_path}recommendation_model.pkl"
+                with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(model_filename)),
+                                                 suffix='.tmp', delete=False) as f:
+                    # The version goes first so workers can check it without unpickling the model
+                    pickle.dump(model_data['model_version'], f)
+                    pickle.dump(model_data, f)
+                os.replace(f.name, model_filename)
+                save_encoders(self._encoders_path, user_encoder, item_encoder)
+                
+                self._install(model_data)
+                
+                training_seconds = time.perf_counter() - start
+                precomputed_users = self._precompute_recommendations()
             
-            # Save model
-            model_filename = f"{self.model_path}recommendation_model.pkl"
-            with open(model_filename, 'wb') as f:
-                pickle.dump({
-                    'user_item_matrix': self.user_item_matrix,
-                    'user_features': self.user_features,
-                    'item_features': self.item_features,
-                    'svd_model': self.svd_model
-                }, f)
+            logger.info("Recommendation model (%s) trained in %.2fs", algorithm, training_seconds)
             
-            # Calculate some metrics
-            explained_variance = np.sum(self.svd_model.explained_variance_ratio_)
+            return {
+                'model_path': model_filename,
+                'algorithm': algorithm,
+                'n_users': shape[0],
+                'n_items': shape[1],
+                'n_interactions': len(interactions.users),
+                **details,
+                'training_seconds': round(training_seconds, 3),
+                'model_version': model_data['model_version'],
+                'precomputed_users': precomputed_users
+            }
             
-            logger.info(f"Recommendation model trained with {explained_variance:.3f} explained variance")
+        except Exception as e:
+            logger.error("Recommendation model training failed: %s", e)
+            raise
+    
+    def _fit_svd(self, user_item_matrix, parameters):
+        """Truncated SVD of the rating matrix: (user factors, item factors, report, fitted state)"""
+        from sklearn.decomposition import TruncatedSVD
+        
+        # Apply SVD for dimensionality reduction
+        n_components = parameters.get('n_components', 50)
+        svd_model = TruncatedSVD(n_components=n_components, random_state=42)
+        
+        # Fit SVD model
+        user_factors = svd_model.fit_transform(user_item_matrix)
+        item_factors = svd_model.components_.T
+        
+        return user_factors, item_factors, {
+            'explained_variance': float(np.sum(svd_model.explained_variance_ratio_)),
+            'n_components': n_components
+        }, {'svd_model': svd_model, 'als_parameters': None}
+    
+    def _fit_als(self, user_item_matrix, parameters):
+        """Implicit-feedback ALS: (user factors, item factors, report with ranking metrics, fitted state)"""
+        from models.implicit_als import ImplicitALS
+        from models.ranking_metrics import split_holdout
+        from utils.parallelism import current_plan
+        
+        settings = {**AI_CONFIG['recommendations']['als'],
+                    **{key: value for key, value in parameters.items() if key in AI_CONFIG['recommendations']['als']}}
+        threads = int(settings['threads']) or current_plan()['intra_op_threads']
+        
+        als = ImplicitALS(factors=int(settings['factors']), regularization=float(settings['regularization']),
+                          alpha=float(settings['alpha']), iterations=int(settings['iterations']),
+                          cg_steps=int(settings['cg_steps']), threads=threads)
+        
+        # Hold out part of each user's interactions to pick the stopping point
+        train, validation = user_item_matrix, None
+        if float(settings['validation_fraction']) > 0:
+            train, validation = split_holdout(user_item_matrix, float(settings['validation_fraction']))
+        report = als.fit(train, validation, k=int(settings['k']), patience=int(settings['patience']),
+                         eval_users=int(settings['eval_users']))
+        
+        metrics = dict(report['metrics'])
+        return als.user_factors, als.item_factors, {
+            'n_components': als.factors,
+            'threads': threads,
+            'iterations': report['iterations'],
+            'best_iteration': report['best_iteration'],
+            'solver_seconds': report['training_seconds'],
+            'k': int(settings['k']),
+            'evaluated_users': metrics.pop('users', 0),
+            **metrics,
+            'history': report['history']
+        }, {'svd_model': None, 'als_parameters': {'regularization': als.regularization, 'alpha': als.alpha}}
+    
+    def encoders(self):
+        """Persistent (user, item) id encoders shared by every training run"""
+        if self._encoders is None:
+            self._encoders = load_encoders(self._encoders_path)
+        return self._encoders
+    
+    def index_items(self, items=None, removed=None):
+        """Add, replace or remove catalog items used for content-based recommendations"""
+        try:
+            removed_count = self.catalog.remove(removed) if removed else 0
+            indexed_count = self.catalog.add(items) if items else 0
             
             return {
-                'model_path': model_filename,
-                'n_users': len(self.user_item_matrix.index),
-                'n_items': len(self.user_item_matrix.columns),
-                'n_interactions': len(interactions),
-                'explained_variance': explained_variance,
-                'n_components': n_components
+                'indexed': indexed_count,
+                'removed': removed_count,
+                'total': len(self.catalog)
             }
             
         except Exception as e:
-            logger.error(f"Recommendation model training failed: {str(e)}")
+            logger.error("Item catalog update failed: %s", e)
             raise
     
     def get_recommendations(self, user_id, preferences=None, limit=10):
@@ -89,14 +229,13 @@ class RecommendationModel:
             if preferences is None:
                 preferences = {}
             
-            # Load model if not in memory
-            if self.user_features is None:
-                self._load_model()
+            store_version = self._refresh_model()
             
-            # Check if user exists in training data
-            if user_id in self.user_features.index:
+            # Check if user exists in training data (without a trained model every user is new)
+            if self.user_features is not None and str(user_id) in self._user_position:
                 # Existing user - use collaborative filtering
-                recommendations = self._get_collaborative_recommendations(user_id, limit)
+                use_store = self.model_version is not None and store_version == self.model_version
+                recommendations = self._get_collaborative_recommendations(user_id, limit, use_store)
             else:
                 # New user - use content-based or popular items
                 recommendations = self._get_content_based_recommendations(preferences, limit)
@@ -104,38 +243,26 @@ class RecommendationModel:
             return recommendations
             
         except Exception as e:
-            logger.error(f"Getting recommendations failed: {str(e)}")
+            logger.error("Getting recommendations failed: %s", e)
             # Return fallback recommendations
             return self._get_fallback_recommendations(limit)
     
-    def _get_collaborative_recommendations(self, user_id, limit):
+    def _get_collaborative_recommendations(self, user_id, limit, use_store=False):
         """Get collaborative filtering recommendations"""
         try:
-            # Get user vector
-            user_vector = self.user_features.loc[user_id].values.reshape(1, -1)
-            
-            # Calculate similarity with all items
-            item_similarities = cosine_similarity(user_vector, self.item_features.values)[0]
-            
-            # Get items user hasn't interacted with
-            user_items = self.user_item_matrix.loc[user_id]
-            unrated_items = user_items[user_items == 0].index
-            
-            # Get similarities for unrated items
-            unrated_similarities = []
-            for item_id in unrated_items:
-                if item_id in self.item_features.index:
-                    item_idx = self.item_features.index.get_loc(item_id)
-                    similarity = item_similarities[item_idx]
-                    unrated_similarities.append((item_id, similarity))
-            
-            # Sort by similarity and get top recommendations
-            unrated_similarities.sort(key=lambda x: x[1], reverse=True)
-            top_recommendations = unrated_similarities[:limit]
+            # Serve the precomputed list when it covers the request
+            stored = self.store.get(user_id) if use_store and limit <= self.top_n else None
+            if stored is None:
+                positions, scores = self._rank_items(user_id, max(limit, self.top_n))
+                if use_store:
+                    self.store.put(user_id, positions[:self.top_n], scores[:self.top_n], self.model_version)
+            else:
+                positions, scores = stored
             
             # Format recommendations
             recommendations = []
-            for i, (item_id, score) in enumerate(top_recommendations):
+            for i, (position, score) in enumerate(zip(positions[:limit], scores[:limit])):
+                item_id = self.item_features.index[position]
                 recommendations.append({
                     'id': i + 1,
                     'item_id': item_id,
@@ -150,11 +277,139 @@ class RecommendationModel:
             return recommendations
             
         except Exception as e:
-            logger.error(f"Collaborative filtering failed: {str(e)}")
+            logger.error("Collaborative filtering failed: %s", e)
             return self._get_fallback_recommendations(limit)
     
+    def _rank_items(self, user_id, limit):
+        """(item positions, scores) of the user's best unrated items, folding in newer interactions"""
+        row = self._user_position[str(user_id)]
+        ratings = self.user_item_matrix[row].toarray().ravel()
+        user_vector = self.user_features.values[row]
+        
+        newer = self.store.interactions(user_id)
+        if newer:
+            for item_id, rating in newer.items():
+                position = self._item_position.get(item_id)
+                if position is not None:
+                    ratings[position] = rating
+            user_vector = self._fold_in(ratings)
+        
+        return self._top_items(user_vector[np.newaxis], ratings[np.newaxis] != 0, limit)[0]
+    
+    def _fold_in(self, ratings):
+        """User factors for an updated rating row, without retraining"""
+        if self.algorithm == 'als':
+            from models.implicit_als import fold_in
+            return fold_in(ratings, self.item_features.values, **self.als_parameters)
+        # SVD fold-in: project the updated ratings onto the item factors
+        return ratings @ self.svd_model.components_.T
+    
+    def _top_items(self, user_vectors, rated, limit):
+        """Best unrated items per user as (positions, scores) best first.
+
+        SVD factors are compared by cosine similarity; ALS factors are
+        trained so that their dot product predicts preference.
+        """
+        if self.algorithm != 'als':
+            user_vectors = _unit_rows(user_vectors)
+        scores = user_vectors @ self._item_vectors.T
+        scores[rated] = -np.inf
+        
+        k = min(limit, scores.shape[1])
+        if k <= 0:
+            return [(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))] * len(scores)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        ranked = []
+        for positions, values in zip(top, top_scores):
+            keep = np.isfinite(values)
+            ranked.append((positions[keep].astype(np.int32), values[keep].astype(np.float32)))
+        return ranked
+    
+    def rank_users(self, user_ids, limit=10, block_size=1024):
+        """Item positions of each known user's best unrated items, one row per user padded with -1"""
+        if self.user_features is None:
+            self._load_model()
+        
+        rows = np.array([self._user_position[str(user_id)] for user_id in user_ids], dtype=np.int64)
+        ranked = np.full((len(rows), limit), -1, dtype=np.int32)
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            lists = self._top_items(self.user_features.values[block], self.user_item_matrix[block].toarray() != 0, limit)
+            for offset, (positions, _) in enumerate(lists):
+                ranked[start + offset, :len(positions)] = positions
+        return ranked
+    
+    def _precompute_recommendations(self, block_size=1024):
+        """Materialize every user's top-N list for the current model version"""
+        user_ids = self.user_features.index
+        user_factors = self.user_features.values
+        ratings = self.user_item_matrix
+        
+        def lists():
+            for start in range(0, len(user_ids), block_size):
+                stop = start + block_size
+                ranked = self._top_items(user_factors[start:stop], ratings[start:stop].toarray() != 0, self.top_n)
+                for user_id, (positions, scores) in zip(user_ids[start:stop], ranked):
+                    yield user_id, positions, scores
+        
+        self.store.replace(self.model_version, lists())
+        logger.info("Precomputed recommendations for %s users", len(user_ids))
+        return len(user_ids)
+    
+    def _install(self, model_data):
+        """Swap in a trained or loaded model together with its lookups, all computed beforehand"""
+        user_features, item_features = model_data['user_features'], model_data['item_features']
+        algorithm = model_data.get('algorithm', 'svd')
+        # Unit-length factors make cosine similarity a plain dot product
+        item_factors = item_features.values
+        item_vectors = item_factors if algorithm == 'als' else _unit_rows(item_factors)
+        item_position = {str(item_id): position for position, item_id in enumerate(item_features.index)}
+        user_unit = _unit_rows(user_features.values)
+        user_position = {str(user_id): position for position, user_id in enumerate(user_features.index)}
+        
+        (self.user_item_matrix, self.user_features, self.item_features, self.svd_model, self.algorithm,
+         self.als_parameters, self.model_version, self._item_vectors, self._item_position, self._user_unit,
+         self._user_position, self._user_index) = (
+            model_data['user_item_matrix'], user_features, item_features, model_data['svd_model'], algorithm,
+            model_data.get('als_parameters'), model_data.get('model_version'), item_vectors, item_position,
+            user_unit, user_position, None)
+    
+    def record_interactions(self, interactions):
+        """Note interactions newer than the model so affected users' lists are recomputed"""
+        try:
+            users = self.store.add_interactions(interactions)
+            
+            return {
+                'recorded': len(interactions),
+                'invalidated_users': len(users)
+            }
+            
+        except Exception as e:
+            logger.error("Recording interactions failed: %s", e)
+            raise
+    
     def _get_content_based_recommendations(self, preferences, limit):
         """Get content-based recommendations for new users"""
+        if len(self.catalog):
+            try:
+                return self._get_catalog_recommendations(preferences, limit)
+            except Exception as e:
+                logger.error("Catalog recommendations failed: %s", e)
+        
+        try:
+            # Otherwise use real posts from the semantic index when one has been built
+            from services.semantic_search import get_semantic_search
+            recommendations = get_semantic_search().recommend(preferences, limit)
+            if recommendations:
+                return recommendations
+        except Exception as e:
+            logger.warning("Semantic recommendations unavailable: %s", e)
+        
         try:
             # Generate recommendations based on preferences
             recommendations = []
@@ -181,9 +436,31 @@ class RecommendationModel:
             return recommendations
             
         except Exception as e:
-            logger.error(f"Content-based recommendations failed: {str(e)}")
+            logger.error("Content-based recommendations failed: %s", e)
             return self._get_fallback_recommendations(limit)
     
+    def _get_catalog_recommendations(self, preferences, limit):
+        """Rank catalog items by matching categories, tags and keywords, then popularity"""
+        seen = preferences.get('liked_items') or preferences.get('item_ids') or []
+        matches = self.catalog.recommend(preferences, limit, exclude=seen)
+        
+        recommendations = []
+        for i, match in enumerate(matches):
+            item = match['item']
+            recommendations.append({
+                'id': i + 1,
+                'item_id': item['id'],
+                'title': item.get('title', f"Item {item['id']}"),
+                'description': item.get('description', ''),
+                'score': match['score'],
+                'category': item.get('category', 'general'),
+                'tags': item.get('tags', []),
+                'reasoning': f"Matches your interests: {', '.join(match['matched'])}" if match['matched']
+                             else 'Popular item across all users'
+            })
+        
+        return recommendations
+    
     def _get_fallback_recommendations(self, limit):
         """Get fallback recommendations when other methods fail"""
         recommendations = []
@@ -206,59 +483,117 @@ class RecommendationModel:
         
         return recommendations
     
-    def _load_model(self):
-        """Load trained recommendation model"""
+    def _refresh_model(self):
+        """Load the model if none is in memory, or reload another worker's retrained one; returns the store's version"""
+        store_version = self.store.version
+        if self.user_features is not None and store_version in (None, self.model_version):
+            return store_version
+        
+        # The model file is written before the store moves to its version (and
+        # stays ahead of it if precomputing fails), so only reload a file that
+        # matches the store, and check each store version and file just once
+        model_filename = f"{self.model_path}recommendation_model.pkl"
+        attempt = (store_version, os.path.getmtime(model_filename) if os.path.exists(model_filename) else None)
+        if attempt != self._reload_attempt:
+            self._reload_attempt = attempt
+            self._load_model(store_version if self.user_features is not None else None)
+        return store_version
+    
+    def _load_model(self, expected_version=None):
+        """Load trained recommendation model, unless expected_version is given and the saved model has another"""
         try:
             model_filename = f"{self.model_path}recommendation_model.pkl"
             
             if os.path.exists(model_filename):
                 with open(model_filename, 'rb') as f:
                     model_data = pickle.load(f)
-                    self.user_item_matrix = model_data['user_item_matrix']
-                    self.user_features = model_data['user_features']
-                    self.item_features = model_data['item_features']
-                    self.svd_model = model_data['svd_model']
+                    if not isinstance(model_data, dict):
+                        if expected_version is not None and model_data != expected_version:
+                            logger.debug("Saved recommendation model %s is not the live version %s",
+                                         model_data, expected_version)
+                            return
+                        model_data = pickle.load(f)
+                if hasattr(model_data['user_item_matrix'], 'columns'):
+                    # Saved as a dense pivot table by older versions
+                    from scipy.sparse import csr_matrix
+                    model_data['user_item_matrix'] = csr_matrix(model_data['user_item_matrix'].values)
+                self._install(model_data)
+                self._encoders = None
                 
                 logger.info("Recommendation model loaded successfully")
             else:
                 logger.warning("No trained recommendation model found")
                 
         except Exception as e:
-            logger.error(f"Model loading failed: {str(e)}")
+            logger.error("Model loading failed: %s", e)
     
     def get_similar_users(self, user_id, limit=10):
         """Get users similar to the given user"""
+        return self.get_similar_users_batch([user_id], limit).get(user_id, [])
+    
+    def get_similar_users_batch(self, user_ids, limit=10, block_size=1024):
+        """Most similar users for each of several users, by cosine of their factors"""
         try:
-            if self.user_features is None:
-                self._load_model()
-            
-            if user_id not in self.user_features.index:
-                return []
-            
-            # Get user vector
-            user_vector = self.user_features.loc[user_id].values.reshape(1, -1)
-            
-            # Calculate similarity with all users
-            user_similarities = cosine_similarity(user_vector, self.user_features.values)[0]
-            
-            # Get similar users (excluding the user itself)
-            similar_users = []
-            for i, similarity in enumerate(user_similarities):
-                other_user_id = self.user_features.index[i]
-                if other_user_id != user_id:
-                    similar_users.append((other_user_id, similarity))
+            self._refresh_model()
             
-            # Sort by similarity and return top users
-            similar_users.sort(key=lambda x: x[1], reverse=True)
+            if self.user_features is None:
+                return {user_id: [] for user_id in user_ids}
+            
+            similar = {user_id: [] for user_id in user_ids}
+            known = [user_id for user_id in similar if str(user_id) in self._user_position]
+            
+            if self._user_ann_index() is not None:
+                for user_id in known:
+                    matches = self._user_index.search(self._user_unit[self._user_position[str(user_id)]],
+                                                      limit, exclude={str(user_id)})
+                    similar[user_id] = [
+                        {'user_id': self._user_of_key[match['id']], 'similarity': match['score']}
+                        for match in matches
+                    ]
+                return similar
+            
+            user_index = self.user_features.index
+            k = min(limit, len(user_index) - 1)
+            if k <= 0:
+                return similar
+            
+            for start in range(0, len(known), block_size):
+                block = known[start:start + block_size]
+                rows = np.array([self._user_position[str(user_id)] for user_id in block])
+                # One matrix product per block; each user excluded by index
+                scores = self._user_unit[rows] @ self._user_unit.T
+                scores[np.arange(len(rows)), rows] = -np.inf
+                
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(scores, top, axis=1)
+                order = np.argsort(-top_scores, axis=1, kind='stable')
+                top = np.take_along_axis(top, order, axis=1)
+                top_scores = np.take_along_axis(top_scores, order, axis=1)
+                
+                for user_id, positions, values in zip(block, top, top_scores):
+                    similar[user_id] = [
+                        {'user_id': user_index[position], 'similarity': float(value)}
+                        for position, value in zip(positions, values)
+                    ]
             
-            return [
-                {
-                    'user_id': uid,
-                    'similarity': float(sim)
-                }
-                for uid, sim in similar_users[:limit]
-            ]
+            return similar
             
         except Exception as e:
-            logger.error(f"Getting similar users failed: {str(e)}")
-            return []
\ No newline at end of file
+            logger.error("Getting similar users failed: %s", e)
+            return {user_id: [] for user_id in user_ids}
+    
+    def _user_ann_index(self):
+        """Approximate index over user factors, built on first use for large user bases"""
+        settings = AI_CONFIG['recommendations']
+        if not settings['similar_users_ann'] or len(self._user_unit) < settings['similar_users_ann_threshold']:
+            return None
+        if self._user_index is None:
+            from models.vector_index import VectorIndex
+            
+            index = VectorIndex(ivf_threshold=settings['similar_users_ann_threshold'],
+                                nprobe=settings['similar_users_nprobe'])
+            keys = [str(user_id) for user_id in self.user_features.index]
+            index.add(keys, self._user_unit.astype(np.float32))
+            self._user_of_key = dict(zip(keys, self.user_features.index))
+            self._user_index = index
+        return self._user_index
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from models.interaction_data import parse_rating
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS lists (user_id TEXT PRIMARY KEY, items BLOB NOT NULL, scores BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS interactions (user_id TEXT NOT NULL, item_id TEXT NOT NULL, rating REAL NOT NULL,
+                                         PRIMARY KEY (user_id, item_id));
+"""
+
+
+class RecommendationStore:
+    """Precomputed top-N recommendation lists on disk, one row per user.
+
+    Each list is stored as packed int32 item positions (into the trained
+    model's item index) and float32 scores, about 8 bytes per item. The
+    store records the model version its lists were computed with; lists
+    are only served while it matches the loaded model. Interactions that
+    arrive after training are kept here so any worker can fold them into
+    the user's next list, and they drop that user's stored list.
+
+    SQLite in WAL mode lets every worker process read while one writes.
+    """
+
+    def __init__(self, store_path: str):
+        self.store_path = store_path
+        directory = os.path.dirname(store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.store_path, check_same_thread=False, timeout=30)
+            with connection:
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _version(self, db) -> Optional[str]:
+        row = db.execute("SELECT value FROM meta WHERE key = 'model_version'").fetchone()
+        return row[0] if row else None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Model version the stored lists were computed with"""
+        with self._lock:
+            return self._version(self._db())
+
+    def replace(self, version: str, lists: Iterable[Tuple[str, np.ndarray, np.ndarray]]):
+        """Swap in every user's list for a new model version in one transaction"""
+        with self._lock, self._db() as db:
+            db.execute('DELETE FROM lists')
+            db.execute('DELETE FROM interactions')
+            db.executemany(
+                'INSERT INTO lists (user_id, items, scores) VALUES (?, ?, ?)',
+                ((str(user_id), _pack(items, np.int32), _pack(scores, np.float32))
+                 for user_id, items, scores in lists)
+            )
+            db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_version', ?)", (version,))
+
+    def get(self, user_id) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(item positions, scores) best first, or None if the user has no list"""
+        with self._lock:
+            row = self._db().execute('SELECT items, scores FROM lists WHERE user_id = ?',
+                                     (str(user_id),)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.int32), np.frombuffer(row[1], dtype=np.float32)
+
+    def put(self, user_id, items: np.ndarray, scores: np.ndarray, version: str) -> bool:
+        """Store one user's list, unless the store has moved to another model version"""
+        with self._lock, self._db() as db:
+            if self._version(db) != version:
+                return False
+            db.execute('INSERT OR REPLACE INTO lists (user_id, items, scores) VALUES (?, ?, ?)',
+                       (str(user_id), _pack(items, np.int32), _pack(scores, np.float32)))
+            return True
+
+    def add_interactions(self, interactions: List[dict]) -> List[str]:
+        """Record new interactions and drop the affected users' lists; returns those users"""
+        rows = [(str(interaction['user_id']), str(interaction['item_id']), parse_rating(interaction.get('rating')))
+                for interaction in interactions]
+        users = sorted({user_id for user_id, _, _ in rows})
+        with self._lock, self._db() as db:
+            db.executemany('INSERT OR REPLACE INTO interactions (user_id, item_id, rating) VALUES (?, ?, ?)', rows)
+            db.executemany('DELETE FROM lists WHERE user_id = ?', ((user_id,) for user_id in users))
+        return users
+
+    def interactions(self, user_id) -> Dict[str, float]:
+        """Ratings the user has given since the model was trained"""
+        with self._lock:
+            rows = self._db().execute('SELECT item_id, rating FROM interactions WHERE user_id = ?',
+                                      (str(user_id),)).fetchall()
+        return dict(rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._db().execute('SELECT COUNT(*) FROM lists').fetchone()[0]
+
+
+def _pack(values, dtype) -> bytes:
+    return np.ascontiguousarray(values, dtype=dtype).tobytes()
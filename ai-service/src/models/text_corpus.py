@@ -0,0 +1,40 @@
+import io
+import logging
+from typing import Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('ndjson', 'csv')
+
+
+def read_labeled_texts(source, data_format: str, label_field: str = 'label',
+                       chunk_rows: int = 10000) -> Iterator[Tuple[List[str], List[str]]]:
+    """Yield (texts, labels) chunk by chunk from an NDJSON or CSV file.
+
+    Rows need a ``text`` field and ``label_field``; rows missing either are
+    skipped. Labels are read as strings so every chunk agrees on their
+    type. Only one chunk of rows is held at a time.
+    """
+    import pandas as pd
+
+    if data_format not in FORMATS:
+        raise ValueError(f"Unsupported training data format: {data_format}")
+    if not isinstance(source, str):
+        source = io.TextIOWrapper(source, encoding='utf-8', newline='')
+
+    dtype = {'text': str, label_field: str}
+    if data_format == 'csv':
+        chunks = pd.read_csv(source, chunksize=chunk_rows, dtype=dtype,
+                             usecols=lambda column: column in ('text', label_field))
+    else:
+        chunks = pd.read_json(source, lines=True, chunksize=chunk_rows, dtype=dtype)
+
+    rows = 0
+    for chunk in chunks:
+        missing = {'text', label_field} - set(chunk.columns)
+        if missing:
+            raise ValueError(f"Training data is missing fields: {', '.join(sorted(missing))}")
+        chunk = chunk.dropna(subset=['text', label_field])
+        rows += len(chunk)
+        logger.debug("Read %s training texts", rows)
+        yield chunk['text'].astype(str).tolist(), chunk[label_field].astype(str).tolist()
@@ -1,18 +1,25 @@
 import logging
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
 import pickle
 import os
+import time
+import hashlib
+import tempfile
+from collections import deque
+from config.ai_config import AI_CONFIG
 
 logger = logging.getLogger(__name__)
 
+
+def _vectorize(vectorizer, texts):
+    # Runs in the vectorizer processes; hashing needs no fitted state
+    return vectorizer.transform(texts)
+
+
 class TextModel:
     def __init__(self):
-        self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+        # Created on first training so importing this module stays cheap
+        self.vectorizer = None
         self.classifier = None
         self.sentiment_analyzer = None
         self.model_path = "models/"
@@ -23,37 +30,54 @@ class TextModel:
     def train_classifier(self, texts, labels, parameters=None):
         """Train text classification model"""
         try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.naive_bayes import MultinomialNB
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.model_selection import train_test_split
+            from sklearn.metrics import accuracy_score
+
             if parameters is None:
                 parameters = {}
             
-            # Vectorize texts
-            X = self.vectorizer.fit_transform(texts)
-            y = np.array(labels)
-            
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
-            
-            # Choose classifier based on parameters
-            classifier_type = parameters.get('classifier', 'naive_bayes')
-            
-            if classifier_type == 'logistic_regression':
-                self.classifier = LogisticRegression(
-                    max_iter=parameters.get('max_iter', 1000),
-                    random_state=42
-                )
+            search = None
+            if parameters.get('search'):
+                # Cross-validated search; the best candidate is refit on every text
+                self.vectorizer, self.classifier, feature_count, search = self._search(
+                    texts, labels, parameters['search'])
+                accuracy = search['best']['mean_accuracy']
             else:
-                self.classifier = MultinomialNB(
-                    alpha=parameters.get('alpha', 1.0)
+                if self.vectorizer is None:
+                    self.vectorizer = TfidfVectorizer(max_features=5000, stop_words='english')
+                
+                # Vectorize texts
+                X = self.vectorizer.fit_transform(texts)
+                y = np.array(labels)
+                
+                # Split data
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=0.2, random_state=42, stratify=y
                 )
-            
-            # Train the model
-            self.classifier.fit(X_train, y_train)
-            
-            # Evaluate
-            y_pred = self.classifier.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
+                
+                # Choose classifier based on parameters
+                classifier_type = parameters.get('classifier', 'naive_bayes')
+                
+                if classifier_type == 'logistic_regression':
+                    self.classifier = LogisticRegression(
+                        max_iter=parameters.get('max_iter', 1000),
+                        random_state=42
+                    )
+                else:
+                    self.classifier = MultinomialNB(
+                        alpha=parameters.get('alpha', 1.0)
+                    )
+                
+                # Train the model
+                self.classifier.fit(X_train, y_train)
+                
+                # Evaluate
+                y_pred = self.classifier.predict(X_test)
+                accuracy = accuracy_score(y_test, y_pred)
+                feature_count = X.shape[1]
             
             # Save model
             model_filename = f"{self.model_path}text_classifier.pkl"
@@ -63,53 +87,249 @@ class TextModel:
                     'classifier': self.classifier
                 }, f)
             
-            logger.info(f"Text classifier trained with accuracy: {accuracy:.3f}")
+            logger.info("Text classifier trained with accuracy: %.3f", accuracy)
             
-            return {
+            result = {
                 'accuracy': accuracy,
                 'model_path': model_filename,
-                'feature_count': X.shape[1],
+                'feature_count': feature_count,
                 'training_samples': len(texts)
             }
+            if search is not None:
+                result['search'] = search
+            return result
             
         except Exception as e:
-            logger.error(f"Text classifier training failed: {str(e)}")
+            logger.error("Text classifier training failed: %s", e)
             raise
     
-    def train_sentiment_analyzer(self, texts, sentiments, parameters=None):
-        """Train sentiment analysis model"""
+    def _search(self, texts, labels, search_options):
+        """(vectorizer, classifier, feature count, search report) for the best cross-validated candidate"""
+        from models.text_search import search, build_vectorizer, build_classifier
+        
+        options = dict(AI_CONFIG['text_training']['search'])
+        if isinstance(search_options, dict):
+            # The candidate limit, folds and process count bound the work a request can start
+            options.update({key: value for key, value in search_options.items()
+                            if key not in ('max_candidates', 'folds', 'processes')})
+        processes = min(int(options['processes']) or _cpu_cores(), _cpu_cores())
+        
+        report = search(texts, labels, options, processes)
+        best = report['best']['params']
+        vectorizer = build_vectorizer(best)
+        X = vectorizer.fit_transform(texts)
+        classifier = build_classifier(best).fit(X, np.array(labels))
+        return vectorizer, classifier, X.shape[1], report
+    
+    def train_classifier_stream(self, path, data_format, parameters=None):
+        """Train the text classifier out of core from an NDJSON or CSV file.
+
+        Texts are hashed into a fixed-size feature space, so no vocabulary
+        has to fit in memory, and chunks of rows are vectorized in worker
+        processes while the classifier learns from earlier chunks with
+        partial_fit. Each epoch streams the file again and ends with a
+        checkpoint; with ``resume`` a later call continues from it.
+        """
         try:
+            from sklearn.feature_extraction.text import HashingVectorizer
+            from sklearn.linear_model import SGDClassifier
+            from sklearn.naive_bayes import MultinomialNB
+            from models.text_corpus import read_labeled_texts
+
             if parameters is None:
                 parameters = {}
             
-            # Create separate vectorizer for sentiment
-            sentiment_vectorizer = TfidfVectorizer(
-                max_features=parameters.get('max_features', 3000),
-                stop_words='english',
-                ngram_range=(1, 2)  # Include bigrams for better sentiment detection
-            )
-            
-            # Vectorize texts
-            X = sentiment_vectorizer.fit_transform(texts)
-            y = np.array(sentiments)
+            config = AI_CONFIG['text_training']
+            # The process count is a server-side setting, never a request's
+            settings = {**config['out_of_core'],
+                        **{key: value for key, value in parameters.items()
+                           if key in config['out_of_core'] and key != 'processes'}}
+            if settings['classifier'] not in ('sgd', 'naive_bayes'):
+                raise ValueError(f"Unsupported out-of-core classifier: {settings['classifier']}")
+            # Requests may lower the sizes but never raise them past the server's limits
+            settings['n_features'] = _bounded(settings['n_features'], config['max_n_features'])
+            settings['epochs'] = _bounded(settings['epochs'], config['max_epochs'])
+            settings['max_validation_rows'] = _bounded(settings['max_validation_rows'],
+                                                       config['out_of_core']['max_validation_rows'])
+            label_field = parameters.get('label_field', 'label')
+            chunk_rows = _bounded(parameters.get('chunk_rows', config['chunk_rows']), config['max_chunk_rows'])
+            epochs = settings['epochs']
+            checkpoint_path = _checkpoint_path(config['checkpoint_path'], path, settings, label_field)
+            start = time.perf_counter()
+            
+            checkpoint = self._load_checkpoint(checkpoint_path, settings) if parameters.get('resume') else None
+            if checkpoint is not None:
+                vectorizer, classifier, classes = checkpoint['vectorizer'], checkpoint['classifier'], checkpoint['classes']
+                history = checkpoint['history']
+                logger.info("Resuming text classifier training after epoch %s", len(history))
+            else:
+                # Non-negative features keep the hashed counts valid for naive Bayes
+                vectorizer = HashingVectorizer(n_features=int(settings['n_features']), stop_words='english',
+                                               ngram_range=tuple(settings['ngram_range']), alternate_sign=False)
+                if settings['classifier'] == 'naive_bayes':
+                    classifier = MultinomialNB(alpha=float(settings['alpha'] or 1.0))
+                else:
+                    # Logistic loss so predict_proba is available
+                    classifier = SGDClassifier(loss='log_loss', alpha=float(settings['alpha'] or 1e-5),
+                                               random_state=42)
+                # partial_fit needs every class up front: one pass over the labels
+                classes = sorted({label for _, labels in read_labeled_texts(path, data_format, label_field, chunk_rows)
+                                  for label in labels})
+                history = []
+            
+            if len(classes) < 2:
+                raise ValueError("Training data needs at least two labels")
+            
+            processes = min(int(settings['processes']) or _cpu_cores(), _cpu_cores())
+            pool = None
+            if processes > 1:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # Spawned, not forked: forking a process that runs BLAS or
+                # torch threads can deadlock the children
+                pool = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'))
+            
+            try:
+                validation = None
+                for epoch in range(len(history) + 1, epochs + 1):
+                    epoch_start = time.perf_counter()
+                    rng = np.random.default_rng(epoch)
+                    held_out, held_rows, rows = [], 0, 0
+                    
+                    chunks = read_labeled_texts(path, data_format, label_field, chunk_rows)
+                    for index, (X, labels) in enumerate(_vectorized_chunks(chunks, vectorizer, pool, processes)):
+                        y = np.asarray(labels)
+                        # The same rows are held out every epoch, up to a cap
+                        held = np.random.default_rng(index).random(len(y)) < float(settings['validation_fraction'])
+                        held &= np.cumsum(held) <= int(settings['max_validation_rows']) - held_rows
+                        held_rows += int(held.sum())
+                        if validation is None and held.any():
+                            held_out.append((X[held], y[held]))
+                        order = rng.permutation(np.flatnonzero(~held))
+                        if len(order):
+                            classifier.partial_fit(X[order], y[order], classes=classes)
+                        rows += len(order)
+                    
+                    if validation is None and held_out:
+                        from scipy.sparse import vstack
+                        validation = (vstack([X for X, _ in held_out]), np.concatenate([y for _, y in held_out]))
+                    
+                    accuracy = float(np.mean(classifier.predict(validation[0]) == validation[1])) \
+                        if validation is not None else None
+                    history.append({
+                        'epoch': epoch,
+                        'training_rows': rows,
+                        'validation_accuracy': accuracy,
+                        'seconds': round(time.perf_counter() - epoch_start, 3)
+                    })
+                    logger.info("Text classifier epoch %s: %s", epoch, history[-1])
+                    self._save_checkpoint(checkpoint_path, {
+                        'vectorizer': vectorizer, 'classifier': classifier, 'classes': classes,
+                        'history': history, 'settings': settings
+                    })
+            finally:
+                if pool is not None:
+                    pool.shutdown()
+            
+            self.vectorizer = vectorizer
+            self.classifier = classifier
+            
+            # Save model in the same layout as train_classifier
+            model_filename = f"{self.model_path}text_classifier.pkl"
+            with open(model_filename, 'wb') as f:
+                pickle.dump({
+                    'vectorizer': self.vectorizer,
+                    'classifier': self.classifier
+                }, f)
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
             
-            # Split data
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
-            )
+            accuracy = history[-1]['validation_accuracy'] if history else None
+            logger.info("Text classifier trained out of core, accuracy: %s", accuracy)
             
-            # Use Logistic Regression for sentiment analysis
-            self.sentiment_analyzer = LogisticRegression(
-                max_iter=parameters.get('max_iter', 1000),
-                random_state=42
-            )
+            return {
+                'accuracy': accuracy,
+                'model_path': model_filename,
+                'feature_count': int(settings['n_features']),
+                'training_samples': history[-1]['training_rows'] if history else 0,
+                'validation_samples': 0 if validation is None else len(validation[1]),
+                'classes': classes,
+                'classifier': settings['classifier'],
+                'processes': processes,
+                'training_seconds': round(time.perf_counter() - start, 3),
+                'history': history
+            }
             
-            # Train the model
-            self.sentiment_analyzer.fit(X_train, y_train)
+        except Exception as e:
+            logger.error("Out-of-core text classifier training failed: %s", e)
+            raise
+    
+    def _load_checkpoint(self, checkpoint_path, settings):
+        """The last epoch's checkpoint, if it was trained with the same model settings"""
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, 'rb') as f:
+            checkpoint = pickle.load(f)
+        model_keys = ('classifier', 'n_features', 'ngram_range', 'alpha')
+        if any(checkpoint['settings'].get(key) != settings.get(key) for key in model_keys):
+            logger.warning("Ignoring text classifier checkpoint trained with different settings")
+            return None
+        return checkpoint
+    
+    def _save_checkpoint(self, checkpoint_path, checkpoint):
+        directory = os.path.dirname(os.path.abspath(checkpoint_path))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, checkpoint_path)
+    
+    def train_sentiment_analyzer(self, texts, sentiments, parameters=None):
+        """Train sentiment analysis model"""
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.model_selection import train_test_split
+            from sklearn.metrics import accuracy_score
+
+            if parameters is None:
+                parameters = {}
             
-            # Evaluate
-            y_pred = self.sentiment_analyzer.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
+            search = None
+            if parameters.get('search'):
+                # Cross-validated search; the best candidate is refit on every text
+                sentiment_vectorizer, self.sentiment_analyzer, feature_count, search = self._search(
+                    texts, sentiments, parameters['search'])
+                accuracy = search['best']['mean_accuracy']
+            else:
+                # Create separate vectorizer for sentiment
+                sentiment_vectorizer = TfidfVectorizer(
+                    max_features=parameters.get('max_features', 3000),
+                    stop_words='english',
+                    ngram_range=(1, 2)  # Include bigrams for better sentiment detection
+                )
+                
+                # Vectorize texts
+                X = sentiment_vectorizer.fit_transform(texts)
+                y = np.array(sentiments)
+                
+                # Split data
+                X_train, X_test, y_train, y_test = train_test_split(
+                    X, y, test_size=0.2, random_state=42, stratify=y
+                )
+                
+                # Use Logistic Regression for sentiment analysis
+                self.sentiment_analyzer = LogisticRegression(
+                    max_iter=parameters.get('max_iter', 1000),
+                    random_state=42
+                )
+                
+                # Train the model
+                self.sentiment_analyzer.fit(X_train, y_train)
+                
+                # Evaluate
+                y_pred = self.sentiment_analyzer.predict(X_test)
+                accuracy = accuracy_score(y_test, y_pred)
+                feature_count = X.shape[1]
             
             # Save model
             model_filename = f"{self.model_path}sentiment_analyzer.pkl"
@@ -119,17 +339,20 @@ class TextModel:
                     'analyzer': self.sentiment_analyzer
                 }, f)
             
-            logger.info(f"Sentiment analyzer trained with accuracy: {accuracy:.3f}")
+            logger.info("Sentiment analyzer trained with accuracy: %.3f", accuracy)
             
-            return {
+            result = {
                 'accuracy': accuracy,
                 'model_path': model_filename,
-                'feature_count': X.shape[1],
+                'feature_count': feature_count,
                 'training_samples': len(texts)
             }
+            if search is not None:
+                result['search'] = search
+            return result
             
         except Exception as e:
-            logger.error(f"Sentiment analyzer training failed: {str(e)}")
+            logger.error("Sentiment analyzer training failed: %s", e)
             raise
     
     def predict_text_class(self, text):
@@ -158,7 +381,7 @@ class TextModel:
             }
             
         except Exception as e:
-            logger.error(f"Text classification prediction failed: {str(e)}")
+            logger.error("Text classification prediction failed: %s", e)
             raise
     
     def predict_sentiment(self, text):
@@ -197,7 +420,7 @@ class TextModel:
             }
             
         except Exception as e:
-            logger.error(f"Sentiment prediction failed: {str(e)}")
+            logger.error("Sentiment prediction failed: %s", e)
             raise
     
     def load_model(self, model_path):
@@ -208,10 +431,10 @@ class TextModel:
                 self.vectorizer = model_data['vectorizer']
                 self.classifier = model_data['classifier']
             
-            logger.info(f"Model loaded from {model_path}")
+            logger.info("Model loaded from %s", model_path)
             
         except Exception as e:
-            logger.error(f"Model loading failed: {str(e)}")
+            logger.error("Model loading failed: %s", e)
             raise
     
     def get_feature_importance(self, top_n=20):
@@ -244,5 +467,42 @@ class TextModel:
             return top_features
             
         except Exception as e:
-            logger.error(f"Feature importance extraction failed: {str(e)}")
-            return []
\ No newline at end of file
+            logger.error("Feature importance extraction failed: %s", e)
+            return []
+
+def _vectorized_chunks(chunks, vectorizer, pool, depth):
+    """(features, labels) per chunk in order, vectorizing up to ``depth`` chunks ahead in ``pool``"""
+    if pool is None:
+        for texts, labels in chunks:
+            yield vectorizer.transform(texts), labels
+        return
+    pending = deque()
+    for texts, labels in chunks:
+        pending.append((pool.submit(_vectorize, vectorizer, texts), labels))
+        if len(pending) >= depth:
+            future, ready = pending.popleft()
+            yield future.result(), ready
+    while pending:
+        future, ready = pending.popleft()
+        yield future.result(), ready
+
+
+def _bounded(value, limit) -> int:
+    return max(1, min(int(value), int(limit)))
+
+
+def _checkpoint_path(base_path, source_path, settings, label_field) -> str:
+    """Checkpoint file for one training file and model settings, so resume never mixes runs"""
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    model = {key: settings.get(key) for key in ('classifier', 'n_features', 'ngram_range', 'alpha')}
+    digest.update(repr((sorted(model.items()), label_field)).encode('utf-8'))
+    root, extension = os.path.splitext(base_path)
+    return f"{root}.{digest.hexdigest()[:16]}{extension}"
+
+
+def _cpu_cores():
+    from utils.parallelism import current_plan
+    return current_plan()['cores']
@@ -0,0 +1,171 @@
+import time
+import random
+import logging
+import itertools
+from typing import List
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Search-space keys that configure the vectorizer; the rest configure the classifier
+VECTORIZER_KEYS = ('max_features', 'ngram_range', 'min_df', 'sublinear_tf')
+CLASSIFIERS = ('naive_bayes', 'logistic_regression')
+
+# Texts and labels of the running search, set once per worker process
+_data = None
+
+
+def build_vectorizer(params: dict):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(
+        max_features=params.get('max_features'),
+        stop_words='english',
+        ngram_range=tuple(params.get('ngram_range', (1, 1))),
+        min_df=params.get('min_df', 1),
+        sublinear_tf=params.get('sublinear_tf', False)
+    )
+
+
+def build_classifier(params: dict):
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.linear_model import LogisticRegression
+
+    if params['classifier'] == 'logistic_regression':
+        return LogisticRegression(C=params.get('C', 1.0), max_iter=params.get('max_iter', 1000), random_state=42)
+    return MultinomialNB(alpha=params.get('alpha', 1.0))
+
+
+def candidates(space: dict, method: str = 'grid', n_iter: int = 20, random_state: int = 42) -> List[dict]:
+    """Every vectorizer setting crossed with every classifier's own settings, or a random sample of them"""
+    vectorizer_space = space.get('vectorizer', {})
+    keys = sorted(vectorizer_space)
+    vectorizers = [dict(zip(keys, values)) for values in itertools.product(*(vectorizer_space[key] for key in keys))]
+
+    classifiers = []
+    for name, grid in space.get('classifiers', {}).items():
+        if name not in CLASSIFIERS:
+            raise ValueError(f"Unsupported classifier in search space: {name}")
+        grid_keys = sorted(grid)
+        classifiers.extend(dict(zip(grid_keys, values), classifier=name)
+                           for values in itertools.product(*(grid[key] for key in grid_keys)))
+
+    grid = [{**vectorizer, **classifier} for vectorizer in vectorizers for classifier in classifiers]
+    if method == 'random' and n_iter < len(grid):
+        grid = random.Random(random_state).sample(grid, n_iter)
+    return grid
+
+
+def search(texts, labels, options: dict, processes: int = 1) -> dict:
+    """Cross-validate every candidate; candidates sharing vectorizer settings share each fold's features.
+
+    The work is split into one unit per (fold, vectorizer setting): a unit
+    fits the vectorizer on the fold once and then trains and scores every
+    classifier candidate on those features. Units run in parallel
+    processes.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    start = time.perf_counter()
+    grid = candidates(options['space'], options['method'], int(options['n_iter']))
+    if not grid:
+        raise ValueError("The search space has no candidates")
+    if len(grid) > int(options['max_candidates']):
+        raise ValueError(f"The search space has {len(grid)} candidates; the limit is {options['max_candidates']}")
+
+    y = np.asarray(labels)
+    smallest_class = np.unique(y, return_counts=True)[1].min()
+    folds = min(int(options['folds']), int(smallest_class))
+    if folds < 2:
+        raise ValueError("Every label needs at least two examples to cross-validate")
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(np.zeros(len(y)), y))
+
+    # Group candidates by vectorizer settings
+    groups = {}
+    for index, params in enumerate(grid):
+        key = tuple((name, _hashable(params.get(name))) for name in VECTORIZER_KEYS)
+        groups.setdefault(key, []).append((index, params))
+    units = [(fold, train_index, test_index, members[0][1], members)
+             for fold, (train_index, test_index) in enumerate(splits)
+             for members in groups.values()]
+
+    processes = max(1, min(processes, len(units)))
+    if processes > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Spawned like the out-of-core vectorizers; each worker receives the texts once
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_set_data, initargs=(list(texts), y)) as pool:
+            outcomes = list(pool.map(_evaluate, units))
+    else:
+        _set_data(texts, y)
+        try:
+            outcomes = [_evaluate(unit) for unit in units]
+        finally:
+            _set_data(None, None)
+
+    accuracies = [[] for _ in grid]
+    fit_seconds = [[] for _ in grid]
+    vectorize_seconds = [[] for _ in grid]
+    for unit_seconds, results in outcomes:
+        for index, accuracy, seconds in results:
+            accuracies[index].append(accuracy)
+            fit_seconds[index].append(seconds)
+            vectorize_seconds[index].append(unit_seconds)
+
+    table = [
+        {
+            'params': params,
+            'mean_accuracy': float(np.mean(accuracies[index])),
+            'std_accuracy': float(np.std(accuracies[index])),
+            'fit_seconds': float(np.mean(fit_seconds[index])),
+            'vectorize_seconds': float(np.mean(vectorize_seconds[index]))
+        }
+        for index, params in enumerate(grid)
+    ]
+    # Most accurate first; ties go to the faster candidate
+    table.sort(key=lambda row: (-row['mean_accuracy'], row['fit_seconds']))
+    for rank, row in enumerate(table, 1):
+        row['rank'] = rank
+
+    logger.info("Searched %s candidates over %s folds in %.2fs", len(grid), folds, time.perf_counter() - start)
+    return {
+        'method': options['method'],
+        'folds': folds,
+        'candidates': len(grid),
+        'vectorizer_fits': len(units),
+        'processes': processes,
+        'search_seconds': round(time.perf_counter() - start, 3),
+        'best': table[0],
+        'results': table
+    }
+
+
+def _set_data(texts, labels):
+    global _data
+    _data = None if texts is None else (texts, labels)
+
+
+def _evaluate(unit):
+    """Fit one fold's vectorizer and score every candidate that shares it"""
+    fold, train_index, test_index, vectorizer_params, members = unit
+    texts, labels = _data
+
+    start = time.perf_counter()
+    vectorizer = build_vectorizer(vectorizer_params)
+    X_train = vectorizer.fit_transform([texts[i] for i in train_index])
+    X_test = vectorizer.transform([texts[i] for i in test_index])
+    unit_seconds = time.perf_counter() - start
+
+    results = []
+    for index, params in members:
+        start = time.perf_counter()
+        classifier = build_classifier(params).fit(X_train, labels[train_index])
+        seconds = time.perf_counter() - start
+        accuracy = float(np.mean(classifier.predict(X_test) == labels[test_index]))
+        results.append((index, accuracy, seconds))
+    return unit_seconds, results
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
@@ -0,0 +1,336 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = 'vectors.npy'
+_META_FILE = 'meta.json'
+_IVF_FILE = 'ivf.npz'
+
+
+def _write_atomic(path, write):
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        write(f)
+    os.replace(temporary, path)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first"""
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def spherical_kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Unit-length centroids of L2-normalized vectors, for cosine partitioning"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=n_lists)
+
+        # Clusters that lost every vector are re-seeded from random vectors
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.maximum(norms, 1e-12)).astype(np.float32)
+    return centroids
+
+
+class VectorIndex:
+    """Cosine-similarity index over L2-normalized float32 vectors.
+
+    Vectors live in one ``(rows, dimension)`` float32 matrix, saved as a
+    ``.npy`` file and memory-mapped on load, so a small corpus is searched
+    exhaustively with a single matrix-vector product. Once the index holds
+    ``ivf_threshold`` vectors an inverted file is built: spherical k-means
+    centroids partition the rows, rows are stored grouped by list, and a
+    query scores only the ``nprobe`` lists nearest to it.
+
+    Updates are append-only. Re-adding an id appends a new row and marks the
+    old one dead; rows added since the inverted file was built are scanned
+    exhaustively until enough accumulate to be worth rebuilding. Dead rows
+    are dropped when the index is saved.
+    """
+
+    rebuild_threshold = 10000
+
+    def __init__(self, index_path: str = None, ivf_threshold: int = 50000, nprobe: int = 8):
+        self.index_path = index_path
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.model = None
+        self.dimension = None
+
+        self._vectors = None
+        self._pending: List[np.ndarray] = []
+        self._ids: List[str] = []
+        self._metadata: List[dict] = []
+        self._alive: List[bool] = []
+        self._row_of: Dict[str, int] = {}
+        self._ivf = None
+        self._masks = None
+        self._lock = threading.Lock()
+
+        if index_path and os.path.exists(os.path.join(index_path, _META_FILE)):
+            self.load(index_path)
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, item_id):
+        return item_id in self._row_of
+
+    def add(self, ids: List[str], vectors: np.ndarray, metadata: Optional[List[dict]] = None,
+            model: str = None):
+        """Add or replace vectors; each row of ``vectors`` must be L2-normalized"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self.model = model
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {vectors.shape[1]}")
+
+            for position, item_id in enumerate(ids):
+                previous = self._row_of.get(item_id)
+                if previous is not None:
+                    self._alive[previous] = False
+                self._row_of[item_id] = len(self._ids)
+                self._ids.append(item_id)
+                self._metadata.append(metadata[position] if metadata else {})
+                self._alive.append(True)
+            self._pending.append(vectors)
+            self._masks = None
+
+    def remove(self, ids: List[str]) -> int:
+        with self._lock:
+            removed = 0
+            for item_id in ids:
+                row = self._row_of.pop(item_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    removed += 1
+            self._masks = None
+            return removed
+
+    def vector(self, item_id) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._row_of.get(item_id)
+            if row is None:
+                return None
+            committed = self._committed_rows()
+            if row < committed:
+                return np.array(self._vectors[row])
+            return np.array(self._pending_matrix()[row - committed])
+
+    def metadata(self, item_id) -> Optional[dict]:
+        row = self._row_of.get(item_id)
+        return self._metadata[row] if row is not None else None
+
+    def search(self, query: np.ndarray, limit: int = 10, exclude=None, category: str = None) -> List[dict]:
+        """Ids of the vectors most similar to ``query``, best first"""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        with self._lock:
+            if not self._row_of:
+                return []
+            self._maybe_rebuild()
+
+            rows, scores = self._score(query)
+            alive, categories = self._filter_masks()
+            keep = alive[rows]
+            if category is not None:
+                keep &= categories[rows] == category
+            if exclude:
+                excluded = [self._row_of[item_id] for item_id in exclude if item_id in self._row_of]
+                keep &= ~np.isin(rows, excluded)
+            rows, scores = rows[keep], scores[keep]
+
+            return [
+                dict(self._metadata[rows[i]], id=self._ids[rows[i]], score=float(scores[i]))
+                for i in top_k(scores, limit)
+            ]
+
+    def _maybe_rebuild(self):
+        unindexed = len(self._ids) - (self._ivf['rows'] if self._ivf is not None else 0)
+        if self._ivf is None and len(self._row_of) >= self.ivf_threshold or \
+                self._ivf is not None and unindexed >= self.rebuild_threshold:
+            self._flush_pending()
+            self._build_ivf()
+        elif sum(len(block) for block in self._pending) >= self.rebuild_threshold:
+            self._flush_pending()
+
+    def _score(self, query):
+        """(rows, similarities) for every row a query has to consider"""
+        committed = self._committed_rows()
+        pending = self._pending_matrix()
+
+        if self._ivf is None:
+            # Exhaustive: one product over the (possibly memory-mapped) matrix
+            parts = []
+            if committed:
+                parts.append(np.asarray(self._vectors @ query))
+            if pending is not None:
+                parts.append(pending @ query)
+            return np.arange(len(self._ids)), np.concatenate(parts)
+
+        ivf = self._ivf
+        lists = top_k(ivf['centroids'] @ query, min(self.nprobe, len(ivf['centroids'])))
+        # Sorted rows read the memory-mapped matrix front to back
+        probed = np.sort(np.concatenate([ivf['order'][ivf['offsets'][i]:ivf['offsets'][i + 1]] for i in lists]))
+        rows = [probed]
+        scores = [self._vectors[probed] @ query]
+        # Rows added after the build are not in any list yet
+        if ivf['rows'] < committed:
+            rows.append(np.arange(ivf['rows'], committed))
+            scores.append(np.asarray(self._vectors[ivf['rows']:committed] @ query))
+        if pending is not None:
+            rows.append(np.arange(committed, len(self._ids)))
+            scores.append(pending @ query)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    def _filter_masks(self):
+        if self._masks is None:
+            categories = np.array([meta.get('category') for meta in self._metadata], dtype=object)
+            self._masks = (np.array(self._alive, dtype=bool), categories)
+        return self._masks
+
+    def _committed_rows(self):
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def _pending_matrix(self):
+        if len(self._pending) > 1:
+            self._pending = [np.concatenate(self._pending)]
+        return self._pending[0] if self._pending else None
+
+    def _flush_pending(self):
+        pending = self._pending_matrix()
+        if pending is None:
+            return
+        if not self._committed_rows():
+            self._vectors = pending
+        else:
+            # Also copies a memory-mapped matrix into memory
+            self._vectors = np.concatenate((self._vectors, pending))
+        self._pending = []
+
+    def _build_ivf(self):
+        alive = np.flatnonzero(np.array(self._alive, dtype=bool))
+        n_lists = int(np.clip(np.sqrt(len(alive)), 16, 4096))
+        if len(alive) < n_lists * 4:
+            self._ivf = None
+            return
+
+        # k-means on a sample; assigning every row is one product per chunk
+        rng = np.random.default_rng(0)
+        sample = alive if len(alive) <= n_lists * 64 else rng.choice(alive, n_lists * 64, replace=False)
+        centroids = spherical_kmeans(np.asarray(self._vectors[np.sort(sample)]), n_lists)
+
+        assignment = np.empty(len(alive), dtype=np.int32)
+        for start in range(0, len(alive), 65536):
+            chunk = self._vectors[alive[start:start + 65536]]
+            assignment[start:start + 65536] = np.argmax(chunk @ centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind='stable')
+        counts = np.bincount(assignment, minlength=n_lists)
+        self._ivf = {
+            'centroids': centroids,
+            'order': alive[order],
+            'offsets': np.concatenate(([0], np.cumsum(counts))),
+            'rows': len(self._ids)
+        }
+        logger.info("Vector index: built %s inverted lists over %s vectors", n_lists, len(alive))
+
+    def save(self, index_path: str = None):
+        """Persist live vectors, ids, metadata and the inverted file, dropping dead rows"""
+        index_path = index_path or self.index_path
+        with self._lock:
+            self._flush_pending()
+            os.makedirs(index_path, exist_ok=True)
+
+            alive = np.array(self._alive, dtype=bool)
+            vectors = self._vectors[alive] if self._vectors is not None else np.empty((0, self.dimension or 0),
+                                                                                      dtype=np.float32)
+            ids = [item_id for item_id, live in zip(self._ids, self._alive) if live]
+            metadata = [meta for meta, live in zip(self._metadata, self._alive) if live]
+
+            # Renumber the inverted lists for the compacted rows
+            ivf = None
+            if self._ivf is not None:
+                new_row = np.cumsum(alive) - 1
+                order = self._ivf['order']
+                live_order = alive[order]
+                list_of_row = np.repeat(np.arange(len(self._ivf['centroids'])), np.diff(self._ivf['offsets']))
+                counts = np.bincount(list_of_row[live_order], minlength=len(self._ivf['centroids']))
+                ivf = {
+                    'centroids': self._ivf['centroids'],
+                    'order': new_row[order[live_order]],
+                    'offsets': np.concatenate(([0], np.cumsum(counts))),
+                    'rows': int(alive[:self._ivf['rows']].sum())
+                }
+
+            _write_atomic(os.path.join(index_path, _VECTORS_FILE), lambda f: np.save(f, vectors))
+            if ivf is not None:
+                _write_atomic(os.path.join(index_path, _IVF_FILE), lambda f: np.savez(f, **ivf))
+            elif os.path.exists(os.path.join(index_path, _IVF_FILE)):
+                os.remove(os.path.join(index_path, _IVF_FILE))
+
+            meta = json.dumps({'model': self.model, 'dimension': self.dimension,
+                               'ids': ids, 'metadata': metadata})
+            _write_atomic(os.path.join(index_path, _META_FILE), lambda f: f.write(meta.encode('utf-8')))
+
+            self._set_rows(vectors, ids, metadata, ivf)
+        logger.info("Vector index with %s entries saved to %s", len(ids), index_path)
+
+    def load(self, index_path: str) -> bool:
+        """Load an index written by save, memory-mapping the vectors; False if it could not be read"""
+        try:
+            with open(os.path.join(index_path, _META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+            vectors = np.load(os.path.join(index_path, _VECTORS_FILE), mmap_mode='r')
+
+            ivf = None
+            ivf_path = os.path.join(index_path, _IVF_FILE)
+            if os.path.exists(ivf_path):
+                with np.load(ivf_path) as data:
+                    ivf = {name: data[name] for name in data.files}
+                ivf['rows'] = int(ivf['rows'])
+
+            with self._lock:
+                self.model = meta.get('model')
+                self.dimension = meta.get('dimension')
+                self._set_rows(vectors, meta['ids'], meta['metadata'], ivf)
+            logger.info("Vector index with %s entries loaded from %s", len(meta['ids']), index_path)
+            return True
+        except Exception as e:
+            logger.error("Vector index loading failed: %s", e)
+            return False
+
+    def clear(self, model: str = None):
+        with self._lock:
+            self.model = model
+            self.dimension = None
+            self._set_rows(None, [], [], None)
+
+    def _set_rows(self, vectors, ids, metadata, ivf):
+        self._vectors = vectors
+        self._pending = []
+        self._ids = list(ids)
+        self._metadata = list(metadata)
+        self._alive = [True] * len(self._ids)
+        self._row_of = {item_id: row for row, item_id in enumerate(self._ids)}
+        self._ivf = ivf
+        self._masks = None
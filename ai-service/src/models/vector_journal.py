@@ -0,0 +1,162 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, item_id TEXT NOT NULL,
+                                    vector BLOB, metadata TEXT);
+"""
+
+
+class VectorJournal:
+    """Shared change log for a vector index, so every worker sees every update.
+
+    Each add or removal is appended as a numbered change (a removal has no
+    vector). The journal also points at the latest snapshot directory
+    written by ``VectorIndex.save`` and the change it covers; publishing a
+    snapshot drops the changes it includes. A worker brings its index up to
+    date by loading the snapshot when it is behind it and applying the
+    changes after what it has seen.
+
+    The journal records the embedding model of its vectors and refuses
+    changes from any other model. SQLite in WAL mode lets every worker
+    process read while one writes.
+    """
+
+    def __init__(self, journal_path: str):
+        self.journal_path = journal_path
+        directory = os.path.dirname(journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        # Connections must not cross a fork; each worker opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(self.journal_path, check_same_thread=False, timeout=30,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    @staticmethod
+    def _meta(db, key) -> Optional[str]:
+        row = db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @property
+    def model(self) -> Optional[str]:
+        """Embedding model of the journal's vectors, or None before the first add"""
+        with self._lock:
+            return self._meta(self._db(), 'model')
+
+    def claim_model(self, model: str) -> str:
+        """Record model unless the journal already has one; returns the journal's model"""
+        with self._lock:
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                current = self._meta(db, 'model')
+                if current is None:
+                    db.execute("INSERT INTO meta (key, value) VALUES ('model', ?)", (model,))
+                    current = model
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            return current
+
+    def state(self, after: int) -> Tuple[int, Optional[str], Optional[str], List[tuple]]:
+        """(snapshot seq, snapshot directory, model, changes) for a worker that has seen changes up to after.
+
+        If after is older than the snapshot the caller has to load the
+        snapshot first; the changes returned follow whichever is newer.
+        Each change is (seq, item id, vector or None, metadata).
+        """
+        with self._lock:
+            db = self._db()
+            # One read transaction, so the snapshot and the changes agree
+            db.execute('BEGIN')
+            try:
+                snapshot_seq = int(self._meta(db, 'snapshot_seq') or 0)
+                snapshot_dir = self._meta(db, 'snapshot_dir')
+                model = self._meta(db, 'model')
+                rows = db.execute('SELECT seq, item_id, vector, metadata FROM changes WHERE seq > ? ORDER BY seq',
+                                  (max(after, snapshot_seq),)).fetchall()
+            finally:
+                db.execute('COMMIT')
+
+        changes = [
+            (seq, item_id,
+             None if vector is None else np.frombuffer(vector, dtype=np.float32),
+             json.loads(metadata) if metadata else {})
+            for seq, item_id, vector, metadata in rows
+        ]
+        return snapshot_seq, snapshot_dir, model, changes
+
+    def append(self, model: Optional[str], ids: List[str], vectors: np.ndarray = None,
+               metadata: List[dict] = None) -> int:
+        """Log adds (with vectors) or removals (without) of ids; returns the last change number.
+
+        Raises ValueError if model is given and the journal holds vectors
+        from another model.
+        """
+        if vectors is not None:
+            vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        with self._lock:
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                current = self._meta(db, 'model')
+                if model is not None and current is None:
+                    db.execute("INSERT INTO meta (key, value) VALUES ('model', ?)", (model,))
+                elif model is not None and current != model:
+                    raise ValueError(f"Vector journal holds {current} vectors, not {model}")
+
+                db.executemany(
+                    'INSERT INTO changes (item_id, vector, metadata) VALUES (?, ?, ?)',
+                    ((item_id,
+                      None if vectors is None else vectors[position].tobytes(),
+                      json.dumps(metadata[position]) if metadata else None)
+                     for position, item_id in enumerate(ids))
+                )
+                last = db.execute('SELECT MAX(seq) FROM changes').fetchone()[0] or 0
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            return last
+
+    def pending(self) -> int:
+        """Number of changes not yet covered by a snapshot"""
+        with self._lock:
+            return self._db().execute('SELECT COUNT(*) FROM changes').fetchone()[0]
+
+    def publish_snapshot(self, seq: int, directory: str) -> bool:
+        """Point at a snapshot covering changes up to seq, unless a newer one is already published"""
+        with self._lock:
+            db = self._db()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                if seq <= int(self._meta(db, 'snapshot_seq') or 0):
+                    db.execute('ROLLBACK')
+                    return False
+                db.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                               (('snapshot_seq', str(seq)), ('snapshot_dir', directory)))
+                db.execute('DELETE FROM changes WHERE seq <= ?', (seq,))
+                db.execute('COMMIT')
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            return True
@@ -1,8 +1,20 @@
-from flask import Blueprint, request, jsonify
+import os
+import json
+import time
+from flask import Blueprint, request, jsonify, g
 from controllers.analysis_controller import AnalysisController
 from controllers.prediction_controller import PredictionController
 from controllers.training_controller import TrainingController
-from utils.validators import validate_request
+from controllers.search_controller import SearchController
+from utils.validators import (validate_request, validate_text_input, validate_text_batch, validate_quality_options,
+                              validate_limit, validate_search_posts, validate_catalog_items,
+                              validate_recommendation_training_data)
+from services.model_tiers import deadline_from_ms
+from services.semantic_search import IndexModelMismatch
+from models.interaction_data import detect_format
+from config.settings import get_config
+from config.ai_config import AI_CONFIG
+from utils.metrics import REGISTRY, REQUEST_COUNT, REQUEST_LATENCY, REQUESTS_IN_FLIGHT
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,8 +23,42 @@ api_bp = Blueprint('api', __name__)
 
 # Initialize controllers
 analysis_controller = AnalysisController()
-prediction_controller = PredictionController()
+prediction_controller = PredictionController(hf_service=analysis_controller.hf_service)
 training_controller = TrainingController()
+search_controller = SearchController()
+
+_HTTP_METHODS = ('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS')
+
+@api_bp.before_request
+def start_request_metrics():
+    if REGISTRY.enabled:
+        g.request_start = time.perf_counter()
+        REQUESTS_IN_FLIGHT.inc()
+
+@api_bp.after_request
+def record_request_metrics(response):
+    if REGISTRY.enabled and 'request_start' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        # Any method string can reach a 405; keep the label set bounded
+        method = request.method if request.method in _HTTP_METHODS else 'OTHER'
+        REQUEST_COUNT.inc(route, method, str(response.status_code))
+        REQUEST_LATENCY.observe(time.perf_counter() - g.request_start, route)
+    return response
+
+@api_bp.teardown_request
+def finish_request_metrics(error=None):
+    if REGISTRY.enabled and g.pop('request_start', None) is not None:
+        REQUESTS_IN_FLIGHT.dec()
+
+def _quality_options(data):
+    """Model tier arguments from a request: 'quality' and an absolute deadline"""
+    return {'quality': data.get('quality'), 'deadline': deadline_from_ms(data.get('deadline_ms'))}
+
+def _invalid_quality_options():
+    return jsonify({
+        'success': False,
+        'message': "quality must be fast, accurate or auto and deadline_ms a positive number"
+    }), 400
 
 @api_bp.route('/analyze/text', methods=['POST'])
 def analyze_text():
@@ -25,7 +71,10 @@ def analyze_text():
                 'message': 'Text is required'
             }), 400
         
-        result = analysis_controller.analyze_text(data['text'])
+        if not validate_quality_options(data):
+            return _invalid_quality_options()
+        
+        result = analysis_controller.analyze_text(data['text'], **_quality_options(data))
         
         return jsonify({
             'success': True,
@@ -34,7 +83,7 @@ def analyze_text():
         }), 200
         
     except Exception as e:
-        logger.error(f"Text analysis error: {str(e)}")
+        logger.error("Text analysis error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Text analysis failed'
@@ -45,13 +94,32 @@ def analyze_sentiment():
     try:
         data = request.get_json()
         
+        if isinstance(data, dict) and not validate_quality_options(data):
+            return _invalid_quality_options()
+        
+        # A list of texts is analyzed in length-bucketed batches
+        if isinstance(data, dict) and 'texts' in data:
+            texts = data['texts']
+            if not validate_text_batch(texts, get_config().MAX_BATCH_SIZE):
+                return jsonify({
+                    'success': False,
+                    'message': f"texts must be a list of 1 to {get_config().MAX_BATCH_SIZE} non-empty strings"
+                }), 400
+            
+            result = analysis_controller.analyze_sentiment_batch(texts, **_quality_options(data))
+            return jsonify({
+                'success': True,
+                'data': result,
+                'message': 'Sentiment analysis completed'
+            }), 200
+        
         if not validate_request(data, ['text']):
             return jsonify({
                 'success': False,
                 'message': 'Text is required'
             }), 400
         
-        result = analysis_controller.analyze_sentiment(data['text'])
+        result = analysis_controller.analyze_sentiment(data['text'], **_quality_options(data))
         
         return jsonify({
             'success': True,
@@ -60,12 +128,160 @@ def analyze_sentiment():
         }), 200
         
     except Exception as e:
-        logger.error(f"Sentiment analysis error: {str(e)}")
+        logger.error("Sentiment analysis error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Sentiment analysis failed'
         }), 500
 
+@api_bp.route('/analyze/entities', methods=['POST'])
+def extract_entities():
+    try:
+        data = request.get_json()
+        
+        if isinstance(data, dict) and not validate_quality_options(data):
+            return _invalid_quality_options()
+        
+        # A list of texts is analyzed in length-bucketed batches
+        if isinstance(data, dict) and 'texts' in data:
+            texts = data['texts']
+            if not validate_text_batch(texts, get_config().MAX_BATCH_SIZE):
+                return jsonify({
+                    'success': False,
+                    'message': f"texts must be a list of 1 to {get_config().MAX_BATCH_SIZE} non-empty strings"
+                }), 400
+            
+            result = analysis_controller.extract_entities_batch(texts, **_quality_options(data))
+        else:
+            if not validate_request(data, ['text']):
+                return jsonify({
+                    'success': False,
+                    'message': 'Text is required'
+                }), 400
+            
+            result = analysis_controller.extract_entities(data['text'], **_quality_options(data))
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Entity extraction completed'
+        }), 200
+        
+    except Exception as e:
+        logger.error("Entity extraction error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Entity extraction failed'
+        }), 500
+
+def _image_request():
+    """Return (upload stream, request data) for an image endpoint"""
+    image_file = request.files.get('image')
+    data = request.get_json(silent=True) or request.form
+    return (image_file.stream if image_file is not None else None), data
+
+def _image_too_large():
+    # Reject oversized bodies before werkzeug parses the multipart form
+    max_bytes = AI_CONFIG['image']['max_upload_bytes']
+    return bool(request.content_length and request.content_length > max_bytes + 64 * 1024)
+
+@api_bp.route('/analyze/image', methods=['POST'])
+def analyze_image():
+    try:
+        if _image_too_large():
+            return jsonify({
+                'success': False,
+                'message': 'Image is too large'
+            }), 413
+        
+        image_stream, data = _image_request()
+        
+        if image_stream is None and not validate_request(data, ['image_url']):
+            return jsonify({
+                'success': False,
+                'message': 'An image upload or image_url is required'
+            }), 400
+        
+        result = analysis_controller.analyze_image(
+            image_stream=image_stream,
+            image_url=data.get('image_url'),
+            full_resolution=str(data.get('full_resolution', 'false')).lower() == 'true',
+            image_id=data.get('image_id'),
+            user_id=data.get('user_id')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Image analysis completed'
+        }), 200
+        
+    except ValueError as e:
+        logger.warning("Image rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error("Image analysis error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Image analysis failed'
+        }), 500
+
+@api_bp.route('/images/similar', methods=['POST'])
+def find_similar_images():
+    try:
+        if _image_too_large():
+            return jsonify({
+                'success': False,
+                'message': 'Image is too large'
+            }), 413
+        
+        image_stream, data = _image_request()
+        
+        if image_stream is None and not validate_request(data, ['image_url']):
+            return jsonify({
+                'success': False,
+                'message': 'An image upload or image_url is required'
+            }), 400
+        
+        max_distance = min(int(data.get('max_distance', 10)), 64)
+        limit = int(data.get('limit', 10))
+        if max_distance < 0 or limit < 1:
+            return jsonify({
+                'success': False,
+                'message': 'max_distance must be non-negative and limit positive'
+            }), 400
+        
+        result = analysis_controller.find_similar_images(
+            image_stream=image_stream,
+            image_url=data.get('image_url'),
+            max_distance=max_distance,
+            limit=limit
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Similar image search completed'
+        }), 200
+        
+    except ValueError as e:
+        logger.warning("Image rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error("Similar image search error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Similar image search failed'
+        }), 500
+
 @api_bp.route('/generate/text', methods=['POST'])
 def generate_text():
     try:
@@ -77,10 +293,14 @@ def generate_text():
                 'message': 'Prompt is required'
             }), 400
         
+        if not validate_quality_options(data):
+            return _invalid_quality_options()
+        
         result = prediction_controller.generate_text(
             data['prompt'],
             data.get('max_length', 100),
-            data.get('temperature', 0.7)
+            data.get('temperature', 0.7),
+            **_quality_options(data)
         )
         
         return jsonify({
@@ -90,7 +310,7 @@ def generate_text():
         }), 200
         
     except Exception as e:
-        logger.error(f"Text generation error: {str(e)}")
+        logger.error("Text generation error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Text generation failed'
@@ -120,7 +340,7 @@ def generate_quiz():
         }), 200
         
     except Exception as e:
-        logger.error(f"Quiz generation error: {str(e)}")
+        logger.error("Quiz generation error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Quiz generation failed'
@@ -150,12 +370,306 @@ def get_recommendations():
         }), 200
         
     except Exception as e:
-        logger.error(f"Recommendations error: {str(e)}")
+        logger.error("Recommendations error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Recommendations failed'
         }), 500
 
+@api_bp.route('/recommendations/items', methods=['POST'])
+def index_recommendation_items():
+    try:
+        data = request.get_json() or {}
+        items = data.get('items')
+        removed = data.get('remove') or []
+        
+        if not isinstance(removed, list) or (not removed and items is None):
+            return jsonify({
+                'success': False,
+                'message': 'Items to index or item ids to remove are required'
+            }), 400
+        
+        if items is not None and not validate_catalog_items(items, AI_CONFIG['recommendations']['max_items_per_request']):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid items'
+            }), 400
+        
+        result = prediction_controller.index_items(items, removed)
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Item catalog updated'
+        }), 200
+        
+    except Exception as e:
+        logger.error("Item catalog error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Item catalog update failed'
+        }), 500
+
+@api_bp.route('/recommendations/similar-users', methods=['POST'])
+def get_similar_users():
+    try:
+        data = request.get_json() or {}
+        user_ids = data.get('user_ids') or ([data['user_id']] if data.get('user_id') else None)
+        max_users = AI_CONFIG['recommendations']['max_similar_users_batch']
+        
+        if not isinstance(user_ids, list) or not 1 <= len(user_ids) <= max_users \
+                or not all(isinstance(user_id, (str, int)) for user_id in user_ids):
+            return jsonify({
+                'success': False,
+                'message': f'A user_id or a list of up to {max_users} user_ids is required'
+            }), 400
+        
+        limit = data.get('limit', 10)
+        if not validate_limit(limit):
+            return jsonify({
+                'success': False,
+                'message': 'limit must be a positive integer'
+            }), 400
+        
+        result = prediction_controller.get_similar_users(
+            user_ids,
+            min(limit, AI_CONFIG['recommendations']['max_recommendations'])
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Similar users found'
+        }), 200
+        
+    except Exception as e:
+        logger.error("Similar users error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Similar users lookup failed'
+        }), 500
+
+@api_bp.route('/recommendations/interactions', methods=['POST'])
+def record_interactions():
+    try:
+        data = request.get_json() or {}
+        interactions = data.get('interactions')
+        
+        if not isinstance(interactions, list) or not interactions \
+                or not validate_recommendation_training_data(interactions):
+            return jsonify({
+                'success': False,
+                'message': 'A list of interactions with user_id and item_id is required'
+            }), 400
+        
+        result = prediction_controller.record_interactions(interactions)
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Interactions recorded'
+        }), 200
+        
+    except ValueError as e:
+        logger.warning("Interactions rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        logger.error("Interaction recording error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Recording interactions failed'
+        }), 500
+
+@api_bp.route('/search/index', methods=['POST'])
+def index_posts():
+    try:
+        data = request.get_json() or {}
+        removed = data.get('remove') or []
+        
+        if not isinstance(removed, list) or (not removed and 'posts' not in data):
+            return jsonify({
+                'success': False,
+                'message': 'Posts to index or post ids to remove are required'
+            }), 400
+        
+        posts = data.get('posts')
+        if posts is not None and not validate_search_posts(posts, AI_CONFIG['embeddings']['max_posts_per_request']):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid posts'
+            }), 400
+        
+        result = {}
+        if removed:
+            result.update(search_controller.remove_posts(removed))
+        if posts:
+            result.update(search_controller.index_posts(posts, persist=bool(data.get('persist', False))))
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Semantic index updated'
+        }), 200
+        
+    except IndexModelMismatch as e:
+        logger.error("Semantic indexing error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+        
+    except Exception as e:
+        logger.error("Semantic indexing error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Semantic indexing failed'
+        }), 500
+
+@api_bp.route('/search/semantic', methods=['POST'])
+def semantic_search():
+    try:
+        data = request.get_json() or {}
+        query = data.get('query')
+        post_ids = data.get('post_ids')
+        
+        if post_ids is not None and not (isinstance(post_ids, list) and post_ids):
+            return jsonify({
+                'success': False,
+                'message': 'post_ids must be a non-empty list'
+            }), 400
+        
+        if not post_ids and not validate_text_input(query, max_length=1000):
+            return jsonify({
+                'success': False,
+                'message': 'A query or post_ids is required'
+            }), 400
+        
+        limit = data.get('limit', 10)
+        if not validate_limit(limit):
+            return jsonify({
+                'success': False,
+                'message': 'limit must be a positive integer'
+            }), 400
+        
+        result = search_controller.search(
+            query=query,
+            post_ids=post_ids,
+            limit=min(limit, 100),
+            category=data.get('category')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Semantic search completed'
+        }), 200
+        
+    except IndexModelMismatch as e:
+        logger.error("Semantic search error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+        
+    except Exception as e:
+        logger.error("Semantic search error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Semantic search failed'
+        }), 500
+
+def _training_source(ingest_dir):
+    """(stream or path, format, parameters) for a streaming training request"""
+    upload = request.files.get('file')
+    if upload is not None:
+        data_format = request.form.get('format') or detect_format(upload.filename, upload.mimetype)
+        return upload.stream, data_format, json.loads(request.form.get('parameters') or '{}')
+    
+    data_format = detect_format(content_type=request.content_type)
+    if data_format is not None:
+        # Raw NDJSON/CSV body, read straight off the socket
+        return request.stream, data_format, json.loads(request.args.get('parameters') or '{}')
+    
+    data = request.get_json(silent=True) or {}
+    if not data.get('path'):
+        raise ValueError('An NDJSON/CSV upload, body or file path is required')
+    
+    # Server-side files must live under the ingest directory
+    ingest_dir = os.path.realpath(ingest_dir)
+    path = os.path.realpath(os.path.join(ingest_dir, data['path']))
+    if os.path.commonpath([ingest_dir, path]) != ingest_dir or not os.path.isfile(path):
+        raise ValueError('Training file not found')
+    return path, data.get('format') or detect_format(path), data.get('parameters', {})
+
+@api_bp.route('/train/recommendation/stream', methods=['POST'])
+def train_recommendation_stream():
+    try:
+        source, data_format, parameters = _training_source(AI_CONFIG['recommendations']['ingest_dir'])
+        
+        if data_format is None:
+            return jsonify({
+                'success': False,
+                'message': 'Format must be ndjson or csv'
+            }), 400
+        
+        result = training_controller.train_recommendation_stream(source, data_format, parameters)
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Model training initiated'
+        }), 200
+        
+    except ValueError as e:
+        logger.warning("Training data rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error("Streaming training error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Model training failed'
+        }), 500
+
+@api_bp.route('/train/text/stream', methods=['POST'])
+def train_text_classifier_stream():
+    try:
+        source, data_format, parameters = _training_source(AI_CONFIG['text_training']['ingest_dir'])
+        
+        if data_format is None:
+            return jsonify({
+                'success': False,
+                'message': 'Format must be ndjson or csv'
+            }), 400
+        
+        result = training_controller.train_text_classification_stream(source, data_format, parameters)
+        
+        return jsonify({
+            'success': True,
+            'data': result,
+            'message': 'Model training initiated'
+        }), 200
+        
+    except ValueError as e:
+        logger.warning("Training data rejected: %s", e)
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+        
+    except Exception as e:
+        logger.error("Streaming text training error: %s", e)
+        return jsonify({
+            'success': False,
+            'message': 'Model training failed'
+        }), 500
+
 @api_bp.route('/train/model', methods=['POST'])
 def train_model():
     try:
@@ -180,7 +694,7 @@ def train_model():
         }), 200
         
     except Exception as e:
-        logger.error(f"Model training error: {str(e)}")
+        logger.error("Model training error: %s", e)
         return jsonify({
             'success': False,
             'message': 'Model training failed'
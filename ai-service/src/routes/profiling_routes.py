@@ -0,0 +1,116 @@
+import io
+import pstats
+import cProfile
+import logging
+from flask import Blueprint, request, jsonify, g, send_file, Response
+from utils.profiling import PROFILER
+
+logger = logging.getLogger(__name__)
+
+# Registered by app.py only when PROFILING_ENABLED is true, so the request
+# hooks below cost nothing in a normal deployment
+profiling_bp = Blueprint('profiling', __name__)
+
+
+def _authorized():
+    return PROFILER.authorized(request.headers.get('X-Profile-Token'))
+
+
+@profiling_bp.before_app_request
+def start_request_profile():
+    forced = request.headers.get('X-Profile') == '1' and _authorized()
+    if request.blueprint == profiling_bp.name or not PROFILER.take_request(forced):
+        return
+    g.profile = cProfile.Profile()
+    g.profile.enable()
+
+
+@profiling_bp.after_app_request
+def finish_request_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.disable()
+        try:
+            name = PROFILER.save_request_profile(profile, f"{request.method}_{request.path}")
+            response.headers['X-Profile-Id'] = name
+        except Exception as e:
+            logger.error("Saving request profile failed: %s", e)
+    return response
+
+
+@profiling_bp.route('/profile', methods=['GET'])
+def profile_status():
+    """Profiling state and stored profiles"""
+    if not _authorized():
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+
+    return jsonify({
+        'success': True,
+        'data': {**PROFILER.status(), 'profiles': PROFILER.list_profiles()},
+        'message': 'Profiling status retrieved'
+    })
+
+
+@profiling_bp.route('/profile', methods=['POST'])
+def arm_profiling():
+    """Arm profiling
+
+    Body fields (all optional):
+        requests: profile the next N requests with cProfile
+        torch: record torch profiler traces for the next N model calls
+        sample_seconds: sample all thread stacks for this many seconds
+        sample_interval: seconds between stack samples (default 0.01)
+    """
+    if not _authorized():
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+
+    try:
+        data = request.get_json(silent=True) or {}
+        result = {}
+
+        if 'requests' in data:
+            PROFILER.arm_requests(data['requests'])
+        if 'torch' in data:
+            PROFILER.arm_torch(data['torch'])
+        if data.get('sample_seconds'):
+            duration = min(float(data['sample_seconds']), 300.0)
+            interval = max(float(data.get('sample_interval', 0.01)), 0.001)
+            result['sample_profile'] = PROFILER.start_sampling(duration, interval)
+
+        return jsonify({
+            'success': True,
+            'data': {**PROFILER.status(), **result},
+            'message': 'Profiling armed'
+        })
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error("Arming profiling failed: %s", e)
+        return jsonify({'success': False, 'message': 'Internal server error'}), 500
+
+
+@profiling_bp.route('/profile/<name>', methods=['GET'])
+def download_profile(name):
+    """Download a stored profile; ?format=text summarises a .prof file"""
+    if not _authorized():
+        return jsonify({'success': False, 'message': 'Not authorized'}), 403
+
+    path = PROFILER.profile_path(name)
+    if path is None:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'text' and name.endswith('.prof'):
+        sort = request.args.get('sort', 'cumulative')
+        limit = request.args.get('limit', '50')
+        if sort not in pstats.Stats.sort_arg_dict_default:
+            return jsonify({'success': False, 'message': f"Unknown sort key: {sort}"}), 400
+        if not limit.isdigit() or int(limit) < 1:
+            return jsonify({'success': False, 'message': 'limit must be a positive integer'}), 400
+
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.sort_stats(sort).print_stats(int(limit))
+        return Response(output.getvalue(), mimetype='text/plain')
+
+    return send_file(path, as_attachment=True, download_name=name)
@@ -0,0 +1,123 @@
+import re
+import zlib
+import logging
+import threading
+import numpy as np
+from config.ai_config import AI_CONFIG
+from utils.metrics import MODEL_INFERENCE_SECONDS, BATCH_SIZE
+from utils.profiling import PROFILER
+from utils.parallelism import configure_torch
+from utils.batching import length_buckets
+from services.tokenization_cache import enable_tokenization_cache
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class EmbeddingService:
+    """Sentence embeddings for semantic search, loaded on first use.
+
+    Texts are encoded with a transformer and mean-pooled over their tokens
+    into L2-normalized float32 vectors, so cosine similarity is a dot
+    product. Batches are cut from length-sorted inputs like
+    HuggingFaceService's. If the model cannot be loaded, a hashed
+    bag-of-words embedding is used instead and reported through
+    ``model_name``, so indexes built with it are never mixed with
+    transformer vectors.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or AI_CONFIG['embeddings']
+        self._tokenizer = None
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                from transformers import AutoTokenizer, AutoModel
+                configure_torch()
+
+                self._tokenizer = AutoTokenizer.from_pretrained(self.settings['model'], use_fast=True)
+                self._model = AutoModel.from_pretrained(self.settings['model']).eval()
+                if AI_CONFIG['tokenization']['cache_enabled']:
+                    enable_tokenization_cache(self._tokenizer)
+                logger.info("Embedding model %s initialized", self.settings['model'])
+            except Exception as e:
+                logger.error("Failed to initialize embedding model %s, using hashed embeddings: %s",
+                             self.settings['model'], e)
+                self._tokenizer = None
+                self._model = None
+            self._loaded = True
+
+    @property
+    def model_name(self) -> str:
+        self._load()
+        if self._model is None:
+            return f"hashing-{self.settings['fallback_dimension']}"
+        return self.settings['model']
+
+    def embed(self, texts) -> np.ndarray:
+        """L2-normalized float32 embeddings, one row per text"""
+        self._load()
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        if self._model is None:
+            return self._hash_embed(texts)
+
+        lengths = [len(text) for text in texts]
+        vectors = None
+        for batch in length_buckets(lengths, max(1, self.settings['batch_size'])):
+            BATCH_SIZE.observe(len(batch), 'embedding')
+            with MODEL_INFERENCE_SECONDS.time('embedding'), PROFILER.trace_model('embedding'):
+                embedded = self._encode([texts[i] for i in batch])
+            if vectors is None:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[batch] = embedded
+        return vectors
+
+    @property
+    def dimension(self) -> int:
+        self._load()
+        if self._model is None:
+            return self.settings['fallback_dimension']
+        return int(self._model.config.hidden_size)
+
+    def _encode(self, texts) -> np.ndarray:
+        import torch
+
+        encoded = self._tokenizer(texts, padding=True, truncation=True,
+                                  max_length=self.settings['max_length'], return_tensors='pt')
+        with torch.inference_mode():
+            hidden = self._model(**encoded).last_hidden_state
+            # Mean over real tokens only
+            mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return normalize_rows(pooled.cpu().numpy())
+
+    def _hash_embed(self, texts) -> np.ndarray:
+        """Signed feature hashing of words and word pairs, log-scaled"""
+        dimension = self.settings['fallback_dimension']
+        vectors = np.zeros((len(texts), dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _TOKEN_PATTERN.findall(text.lower())
+            features = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(feature.encode('utf-8')) for feature in features),
+                                 dtype=np.uint32, count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vectors[row], hashes % dimension, signs)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return normalize_rows(vectors)
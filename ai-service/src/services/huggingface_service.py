@@ -1,118 +1,295 @@
 import os
 import logging
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import threading
+from contextlib import contextmanager
+from config.ai_config import AI_CONFIG
+from utils.metrics import MODEL_INFERENCE_SECONDS, BATCH_SIZE, PADDING_EFFICIENCY
+from utils.profiling import PROFILER
+from utils.parallelism import configure_torch
+from utils.batching import length_buckets, length_cap
+from services.tokenization_cache import enable_tokenization_cache
+from services.model_tiers import MODEL_TIERS
 
 logger = logging.getLogger(__name__)
 
+
 class HuggingFaceService:
+    """HuggingFace pipelines, each loaded on first use.
+
+    transformers and torch are only imported when a pipeline is first
+    needed, so importing the service (and the app) stays cheap and a worker
+    never loads models for features it does not serve.
+    """
+
     def __init__(self):
-        self.sentiment_pipeline = None
-        self.text_generation_pipeline = None
-        self.ner_pipeline = None
-        self._initialize_models()
-    
-    def _initialize_models(self):
-        """Initialize HuggingFace models"""
-        try:
-            # Initialize sentiment analysis pipeline
-            self.sentiment_pipeline = pipeline(
-                "sentiment-analysis",
-                model="cardiffnlp/twitter-roberta-base-sentiment-latest",
-                return_all_scores=True
-            )
-            
-            # Initialize text generation pipeline
-            self.text_generation_pipeline = pipeline(
-                "text-generation",
-                model="gpt2",
-                tokenizer="gpt2"
-            )
-            
-            # Initialize NER pipeline
-            self.ner_pipeline = pipeline(
-                "ner",
-                model="dbmdz/bert-large-cased-finetuned-conll03-english",
-                aggregation_strategy="simple"
+        self._pipelines = {}
+        self._lock = threading.Lock()
+
+    def _pipeline_specs(self):
+        """Primary and fallback (task, kwargs) for each pipeline.
+
+        Each task's fast tier is registered as '<name>:fast' without a
+        fallback; when it fails to load, calls use the accurate tier.
+        """
+        models = AI_CONFIG['huggingface']
+        specs = {
+            'sentiment': (
+                ('sentiment-analysis', {'model': models['sentiment_model'], 'return_all_scores': True}),
+                ('sentiment-analysis', {})
+            ),
+            'text_generation': (
+                ('text-generation', {'model': models['text_generation_model'],
+                                     'tokenizer': models['text_generation_model']}),
+                ('text-generation', {'model': 'gpt2'})
+            ),
+            'ner': (
+                ('ner', {'model': models['ner_model'], 'aggregation_strategy': 'simple'}),
+                ('ner', {'aggregation_strategy': 'simple'})
+            ),
+            'zero_shot_classification': (
+                ('zero-shot-classification', {'model': models['classification_model']}),
+                ('zero-shot-classification', {})
             )
-            
-            logger.info("HuggingFace models initialized successfully")
-            
+        }
+        for name, model in models.get('fast_models', {}).items():
+            task, kwargs = specs[name][0]
+            kwargs = dict(kwargs, model=model)
+            if 'tokenizer' in kwargs:
+                kwargs['tokenizer'] = model
+            specs[f"{name}:fast"] = ((task, kwargs), None)
+        return specs
+
+    def _get_pipeline(self, name):
+        """Return the named pipeline, loading it on first use (None if it failed)"""
+        if name in self._pipelines:
+            return self._pipelines[name]
+
+        with self._lock:
+            if name not in self._pipelines:
+                self._pipelines[name] = self._load_pipeline(name)
+        return self._pipelines[name]
+
+    def _load_pipeline(self, name):
+        from transformers import pipeline
+        configure_torch()
+
+        primary, fallback = self._pipeline_specs()[name]
+        try:
+            loaded = pipeline(primary[0], use_fast=True, **primary[1])
+            logger.info("HuggingFace %s pipeline initialized", name)
+            return self._with_tokenization_cache(loaded)
         except Exception as e:
-            logger.error(f"Failed to initialize HuggingFace models: {str(e)}")
-            # Initialize fallback models
-            self._initialize_fallback_models()
-    
-    def _initialize_fallback_models(self):
-        """Initialize simpler fallback models"""
+            logger.error("Failed to initialize HuggingFace %s pipeline: %s", name, e)
+
+        if fallback is None:
+            return None
         try:
-            self.sentiment_pipeline = pipeline("sentiment-analysis")
-            self.text_generation_pipeline = pipeline("text-generation", model="gpt2")
-            self.ner_pipeline = pipeline("ner", aggregation_strategy="simple")
-            logger.info("Fallback models initialized")
+            loaded = pipeline(fallback[0], use_fast=True, **fallback[1])
+            logger.info("Fallback %s pipeline initialized", name)
+            return self._with_tokenization_cache(loaded)
         except Exception as e:
-            logger.error(f"Failed to initialize fallback models: {str(e)}")
+            logger.error("Failed to initialize fallback %s pipeline: %s", name, e)
+            return None
+
+    def _with_tokenization_cache(self, loaded):
+        if AI_CONFIG['tokenization']['cache_enabled']:
+            enable_tokenization_cache(getattr(loaded, 'tokenizer', None))
+        return loaded
+
+    def _select_pipeline(self, name, quality=None, deadline=None):
+        """(pipeline, key) for the tier chosen for this call; key is 'name' or 'name:fast'"""
+        tier = MODEL_TIERS.choose(name, quality or AI_CONFIG['quality']['default'], deadline)
+        if tier == 'fast':
+            pipeline = self._get_pipeline(f"{name}:fast")
+            if pipeline is not None:
+                return pipeline, f"{name}:fast"
+        return self._get_pipeline(name), name
+
+    @contextmanager
+    def _inference(self, key):
+        """Time, trace and count one call on the pipeline registered as key"""
+        name, _, tier = key.partition(':')
+        with MODEL_INFERENCE_SECONDS.time(key), PROFILER.trace_model(key), \
+                MODEL_TIERS.track(name, tier or 'accurate'):
+            yield
+
+    def load_models(self, names=None):
+        """Load the given pipelines now (all of them by default)"""
+        for name in names or self._pipeline_specs():
+            self._get_pipeline(name)
+
+    def warm_up(self, name, texts):
+        """Run one dummy batch through a pipeline; False if it is unavailable"""
+        pipeline = self._get_pipeline(name)
+        if pipeline is None:
+            return False
+
+        # Warm-up calls are timed by the caller, not counted as inference
+        task = name.partition(':')[0]
+        if task == 'text_generation':
+            pipeline(texts, max_new_tokens=1, num_return_sequences=1, pad_token_id=50256)
+        elif task == 'zero_shot_classification':
+            pipeline(texts, ['general', 'other'])
+        else:
+            pipeline(texts)
+        return True
+
+    def loaded_models(self):
+        """Names of pipelines that loaded successfully"""
+        return [name for name, loaded in self._pipelines.items() if loaded is not None]
+
+    def _prepare_inputs(self, pipeline, texts, settings):
+        """Token lengths of texts, and the texts cut to the length cap"""
+        tokenizer = getattr(pipeline, 'tokenizer', None)
+        if tokenizer is None:
+            return [len(text.split()) for text in texts], list(texts)
+
+        # One extra token shows which inputs exceed the hard cap; fast
+        # tokenizers encode the whole list in a single call
+        encoded = tokenizer(
+            list(texts), truncation=True, max_length=settings['max_sequence_length'] + 1,
+            return_offsets_mapping=tokenizer.is_fast
+        )
+        lengths = [len(ids) for ids in encoded['input_ids']]
+        cap = length_cap(lengths, settings)
+        if not tokenizer.is_fast:
+            return [min(length, cap) for length in lengths], list(texts)
+
+        # Cut over-long texts at the character where their cap-th token ends,
+        # which works for NER too (token-classification pipelines take no
+        # truncation arguments)
+        keep = cap - tokenizer.num_special_tokens_to_add()
+        prepared = []
+        for index, text in enumerate(texts):
+            if lengths[index] > cap:
+                content = [end for start, end in encoded['offset_mapping'][index] if end > start]
+                text = text[:content[keep - 1]] if 0 < keep <= len(content) else text
+                lengths[index] = cap
+            prepared.append(text)
+        return lengths, prepared
+
+    def _run_bucketed(self, pipeline, key, texts, **kwargs):
+        """Run a pipeline over texts in length-sorted batches.
+
+        Each batch holds inputs of similar token length, so padding to the
+        batch's longest input wastes little compute. Outputs are returned in
+        the order of ``texts``.
+        """
+        settings = AI_CONFIG['batching']
+        lengths, prepared = self._prepare_inputs(pipeline, texts, settings)
+
+        outputs = [None] * len(texts)
+        for batch in length_buckets(lengths, max(1, settings['batch_size'])):
+            longest = lengths[batch[0]]
+            BATCH_SIZE.observe(len(batch), key)
+            if longest:
+                PADDING_EFFICIENCY.observe(sum(lengths[i] for i in batch) / (longest * len(batch)), key)
+
+            with self._inference(key):
+                results = pipeline([prepared[i] for i in batch], batch_size=len(batch), **kwargs)
+            for index, result in zip(batch, results):
+                outputs[index] = result
+        return outputs
+
+    @property
+    def sentiment_pipeline(self):
+        return self._get_pipeline('sentiment')
+
+    @property
+    def text_generation_pipeline(self):
+        return self._get_pipeline('text_generation')
+
+    @property
+    def ner_pipeline(self):
+        return self._get_pipeline('ner')
     
-    def analyze_sentiment(self, text):
+    def analyze_sentiment(self, text, quality=None, deadline=None):
         """Analyze sentiment of text"""
         try:
-            if not self.sentiment_pipeline:
+            pipeline, key = self._select_pipeline('sentiment', quality, deadline)
+            if not pipeline:
                 raise Exception("Sentiment pipeline not initialized")
             
-            results = self.sentiment_pipeline(text)
-            
-            # Process results
-            if isinstance(results[0], list):
-                # Multiple scores returned
-                sentiment_scores = {}
-                for result in results[0]:
-                    label = result['label'].lower()
-                    if 'positive' in label or label == 'pos':
-                        sentiment_scores['positive'] = result['score']
-                    elif 'negative' in label or label == 'neg':
-                        sentiment_scores['negative'] = result['score']
-                    elif 'neutral' in label:
-                        sentiment_scores['neutral'] = result['score']
-                
-                # Determine overall sentiment
-                max_sentiment = max(sentiment_scores.items(), key=lambda x: x[1])
-                overall_sentiment = max_sentiment[0]
-                confidence = max_sentiment[1]
-            else:
-                # Single result
-                overall_sentiment = results[0]['label'].lower()
-                confidence = results[0]['score']
-                sentiment_scores = {overall_sentiment: confidence}
-            
-            return {
-                'overall_sentiment': overall_sentiment,
-                'confidence': confidence,
-                'scores': sentiment_scores
-            }
+            with self._inference(key):
+                results = pipeline(text)
             
+            return dict(self._format_sentiment(results[0]), model_tier=self._tier(key))
+
         except Exception as e:
-            logger.error(f"Sentiment analysis failed: {str(e)}")
+            logger.error("Sentiment analysis failed: %s", e)
             # Return neutral sentiment as fallback
-            return {
-                'overall_sentiment': 'neutral',
-                'confidence': 0.5,
-                'scores': {'neutral': 0.5}
-            }
+            return self._neutral_sentiment()
+
+    def analyze_sentiment_batch(self, texts, quality=None, deadline=None):
+        """Analyze sentiment of many texts, batched by token length"""
+        try:
+            pipeline, key = self._select_pipeline('sentiment', quality, deadline)
+            if not pipeline:
+                raise Exception("Sentiment pipeline not initialized")
+
+            return [dict(self._format_sentiment(result), model_tier=self._tier(key))
+                    for result in self._run_bucketed(pipeline, key, texts)]
+
+        except Exception as e:
+            logger.error("Batch sentiment analysis failed: %s", e)
+            return [self._neutral_sentiment() for _ in texts]
+
+    def _format_sentiment(self, result):
+        """Overall sentiment and per-label scores from one pipeline output"""
+        if isinstance(result, list):
+            # Multiple scores returned
+            sentiment_scores = {}
+            for score in result:
+                label = score['label'].lower()
+                if 'positive' in label or label == 'pos':
+                    sentiment_scores['positive'] = score['score']
+                elif 'negative' in label or label == 'neg':
+                    sentiment_scores['negative'] = score['score']
+                elif 'neutral' in label:
+                    sentiment_scores['neutral'] = score['score']
+
+            # Determine overall sentiment
+            max_sentiment = max(sentiment_scores.items(), key=lambda x: x[1])
+            overall_sentiment = max_sentiment[0]
+            confidence = max_sentiment[1]
+        else:
+            # Single result
+            overall_sentiment = result['label'].lower()
+            confidence = result['score']
+            sentiment_scores = {overall_sentiment: confidence}
+
+        return {
+            'overall_sentiment': overall_sentiment,
+            'confidence': confidence,
+            'scores': sentiment_scores
+        }
+
+    def _tier(self, key):
+        return 'fast' if key.endswith(':fast') else 'accurate'
+
+    def _neutral_sentiment(self):
+        return {
+            'overall_sentiment': 'neutral',
+            'confidence': 0.5,
+            'scores': {'neutral': 0.5}
+        }
     
-    def generate_text(self, prompt, max_length=100, temperature=0.7):
+    def generate_text(self, prompt, max_length=100, temperature=0.7, quality=None, deadline=None):
         """Generate text based on prompt"""
         try:
-            if not self.text_generation_pipeline:
+            pipeline, key = self._select_pipeline('text_generation', quality, deadline)
+            if not pipeline:
                 raise Exception("Text generation pipeline not initialized")
             
             # Generate text
-            results = self.text_generation_pipeline(
-                prompt,
-                max_length=max_length,
-                temperature=temperature,
-                num_return_sequences=1,
-                pad_token_id=50256  # GPT-2 pad token
-            )
+            with self._inference(key):
+                results = pipeline(
+                    prompt,
+                    max_length=max_length,
+                    temperature=temperature,
+                    num_return_sequences=1,
+                    pad_token_id=50256  # GPT-2 pad token
+                )
             
             generated_text = results[0]['generated_text']
             
@@ -123,41 +300,61 @@ class HuggingFaceService:
             return generated_text
             
         except Exception as e:
-            logger.error(f"Text generation failed: {str(e)}")
+            logger.error("Text generation failed: %s", e)
             # Return a simple fallback response
             return f"This is a generated response based on: {prompt}"
     
-    def extract_entities(self, text):
+    def extract_entities(self, text, quality=None, deadline=None):
         """Extract named entities from text"""
         try:
-            if not self.ner_pipeline:
+            pipeline, key = self._select_pipeline('ner', quality, deadline)
+            if not pipeline:
                 raise Exception("NER pipeline not initialized")
             
-            entities = self.ner_pipeline(text)
+            with self._inference(key):
+                entities = pipeline(text)
             
-            # Process and clean entities
-            processed_entities = []
-            for entity in entities:
-                processed_entities.append({
-                    'word': entity.get('word', ''),
-                    'entity_group': entity.get('entity_group', 'MISC'),
-                    'score': entity.get('score', 0.0),
-                    'start': entity.get('start', 0),
-                    'end': entity.get('end', 0)
-                })
-            
-            return processed_entities
+            return self._format_entities(entities)
             
         except Exception as e:
-            logger.error(f"Entity extraction failed: {str(e)}")
+            logger.error("Entity extraction failed: %s", e)
             return []
+
+    def extract_entities_batch(self, texts, quality=None, deadline=None):
+        """Extract named entities from many texts, batched by token length"""
+        try:
+            pipeline, key = self._select_pipeline('ner', quality, deadline)
+            if not pipeline:
+                raise Exception("NER pipeline not initialized")
+
+            return [self._format_entities(entities) for entities in self._run_bucketed(pipeline, key, texts)]
+
+        except Exception as e:
+            logger.error("Batch entity extraction failed: %s", e)
+            return [[] for _ in texts]
+
+    def _format_entities(self, entities):
+        """Process and clean entities"""
+        processed_entities = []
+        for entity in entities:
+            processed_entities.append({
+                'word': entity.get('word', ''),
+                'entity_group': entity.get('entity_group', 'MISC'),
+                'score': entity.get('score', 0.0),
+                'start': entity.get('start', 0),
+                'end': entity.get('end', 0)
+            })
+        return processed_entities
     
-    def classify_text(self, text, labels):
+    def classify_text(self, text, labels, quality=None, deadline=None):
         """Classify text into given labels"""
         try:
             # Use zero-shot classification
-            classifier = pipeline("zero-shot-classification")
-            result = classifier(text, labels)
+            classifier, key = self._select_pipeline('zero_shot_classification', quality, deadline)
+            if not classifier:
+                raise Exception("Zero-shot classification pipeline not initialized")
+            with self._inference(key):
+                result = classifier(text, labels)
             
             return {
                 'predicted_label': result['labels'][0],
@@ -165,7 +362,7 @@ class HuggingFaceService:
             }
             
         except Exception as e:
-            logger.error(f"Text classification failed: {str(e)}")
+            logger.error("Text classification failed: %s", e)
             # Return first label as fallback
             return {
                 'predicted_label': labels[0] if labels else 'unknown',
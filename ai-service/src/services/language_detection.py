@@ -0,0 +1,166 @@
+import re
+import logging
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+from config.ai_config import AI_CONFIG
+from services.language_profiles import LANGUAGE_SAMPLES
+
+logger = logging.getLogger(__name__)
+
+# Punctuation, digits and whitespace are n-gram boundaries; letters and
+# combining marks of every script are kept
+_BOUNDARY_PATTERN = re.compile(
+    r"[\s\d_!-/:-@\[-`{-~\u00a0-\u00bf\u2000-\u206f\u3000-\u303f\uff01-\uff20\u060c\u061f\u0964\u0965]+"
+)
+
+_HASH_BITS = 14
+_HASH_SIZE = 1 << _HASH_BITS
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_HASH_SHIFT = np.uint64(64 - _HASH_BITS)
+_ORDER_SALTS = (np.uint64(0x100000001B3), np.uint64(0xC2B2AE3D27D4EB4F))
+
+
+class LanguageDetector:
+    """Character n-gram language identifier.
+
+    Every language is a smoothed log-probability profile over hashed
+    character uni-, bi- and trigrams, stored together as one bucket-major
+    ``(buckets, languages)`` float32 matrix. Scoring a text hashes its n-grams
+    with NumPy and sums the matching profile rows, which scores every
+    language in a single gather.
+
+    Short or ambiguous texts are left undetected: a text needs ``min_chars``
+    letters, and the best language must beat the runner-up by a
+    log-likelihood ratio of ``min_log_odds``.
+    """
+
+    def __init__(self, samples=None, profiles_path: Optional[str] = None,
+                 max_chars: int = 1000, smoothing: float = 0.5,
+                 min_chars: int = 3, min_log_odds: float = 4.0):
+        self.max_chars = max_chars
+        self.smoothing = smoothing
+        self.min_chars = min_chars
+        self.min_log_odds = min_log_odds
+        self.languages: List[str] = []
+        self.profiles = None
+
+        if profiles_path:
+            try:
+                self.load_profiles(profiles_path)
+            except Exception as e:
+                logger.warning("Could not load language profiles from %s: %s", profiles_path, e)
+
+        if self.profiles is None:
+            self.build_profiles(samples or LANGUAGE_SAMPLES)
+
+    def build_profiles(self, samples):
+        """Build log-probability profiles from a {language: text} mapping"""
+        languages = sorted(samples)
+        profiles = np.empty((_HASH_SIZE, len(languages)), dtype=np.float32)
+
+        for row, language in enumerate(languages):
+            counts = np.bincount(self._ngram_ids(samples[language], limit=None),
+                                 minlength=_HASH_SIZE).astype(np.float64)
+            counts += self.smoothing
+            profiles[:, row] = np.log(counts / counts.sum())
+
+        self.languages = languages
+        self.profiles = profiles
+        logger.info("Language profiles built for %s languages", len(languages))
+
+    def save_profiles(self, path: str):
+        """Persist the profile matrix so it can be shipped precomputed"""
+        np.savez_compressed(path, languages=np.array(self.languages), profiles=self.profiles)
+        logger.info("Language profiles saved to %s", path)
+
+    def load_profiles(self, path: str):
+        """Load a profile matrix written by save_profiles"""
+        with np.load(path) as data:
+            profiles = data['profiles'].astype(np.float32, copy=False)
+            if profiles.shape[0] != _HASH_SIZE:
+                raise ValueError(f"Profile height {profiles.shape[0]} does not match {_HASH_SIZE}")
+            self.languages = [str(language) for language in data['languages']]
+            self.profiles = profiles
+        logger.info("Language profiles loaded from %s", path)
+
+    def detect(self, text: str) -> Optional[str]:
+        """Return the most likely language, or None if the text is too short or ambiguous"""
+        if not isinstance(text, str) or len(_BOUNDARY_PATTERN.sub('', text[:self.max_chars])) < self.min_chars:
+            return None
+
+        scores, _ = self._scores(text)
+        if scores is None:
+            return None
+
+        if len(scores) > 1:
+            runner_up, best = np.partition(scores, len(scores) - 2)[-2:]
+            if best - runner_up < self.min_log_odds:
+                return None
+        return self.languages[int(np.argmax(scores))]
+
+    def detect_with_scores(self, text: str, top_k: int = 3) -> List[Tuple[str, float]]:
+        """Return the top_k languages with probabilities normalised per n-gram"""
+        scores, n_grams = self._scores(text)
+        if scores is None:
+            return []
+
+        # Scores are summed log-likelihoods; averaging per n-gram keeps long
+        # texts from saturating every probability to 0 or 1
+        scaled = (scores - scores.max()) / n_grams * 10.0
+        probabilities = np.exp(scaled)
+        probabilities /= probabilities.sum()
+
+        top_k = min(top_k, len(self.languages))
+        top = np.argpartition(-probabilities, top_k - 1)[:top_k]
+        top = top[np.argsort(-probabilities[top])]
+        return [(self.languages[i], float(probabilities[i])) for i in top]
+
+    def _scores(self, text: str):
+        ids = self._ngram_ids(text, limit=self.max_chars)
+        if len(ids) == 0:
+            return None, 0
+
+        return self.profiles[ids].sum(axis=0), len(ids)
+
+    def _ngram_ids(self, text: str, limit: Optional[int] = None) -> np.ndarray:
+        """Hash the character uni/bi/trigrams of text into profile buckets"""
+        if not text or not isinstance(text, str):
+            return np.empty(0, dtype=np.int64)
+
+        if limit is not None:
+            text = text[:limit]
+
+        normalized = _BOUNDARY_PATTERN.sub(' ', text.lower()).strip()
+        if not normalized:
+            return np.empty(0, dtype=np.int64)
+
+        chars = np.frombuffer(f" {normalized} ".encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+        with np.errstate(over='ignore'):
+            unigrams = chars[1:-1]
+            bigrams = chars[:-1] * _ORDER_SALTS[0] + chars[1:]
+            trigrams = bigrams[:-1] * _ORDER_SALTS[1] + chars[2:]
+            hashed = np.concatenate((unigrams, bigrams, trigrams)) * _HASH_MULTIPLIER
+
+        return (hashed >> _HASH_SHIFT).astype(np.int64)
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_language_detector() -> LanguageDetector:
+    """Return the process-wide detector, building its profiles on first use"""
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                settings = AI_CONFIG['language']
+                _detector = LanguageDetector(
+                    profiles_path=settings.get('profiles_path'),
+                    max_chars=settings.get('max_chars', 1000),
+                    min_chars=settings.get('min_chars', 3),
+                    min_log_odds=settings.get('min_log_odds', 4.0)
+                )
+    return _detector
@@ -0,0 +1,188 @@
+"""Seed corpora for the character n-gram language profiles.
+
+Each sample is short on purpose: the detector only needs the relative
+frequencies of character uni/bi/trigrams, and a few sentences per language
+are enough to tell scripts and most neighbouring languages apart. The
+profiles built from these samples can be saved to disk with
+``LanguageDetector.save_profiles`` and shipped instead of being rebuilt.
+"""
+
+LANGUAGE_SAMPLES = {
+    'english': (
+        "All human beings are born free and equal in dignity and rights. They are endowed with "
+        "reason and conscience and should act towards one another in a spirit of brotherhood. "
+        "I do not know what he wants to say, but it is a good idea. This evening we are going to "
+        "have dinner with our friends because the weather is nice and the children are at home. "
+        "There is nothing that I would rather do than read a book with my family."
+    ),
+    'spanish': (
+        "Todos los seres humanos nacen libres e iguales en dignidad y derechos y, dotados como "
+        "están de razón y conciencia, deben comportarse fraternalmente los unos con los otros. "
+        "No sé lo que quiere decir, pero es una buena idea. Esta noche vamos a cenar con nuestros "
+        "amigos porque hace buen tiempo y los niños están en casa. Me gustaría saber qué piensas."
+    ),
+    'french': (
+        "Tous les êtres humains naissent libres et égaux en dignité et en droits. Ils sont doués "
+        "de raison et de conscience et doivent agir les uns envers les autres dans un esprit de "
+        "fraternité. Je ne sais pas ce qu'il veut dire, mais c'est une bonne idée. Ce soir nous "
+        "allons dîner avec nos amis parce qu'il fait beau et que les enfants sont à la maison."
+    ),
+    'german': (
+        "Alle Menschen sind frei und gleich an Würde und Rechten geboren. Sie sind mit Vernunft "
+        "und Gewissen begabt und sollen einander im Geist der Brüderlichkeit begegnen. Ich weiß "
+        "nicht, was er damit sagen will, aber es ist eine gute Idee. Heute Abend essen wir mit "
+        "unseren Freunden, weil das Wetter schön ist und die Kinder zu Hause sind."
+    ),
+    'italian': (
+        "Tutti gli esseri umani nascono liberi ed eguali in dignità e diritti. Essi sono dotati "
+        "di ragione e di coscienza e devono agire gli uni verso gli altri in spirito di "
+        "fratellanza. Non so che cosa voglia dire, ma è una buona idea. Questa sera ceniamo con "
+        "i nostri amici perché il tempo è bello e i bambini sono a casa."
+    ),
+    'portuguese': (
+        "Todos os seres humanos nascem livres e iguais em dignidade e em direitos. Dotados de "
+        "razão e de consciência, devem agir uns para com os outros em espírito de fraternidade. "
+        "Não sei o que ele quer dizer, mas é uma boa ideia. Hoje à noite vamos jantar com os "
+        "nossos amigos porque o tempo está bom e as crianças estão em casa."
+    ),
+    'dutch': (
+        "Alle mensen worden vrij en gelijk in waardigheid en rechten geboren. Zij zijn begiftigd "
+        "met verstand en geweten, en behoren zich jegens elkander in een geest van broederschap "
+        "te gedragen. Ik weet niet wat hij bedoelt, maar het is een goed idee. Vanavond eten we "
+        "met onze vrienden omdat het mooi weer is en de kinderen thuis zijn."
+    ),
+    'swedish': (
+        "Alla människor är födda fria och lika i värde och rättigheter. De har utrustats med "
+        "förnuft och samvete och bör handla gentemot varandra i en anda av broderskap. Jag vet "
+        "inte vad han menar, men det är en bra idé. I kväll äter vi middag med våra vänner "
+        "eftersom vädret är fint och barnen är hemma."
+    ),
+    'danish': (
+        "Alle mennesker er født frie og lige i værdighed og rettigheder. De er udstyret med "
+        "fornuft og samvittighed, og de bør handle mod hverandre i en broderskabets ånd. Jeg ved "
+        "ikke hvad han mener, men det er en god idé. I aften spiser vi middag med vores venner, "
+        "fordi vejret er godt og børnene er hjemme."
+    ),
+    'norwegian': (
+        "Alle mennesker er født frie og med samme menneskeverd og menneskerettigheter. De er "
+        "utstyrt med fornuft og samvittighet og bør handle mot hverandre i brorskapets ånd. Jeg "
+        "vet ikke hva han mener, men det er en god idé. I kveld spiser vi middag med vennene "
+        "våre fordi været er fint og barna er hjemme."
+    ),
+    'finnish': (
+        "Kaikki ihmiset syntyvät vapaina ja tasavertaisina arvoltaan ja oikeuksiltaan. Heille "
+        "on annettu järki ja omatunto, ja heidän on toimittava toisiaan kohtaan veljeyden "
+        "hengessä. En tiedä, mitä hän tarkoittaa, mutta se on hyvä ajatus. Tänä iltana syömme "
+        "ystäviemme kanssa, koska sää on kaunis ja lapset ovat kotona."
+    ),
+    'polish': (
+        "Wszyscy ludzie rodzą się wolni i równi pod względem swej godności i swych praw. Są oni "
+        "obdarzeni rozumem i sumieniem i powinni postępować wobec innych w duchu braterstwa. Nie "
+        "wiem, co on chce powiedzieć, ale to jest dobry pomysł. Dziś wieczorem jemy kolację z "
+        "przyjaciółmi, ponieważ pogoda jest piękna, a dzieci są w domu."
+    ),
+    'czech': (
+        "Všichni lidé rodí se svobodní a sobě rovní co do důstojnosti a práv. Jsou nadáni "
+        "rozumem a svědomím a mají spolu jednat v duchu bratrství. Nevím, co tím myslí, ale je "
+        "to dobrý nápad. Dnes večer jdeme na večeři s přáteli, protože je krásné počasí a děti "
+        "jsou doma."
+    ),
+    'romanian': (
+        "Toate ființele umane se nasc libere și egale în demnitate și în drepturi. Ele sunt "
+        "înzestrate cu rațiune și conștiință și trebuie să se comporte unele față de altele în "
+        "spiritul fraternității. Nu știu ce vrea să spună, dar este o idee bună. În seara "
+        "aceasta mergem la cină cu prietenii noștri, pentru că vremea este frumoasă."
+    ),
+    'hungarian': (
+        "Minden emberi lény szabadon születik és egyenlő méltósága és joga van. Az emberek, "
+        "ésszel és lelkiismerettel bírván, egymással szemben testvéri szellemben kell hogy "
+        "viseltessenek. Nem tudom, mit akar mondani, de ez egy jó ötlet. Ma este a barátainkkal "
+        "vacsorázunk, mert szép az idő és a gyerekek otthon vannak."
+    ),
+    'turkish': (
+        "Bütün insanlar hür, haysiyet ve haklar bakımından eşit doğarlar. Akıl ve vicdana "
+        "sahiptirler ve birbirlerine karşı kardeşlik zihniyeti ile hareket etmelidirler. Ne "
+        "demek istediğini bilmiyorum, ama bu iyi bir fikir. Bu akşam arkadaşlarımızla yemeğe "
+        "gidiyoruz çünkü hava çok güzel ve çocuklar evde."
+    ),
+    'indonesian': (
+        "Semua orang dilahirkan merdeka dan mempunyai martabat dan hak-hak yang sama. Mereka "
+        "dikaruniai akal dan hati nurani dan hendaknya bergaul satu sama lain dalam semangat "
+        "persaudaraan. Saya tidak tahu apa yang dia maksud, tetapi itu ide yang bagus. Malam ini "
+        "kami akan makan malam dengan teman-teman karena cuacanya cerah dan anak-anak di rumah."
+    ),
+    'swahili': (
+        "Watu wote wamezaliwa huru, hadhi na haki zao ni sawa. Wote wamejaliwa akili na "
+        "dhamiri, hivyo yapasa watendeane kindugu. Sijui anamaanisha nini, lakini hilo ni wazo "
+        "zuri. Leo jioni tutakula chakula pamoja na marafiki zetu kwa sababu hali ya hewa ni "
+        "nzuri na watoto wako nyumbani."
+    ),
+    'vietnamese': (
+        "Tất cả mọi người sinh ra đều được tự do và bình đẳng về nhân phẩm và quyền lợi. Mọi "
+        "con người đều được tạo hóa ban cho lý trí và lương tâm và cần phải đối xử với nhau "
+        "trong tình anh em. Tôi không biết anh ấy muốn nói gì, nhưng đó là một ý tưởng hay. Tối "
+        "nay chúng tôi sẽ ăn tối với bạn bè vì thời tiết đẹp và các con ở nhà."
+    ),
+    'russian': (
+        "Все люди рождаются свободными и равными в своем достоинстве и правах. Они наделены "
+        "разумом и совестью и должны поступать в отношении друг друга в духе братства. Я не "
+        "знаю, что он хочет сказать, но это хорошая идея. Сегодня вечером мы ужинаем с друзьями, "
+        "потому что погода хорошая и дети дома."
+    ),
+    'ukrainian': (
+        "Всі люди народжуються вільними і рівними у своїй гідності та правах. Вони наділені "
+        "розумом і совістю і повинні діяти у відношенні один до одного в дусі братерства. Я не "
+        "знаю, що він хоче сказати, але це гарна ідея. Сьогодні ввечері ми вечеряємо з "
+        "друзями, тому що погода гарна і діти вдома."
+    ),
+    'greek': (
+        "Όλοι οι άνθρωποι γεννιούνται ελεύθεροι και ίσοι στην αξιοπρέπεια και τα δικαιώματα. "
+        "Είναι προικισμένοι με λογική και συνείδηση, και οφείλουν να συμπεριφέρονται μεταξύ "
+        "τους με πνεύμα αδελφοσύνης. Δεν ξέρω τι θέλει να πει, αλλά είναι μια καλή ιδέα. Απόψε "
+        "τρώμε με τους φίλους μας γιατί ο καιρός είναι ωραίος και τα παιδιά είναι στο σπίτι."
+    ),
+    'arabic': (
+        "يولد جميع الناس أحرارًا متساوين في الكرامة والحقوق. وقد وهبوا عقلاً وضميرًا وعليهم أن "
+        "يعامل بعضهم بعضًا بروح الإخاء. لا أعرف ماذا يقصد، لكنها فكرة جيدة. هذا المساء "
+        "سنتناول العشاء مع أصدقائنا لأن الطقس جميل والأطفال في البيت."
+    ),
+    'persian': (
+        "تمام افراد بشر آزاد به دنیا می‌آیند و از لحاظ حیثیت و حقوق با هم برابرند. همه دارای "
+        "عقل و وجدان هستند و باید نسبت به یکدیگر با روح برادری رفتار کنند. نمی‌دانم منظورش "
+        "چیست، اما این ایده خوبی است. امشب با دوستانمان شام می‌خوریم چون هوا خوب است و "
+        "بچه‌ها در خانه هستند."
+    ),
+    'hebrew': (
+        "כל בני האדם נולדו בני חורין ושווים בערכם ובזכויותיהם. כולם חוננו בתבונה ובמצפון, "
+        "לפיכך חובה עליהם לנהוג איש ברעהו ברוח של אחווה. אני לא יודע מה הוא רוצה לומר, אבל "
+        "זה רעיון טוב. הערב אנחנו אוכלים ארוחת ערב עם חברים כי מזג האוויר יפה והילדים בבית."
+    ),
+    'hindi': (
+        "सभी मनुष्यों को गौरव और अधिकारों के मामले में जन्मजात स्वतन्त्रता और समानता प्राप्त "
+        "है। उन्हें बुद्धि और अन्तरात्मा की देन प्राप्त है और परस्पर उन्हें भाईचारे के भाव से "
+        "बर्ताव करना चाहिए। मुझे नहीं पता कि वह क्या कहना चाहता है, लेकिन यह एक अच्छा विचार है। "
+        "आज शाम हम अपने दोस्तों के साथ खाना खाएंगे क्योंकि मौसम अच्छा है और बच्चे घर पर हैं।"
+    ),
+    'thai': (
+        "มนุษย์ทั้งหลายเกิดมามีอิสระและเสมอภาคกันในเกียรติศักดิ์และสิทธิ "
+        "ต่างมีเหตุผลและมโนธรรม และควรปฏิบัติต่อกันด้วยเจตนารมณ์แห่งภราดรภาพ "
+        "ฉันไม่รู้ว่าเขาหมายถึงอะไร แต่มันเป็นความคิดที่ดี "
+        "คืนนี้เราจะไปกินข้าวกับเพื่อนเพราะอากาศดีและเด็กๆอยู่ที่บ้าน"
+    ),
+    'japanese': (
+        "すべての人間は、生まれながらにして自由であり、かつ、尊厳と権利とについて平等である。"
+        "人間は、理性と良心とを授けられており、互いに同胞の精神をもって行動しなければならない。"
+        "彼が何を言いたいのかわかりませんが、それはいい考えです。"
+        "今晩は天気がいいので、友達と一緒に晩ご飯を食べます。子供たちは家にいます。"
+    ),
+    'chinese': (
+        "人人生而自由，在尊严和权利上一律平等。他们赋有理性和良心，并应以兄弟关系的精神相对待。"
+        "我不知道他想说什么，但是这是一个好主意。"
+        "今天晚上我们和朋友一起吃饭，因为天气很好，孩子们都在家。"
+    ),
+    'korean': (
+        "모든 인간은 태어날 때부터 자유로우며 그 존엄과 권리에 있어 동등하다. 인간은 천부적으로 "
+        "이성과 양심을 부여받았으며 서로 형제애의 정신으로 행동하여야 한다. 그가 무슨 말을 하려는지 "
+        "모르겠지만 좋은 생각입니다. 오늘 저녁에는 날씨가 좋아서 친구들과 함께 저녁을 먹을 거예요."
+    )
+}
@@ -0,0 +1,81 @@
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from config.ai_config import AI_CONFIG
+from utils.metrics import MODEL_TIER_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+QUALITIES = ('fast', 'accurate', 'auto')
+
+
+class TierSelector:
+    """Chooses between a task's fast and accurate model per call.
+
+    ``quality='auto'`` uses the accurate tier unless too many calls of the
+    task are already in flight, or the accurate tier's recent latency, times
+    the calls queued ahead, would overrun the request's deadline. Under peak
+    load requests degrade to the distilled models instead of timing out.
+    """
+
+    def __init__(self, max_queue_depth: int = 4, smoothing: float = 0.2):
+        self.max_queue_depth = max_queue_depth
+        self.smoothing = smoothing
+        self._in_flight = defaultdict(int)
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def choose(self, task, quality='auto', deadline=None) -> str:
+        """'fast' or 'accurate'; ``deadline`` is a time.perf_counter() value"""
+        if quality in ('fast', 'accurate'):
+            return quality
+
+        with self._lock:
+            depth = self._in_flight[task]
+            estimate = self._latency.get((task, 'accurate'))
+
+        if depth >= self.max_queue_depth:
+            return 'fast'
+        if deadline is not None:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or (estimate is not None and estimate * (depth + 1) > remaining):
+                return 'fast'
+        return 'accurate'
+
+    @contextmanager
+    def track(self, task, tier):
+        """Count a call as in flight and fold its duration into the estimate"""
+        MODEL_TIER_REQUESTS.inc(task, tier)
+        with self._lock:
+            self._in_flight[task] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._in_flight[task] -= 1
+                previous = self._latency.get((task, tier))
+                self._latency[(task, tier)] = elapsed if previous is None \
+                    else previous + self.smoothing * (elapsed - previous)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': {task: count for task, count in self._in_flight.items() if count},
+                'latency_seconds': {f"{task}:{tier}": round(value, 4)
+                                    for (task, tier), value in self._latency.items()}
+            }
+
+
+def deadline_from_ms(deadline_ms):
+    """Absolute deadline for a relative budget in milliseconds (None if unset)"""
+    if deadline_ms is None:
+        return None
+    return time.perf_counter() + float(deadline_ms) / 1000.0
+
+
+_settings = AI_CONFIG['quality']
+MODEL_TIERS = TierSelector(_settings['max_queue_depth'], _settings['latency_smoothing'])
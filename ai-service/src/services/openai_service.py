@@ -1,6 +1,6 @@
 import os
 import logging
-import openai
+import threading
 from config.ai_config import AI_CONFIG
 
 logger = logging.getLogger(__name__)
@@ -8,25 +8,41 @@ logger = logging.getLogger(__name__)
 class OpenAIService:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY')
-        self.client = None
-        self._initialize_client()
+        self._client = None
+        self._client_initialized = False
+        self._lock = threading.Lock()
+
+        if not self.api_key:
+            logger.warning("OpenAI API key not found. OpenAI services will be unavailable.")
+
+    @property
+    def client(self):
+        """The openai module, imported and configured on first use"""
+        if not self._client_initialized:
+            with self._lock:
+                if not self._client_initialized:
+                    self._initialize_client()
+                    self._client_initialized = True
+        return self._client
     
     def _initialize_client(self):
         """Initialize OpenAI client"""
         try:
             if self.api_key:
+                import openai
+
                 openai.api_key = self.api_key
-                self.client = openai
+                if AI_CONFIG['openai']['api_base']:
+                    openai.api_base = AI_CONFIG['openai']['api_base']
+                self._client = openai
                 logger.info("OpenAI client initialized successfully")
-            else:
-                logger.warning("OpenAI API key not found. OpenAI services will be unavailable.")
         except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {str(e)}")
+            logger.error("Failed to initialize OpenAI client: %s", e)
     
     def generate_text(self, prompt, max_length=100, temperature=0.7):
         """Generate text using OpenAI GPT"""
         try:
-            if not self.client or not self.api_key:
+            if not self.api_key or not self.client:
                 raise Exception("OpenAI client not available")
             
             response = self.client.Completion.create(
@@ -35,19 +51,20 @@ class OpenAIService:
                 max_tokens=max_length,
                 temperature=temperature,
                 n=1,
-                stop=None
+                stop=None,
+                request_timeout=AI_CONFIG['openai']['request_timeout']
             )
             
             return response.choices[0].text.strip()
             
         except Exception as e:
-            logger.error(f"OpenAI text generation failed: {str(e)}")
+            logger.error("OpenAI text generation failed: %s", e)
             raise
     
     def generate_quiz_question(self, topic, difficulty='medium'):
         """Generate quiz question using OpenAI"""
         try:
-            if not self.client or not self.api_key:
+            if not self.api_key or not self.client:
                 raise Exception("OpenAI client not available")
             
             prompt = f"""Generate a {difficulty} difficulty multiple choice question about {topic}.
@@ -70,19 +87,20 @@ Difficulty: {difficulty}"""
                 max_tokens=300,
                 temperature=0.7,
                 n=1,
-                stop=None
+                stop=None,
+                request_timeout=AI_CONFIG['openai']['request_timeout']
             )
             
             return response.choices[0].text.strip()
             
         except Exception as e:
-            logger.error(f"OpenAI quiz generation failed: {str(e)}")
+            logger.error("OpenAI quiz generation failed: %s", e)
             raise
     
     def analyze_text_with_gpt(self, text, analysis_type='general'):
         """Analyze text using OpenAI GPT"""
         try:
-            if not self.client or not self.api_key:
+            if not self.api_key or not self.client:
                 raise Exception("OpenAI client not available")
             
             prompts = {
@@ -100,19 +118,20 @@ Difficulty: {difficulty}"""
                 max_tokens=200,
                 temperature=0.3,
                 n=1,
-                stop=None
+                stop=None,
+                request_timeout=AI_CONFIG['openai']['request_timeout']
             )
             
             return response.choices[0].text.strip()
             
         except Exception as e:
-            logger.error(f"OpenAI text analysis failed: {str(e)}")
+            logger.error("OpenAI text analysis failed: %s", e)
             raise
     
     def generate_recommendations(self, user_preferences, context='general'):
         """Generate recommendations using OpenAI"""
         try:
-            if not self.client or not self.api_key:
+            if not self.api_key or not self.client:
                 raise Exception("OpenAI client not available")
             
             prompt = f"""Based on the following user preferences, generate 5 personalized recommendations:
@@ -133,15 +152,16 @@ Please provide recommendations in the following format:
                 max_tokens=400,
                 temperature=0.7,
                 n=1,
-                stop=None
+                stop=None,
+                request_timeout=AI_CONFIG['openai']['request_timeout']
             )
             
             return response.choices[0].text.strip()
             
         except Exception as e:
-            logger.error(f"OpenAI recommendations failed: {str(e)}")
+            logger.error("OpenAI recommendations failed: %s", e)
             raise
     
     def is_available(self):
         """Check if OpenAI service is available"""
-        return self.client is not None and self.api_key is not None
\ No newline at end of file
+        return self.api_key is not None and self.client is not None
\ No newline at end of file
@@ -38,7 +38,7 @@ class PostprocessingService:
             return formatted_result
             
         except Exception as e:
-            logger.error(f"Sentiment result formatting failed: {str(e)}")
+            logger.error("Sentiment result formatting failed: %s", e)
             return self._get_default_sentiment()
     
     def format_text_analysis_result(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -63,7 +63,7 @@ class PostprocessingService:
             return formatted_result
             
         except Exception as e:
-            logger.error(f"Text analysis result formatting failed: {str(e)}")
+            logger.error("Text analysis result formatting failed: %s", e)
             return {}
     
     def format_quiz_result(self, quiz_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -107,7 +107,7 @@ class PostprocessingService:
             return formatted_result
             
         except Exception as e:
-            logger.error(f"Quiz result formatting failed: {str(e)}")
+            logger.error("Quiz result formatting failed: %s", e)
             return {}
     
     def format_recommendations(self, recommendations_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -147,7 +147,7 @@ class PostprocessingService:
             return formatted_result
             
         except Exception as e:
-            logger.error(f"Recommendations formatting failed: {str(e)}")
+            logger.error("Recommendations formatting failed: %s", e)
             return {}
     
     def _get_confidence_level(self, confidence: float) -> str:
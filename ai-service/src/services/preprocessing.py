@@ -1,6 +1,8 @@
 import re
 import logging
 from typing import List, Dict, Any
+from config.ai_config import AI_CONFIG
+from services.language_detection import get_language_detector
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +19,44 @@ class PreprocessingService:
                 'go', 'no', 'way', 'could', 'my', 'than', 'first', 'been', 'call',
                 'who', 'oil', 'sit', 'now', 'find', 'down', 'day', 'did', 'get',
                 'come', 'made', 'may', 'part'
+            },
+            'spanish': {
+                'a', 'al', 'como', 'con', 'de', 'del', 'el', 'en', 'es', 'esta', 'este',
+                'fue', 'ha', 'la', 'las', 'le', 'lo', 'los', 'me', 'mi', 'muy', 'no',
+                'o', 'para', 'pero', 'por', 'que', 'se', 'si', 'sin', 'su', 'sus',
+                'también', 'un', 'una', 'y', 'ya', 'yo'
+            },
+            'french': {
+                'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'elle',
+                'en', 'est', 'et', 'il', 'ils', 'je', 'la', 'le', 'les', 'leur', 'mais',
+                'me', 'ne', 'nous', 'on', 'ou', 'par', 'pas', 'pour', 'qu', 'que', 'qui',
+                'sa', 'se', 'son', 'sur', 'un', 'une', 'vous'
+            },
+            'german': {
+                'auf', 'aus', 'bei', 'das', 'dass', 'dem', 'den', 'der', 'des', 'die',
+                'ein', 'eine', 'einer', 'er', 'es', 'für', 'hat', 'ich', 'im', 'in',
+                'ist', 'mit', 'nicht', 'noch', 'oder', 'sich', 'sie', 'sind', 'und',
+                'von', 'war', 'wie', 'wir', 'zu', 'zum'
+            },
+            'italian': {
+                'a', 'al', 'che', 'con', 'da', 'del', 'della', 'di', 'e', 'è', 'gli',
+                'i', 'il', 'in', 'la', 'le', 'lo', 'ma', 'mi', 'non', 'per', 'più',
+                'si', 'sono', 'su', 'un', 'una', 'uno'
+            },
+            'portuguese': {
+                'a', 'ao', 'as', 'com', 'como', 'da', 'das', 'de', 'do', 'dos', 'e',
+                'é', 'em', 'ele', 'ela', 'mais', 'mas', 'na', 'no', 'não', 'o', 'os',
+                'para', 'por', 'que', 'se', 'um', 'uma'
+            },
+            'dutch': {
+                'aan', 'al', 'bij', 'de', 'dat', 'die', 'dit', 'een', 'en', 'er', 'het',
+                'hij', 'ik', 'in', 'is', 'je', 'maar', 'met', 'niet', 'of', 'om', 'op',
+                'te', 'van', 'voor', 'was', 'wat', 'ze', 'zijn'
             }
         }
     
     def clean_text(self, text: str, language: str = 'english') -> str:
-        """Clean and preprocess text"""
+        """Clean and preprocess text; letters outside ASCII are kept for languages other than English"""
         try:
             if not text or not isinstance(text, str):
                 return ""
@@ -39,7 +74,10 @@ class PreprocessingService:
             text = re.sub(r'<[^>]+>', '', text)
             
             # Remove special characters but keep spaces and basic punctuation
-            text = re.sub(r'[^a-zA-Z0-9\s\.\,\!\?\;\:]', '', text)
+            if language == 'english':
+                text = re.sub(r'[^a-zA-Z0-9\s\.\,\!\?\;\:]', '', text)
+            else:
+                text = re.sub(r'[^\w\s\.\,\!\?\;\:]|_', '', text)
             
             # Remove extra whitespace
             text = re.sub(r'\s+', ' ', text)
@@ -50,7 +88,7 @@ class PreprocessingService:
             return text
             
         except Exception as e:
-            logger.error(f"Text cleaning failed: {str(e)}")
+            logger.error("Text cleaning failed: %s", e)
             return text if isinstance(text, str) else ""
     
     def tokenize(self, text: str) -> List[str]:
@@ -64,7 +102,7 @@ class PreprocessingService:
             return tokens
             
         except Exception as e:
-            logger.error(f"Tokenization failed: {str(e)}")
+            logger.error("Tokenization failed: %s", e)
             return []
     
     def remove_stop_words(self, tokens: List[str], language: str = 'english') -> List[str]:
@@ -74,7 +112,7 @@ class PreprocessingService:
             return [token for token in tokens if token not in stop_words]
             
         except Exception as e:
-            logger.error(f"Stop word removal failed: {str(e)}")
+            logger.error("Stop word removal failed: %s", e)
             return tokens
     
     def normalize_text(self, text: str) -> str:
@@ -95,7 +133,7 @@ class PreprocessingService:
             return text
             
         except Exception as e:
-            logger.error(f"Text normalization failed: {str(e)}")
+            logger.error("Text normalization failed: %s", e)
             return text if isinstance(text, str) else ""
     
     def extract_features(self, text: str) -> Dict[str, Any]:
@@ -124,7 +162,7 @@ class PreprocessingService:
             return features
             
         except Exception as e:
-            logger.error(f"Feature extraction failed: {str(e)}")
+            logger.error("Feature extraction failed: %s", e)
             return {}
     
     def prepare_for_model(self, texts: List[str], max_length: int = 512) -> List[str]:
@@ -145,35 +183,20 @@ class PreprocessingService:
             return processed_texts
             
         except Exception as e:
-            logger.error(f"Model preparation failed: {str(e)}")
+            logger.error("Model preparation failed: %s", e)
             return texts
     
     def detect_language(self, text: str) -> str:
-        """Simple language detection (basic implementation)"""
+        """Detect the language of text with character n-gram profiles"""
         try:
             if not text:
                 return 'unknown'
             
-            # Very basic language detection based on common words
-            english_indicators = ['the', 'and', 'is', 'in', 'to', 'of', 'a', 'that', 'it', 'with']
-            spanish_indicators = ['el', 'la', 'de', 'que', 'y', 'en', 'un', 'es', 'se', 'no']
-            french_indicators = ['le', 'de', 'et', 'à', 'un', 'il', 'être', 'et', 'en', 'avoir']
-            
-            text_lower = text.lower()
+            # None when the text is too short or too close between languages to call
+            language = get_language_detector().detect(text)
             
-            english_count = sum(1 for word in english_indicators if word in text_lower)
-            spanish_count = sum(1 for word in spanish_indicators if word in text_lower)
-            french_count = sum(1 for word in french_indicators if word in text_lower)
-            
-            if english_count >= spanish_count and english_count >= french_count:
-                return 'english'
-            elif spanish_count >= french_count:
-                return 'spanish'
-            elif french_count > 0:
-                return 'french'
-            else:
-                return 'english'  # Default to English
+            return language or 'unknown'
                 
         except Exception as e:
-            logger.error(f"Language detection failed: {str(e)}")
-            return 'english'
\ No newline at end of file
+            logger.error("Language detection failed: %s", e)
+            return AI_CONFIG['language']['default']
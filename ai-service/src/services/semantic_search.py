@@ -0,0 +1,217 @@
+import os
+import shutil
+import logging
+import threading
+import numpy as np
+from config.ai_config import AI_CONFIG
+from models.vector_index import VectorIndex
+from models.vector_journal import VectorJournal
+from services.embedding_service import EmbeddingService, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+# Post fields kept with each vector and returned with search results
+_METADATA_FIELDS = ('title', 'category', 'tags')
+
+_JOURNAL_FILE = 'journal.sqlite3'
+
+
+def document_text(post: dict) -> str:
+    """The text embedded for a post: title, then content"""
+    return '\n'.join(part for part in (post.get('title'), post.get('content') or post.get('text')) if part)
+
+
+class IndexModelMismatch(RuntimeError):
+    """The semantic index holds vectors from a different embedding model"""
+
+
+class SemanticSearch:
+    """Embeds posts into a shared vector index and answers similarity queries.
+
+    Updates are appended to a VectorJournal next to the index, and each
+    worker applies the journal to its in-memory VectorIndex before serving,
+    so posts indexed through one worker are searchable through all of them.
+    Once ``save_every`` changes accumulate, the worker that notices writes a
+    snapshot of its index and publishes it through the journal.
+
+    Vectors from different models are not comparable: if the embedder's
+    model differs from the index's (e.g. it fell back to hashed vectors),
+    indexing and search raise IndexModelMismatch instead of touching the
+    index.
+    """
+
+    def __init__(self, embedder: EmbeddingService = None, journal: VectorJournal = None, settings=None):
+        self.settings = settings or AI_CONFIG['embeddings']
+        self.embedder = embedder or EmbeddingService(self.settings)
+        self.index_path = self.settings['index_path']
+        self.journal = journal or VectorJournal(os.path.join(self.index_path, _JOURNAL_FILE))
+        self.index = self._new_index()
+        self._seen = -1
+        self._journal_model = None
+        self._lock = threading.Lock()
+
+    def _new_index(self) -> VectorIndex:
+        return VectorIndex(ivf_threshold=self.settings['ivf_threshold'], nprobe=self.settings['nprobe'])
+
+    def _sync(self):
+        """Bring the in-memory index up to date with the journal"""
+        with self._lock:
+            for _ in range(3):
+                snapshot_seq, snapshot_dir, model, changes = self.journal.state(self._seen)
+                if self._seen < snapshot_seq or self._seen < 0:
+                    # Behind the latest snapshot (or nothing loaded yet);
+                    # before any snapshot, an index saved directly under
+                    # index_path is the starting point
+                    index = self._new_index()
+                    path = os.path.join(self.index_path, snapshot_dir or '')
+                    if os.path.exists(os.path.join(path, 'meta.json')) and not index.load(path):
+                        # Replaced by a newer snapshot while loading
+                        continue
+                    if model is None and index.model is not None:
+                        model = self.journal.claim_model(index.model)
+                    self.index = index
+                    self._seen = snapshot_seq
+                self._journal_model = model
+                self._apply(changes)
+                return
+            raise RuntimeError("Could not load a semantic index snapshot")
+
+    def _apply(self, changes):
+        added = []
+        for seq, item_id, vector, metadata in changes:
+            if vector is None:
+                self._add(added)
+                added = []
+                self.index.remove([item_id])
+            else:
+                added.append((item_id, vector, metadata))
+            self._seen = seq
+        self._add(added)
+
+    def _add(self, added):
+        if added:
+            ids, vectors, metadata = zip(*added)
+            self.index.add(list(ids), np.stack(vectors), list(metadata), model=self._journal_model)
+
+    def _check_model(self) -> str:
+        model = self.embedder.model_name
+        indexed = self._journal_model or self.index.model
+        if indexed not in (None, model):
+            raise IndexModelMismatch(
+                f"The semantic index was built with {indexed}, but posts are embedded with {model}; "
+                f"rebuild the index under {self.index_path} to switch models")
+        return model
+
+    def index_posts(self, posts, persist=False) -> dict:
+        """Embed and upsert posts ({'id', 'title', 'content', 'category', 'tags'})"""
+        self._sync()
+        model = self._check_model()
+        posts = [post for post in posts if document_text(post)]
+        if posts:
+            vectors = self.embedder.embed([document_text(post) for post in posts])
+            metadata = [{field: post[field] for field in _METADATA_FIELDS if post.get(field) is not None}
+                        for post in posts]
+            try:
+                self.journal.append(model, [str(post['id']) for post in posts], vectors, metadata)
+            except ValueError as e:
+                raise IndexModelMismatch(str(e)) from e
+            self._sync()
+
+        if persist or self.journal.pending() >= self.settings['save_every']:
+            self.save()
+        return {'indexed': len(posts), 'total': len(self.index), 'model': model}
+
+    def remove_posts(self, ids) -> int:
+        self._sync()
+        ids = [str(item_id) for item_id in ids]
+        present = [item_id for item_id in ids if item_id in self.index]
+        if present:
+            self.journal.append(None, present)
+            self._sync()
+        return len(present)
+
+    def save(self):
+        """Snapshot the index and publish it, so the journal can drop the changes it covers"""
+        try:
+            with self._lock:
+                seq = self._seen
+                if seq <= 0:
+                    return
+                directory = f"snapshot-{seq}-{os.getpid()}"
+                path = os.path.join(self.index_path, directory)
+                self.index.save(path)
+                published = self.journal.publish_snapshot(seq, directory)
+
+            if not published:
+                shutil.rmtree(path, ignore_errors=True)
+                return
+            # Older snapshots are superseded; newer ones may still be being written
+            for name in os.listdir(self.index_path):
+                parts = name.split('-')
+                if name != directory and parts[0] == 'snapshot' and len(parts) == 3 \
+                        and parts[1].isdigit() and int(parts[1]) <= seq:
+                    shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
+        except Exception as e:
+            # The changes are safe in the journal; a later save retries
+            logger.error("Semantic index snapshot failed: %s", e)
+
+    def search(self, query: str, limit: int = 10, category: str = None):
+        """Posts most similar to a free-text query"""
+        self._sync()
+        self._check_model()
+        return self.index.search(self.embedder.embed([query])[0], limit, category=category)
+
+    def similar_to_posts(self, post_ids, limit: int = 10, category: str = None):
+        """Posts closest to the mean of the given posts' vectors, excluding them"""
+        self._sync()
+        self._check_model()
+        vectors = [self.index.vector(str(item_id)) for item_id in post_ids]
+        vectors = [vector for vector in vectors if vector is not None]
+        if not vectors:
+            return []
+        query = normalize_rows(np.mean(vectors, axis=0, keepdims=True))[0]
+        return self.index.search(query, limit, exclude={str(item_id) for item_id in post_ids}, category=category)
+
+    def recommend(self, preferences, limit: int = 10):
+        """Cold-start recommendations from liked posts, or else from preferred categories and tags"""
+        self._sync()
+        if not len(self.index):
+            return []
+
+        liked = preferences.get('liked_items') or preferences.get('item_ids') or []
+        matches = self.similar_to_posts(liked, limit) if liked else []
+        reasoning = 'Similar to posts you liked'
+        if not matches:
+            terms = list(preferences.get('categories', [])) + list(preferences.get('tags', []))
+            if not terms:
+                return []
+            matches = self.search(' '.join(terms), limit)
+            reasoning = f"Related to your interests: {', '.join(terms)}"
+
+        return [
+            {
+                'id': rank + 1,
+                'item_id': match['id'],
+                'title': match.get('title', f"Item {match['id']}"),
+                'description': 'Recommended by content similarity',
+                'score': match['score'],
+                'category': match.get('category', 'general'),
+                'tags': match.get('tags', []),
+                'reasoning': reasoning
+            }
+            for rank, match in enumerate(match for match in matches if match['score'] > 0)
+        ]
+
+
+_search = None
+_search_lock = threading.Lock()
+
+
+def get_semantic_search() -> SemanticSearch:
+    """Return the process-wide semantic search, loading its index on first use"""
+    global _search
+    if _search is None:
+        with _search_lock:
+            if _search is None:
+                _search = SemanticSearch()
+    return _search
@@ -0,0 +1,183 @@
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from config.ai_config import AI_CONFIG
+from utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_SIMPLE_TYPES = (str, int, float, bool, type(None))
+
+
+def _text_digest(text) -> bytes:
+    data = text if isinstance(text, str) else repr(text)
+    return hashlib.blake2b(data.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def _options_key(kwargs):
+    """Hashable form of the tokenizer options, or None if they can't be keyed"""
+    if not all(isinstance(value, _SIMPLE_TYPES) for value in kwargs.values()):
+        return None
+    return tuple(sorted(kwargs.items()))
+
+
+def tokenizer_key(tokenizer) -> tuple:
+    # Pipelines that load the same tokenizer files share entries
+    return (getattr(tokenizer, 'name_or_path', '') or id(tokenizer), getattr(tokenizer, 'is_fast', False))
+
+
+class TokenizationCache:
+    """Bounded LRU of tokenizer outputs keyed by (tokenizer, text hash, options).
+
+    Single texts are cached as whole encodings, which is how pipelines call
+    their tokenizer. Lists of plain strings without ``return_tensors`` are
+    cached per text, and only the misses are encoded, in one batched call.
+    Entries are evicted when either the entry or the token budget is
+    exceeded.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_tokens: int = 2000000):
+        self.max_entries = max_entries
+        self.max_tokens = max_tokens
+        self._entries = OrderedDict()
+        self._tokens = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.inc('tokenization', 'hit')
+                return entry[0]
+        CACHE_REQUESTS.inc('tokenization', 'miss')
+        return None
+
+    def _put(self, key, value, tokens):
+        if tokens > self.max_tokens:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._tokens -= previous[1]
+            self._entries[key] = (value, tokens)
+            self._tokens += tokens
+            while len(self._entries) > self.max_entries or self._tokens > self.max_tokens:
+                _, (_, evicted_tokens) = self._entries.popitem(last=False)
+                self._tokens -= evicted_tokens
+
+    def encode(self, tokenizer, encode, text, kwargs):
+        """Tokenize ``text`` with ``encode(text, **kwargs)``, reusing cached results"""
+        options = _options_key(kwargs)
+        if options is None or text is None:
+            return encode(text, **kwargs)
+
+        prefix = (tokenizer_key(tokenizer), options)
+        if isinstance(text, list) and text and kwargs.get('return_tensors') is None \
+                and all(isinstance(item, str) for item in text):
+            return self._encode_items(prefix, encode, text, kwargs)
+
+        key = prefix + (_text_digest(text),)
+        cached = self._get(key)
+        if cached is None:
+            cached = encode(text, **kwargs)
+            self._put(key, cached, _token_count(cached))
+        # Pipelines pop fields off the encoding they are given
+        return copy.copy(cached)
+
+    def _encode_items(self, prefix, encode, texts, kwargs):
+        from transformers import BatchEncoding
+
+        keys = [prefix + (_text_digest(text),) for text in texts]
+        items = [self._get(key) for key in keys]
+
+        missing = [index for index, item in enumerate(items) if item is None]
+        if missing:
+            # One batched call, so fast tokenizers encode the misses in parallel
+            encoded = encode([texts[index] for index in missing], **kwargs)
+            encodings = encoded.encodings if getattr(encoded, 'is_fast', False) else None
+            for position, index in enumerate(missing):
+                item = ({name: values[position] for name, values in encoded.items()},
+                        encodings[position] if encodings else None)
+                items[index] = item
+                self._put(keys[index], item, len(item[0].get('input_ids', ())))
+
+        data = {name: [item[0][name] for item in items] for name in items[0][0]}
+        encodings = [item[1] for item in items]
+        return BatchEncoding(data, encoding=encodings if all(encodings) else None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'tokens': self._tokens}
+
+
+def _token_count(encoding) -> int:
+    input_ids = encoding.get('input_ids') if hasattr(encoding, 'get') else None
+    if input_ids is None:
+        return 0
+    shape = getattr(input_ids, 'shape', None)
+    if shape is not None:
+        count = 1
+        for size in shape:
+            count *= int(size)
+        return count
+    if input_ids and isinstance(input_ids[0], list):
+        return sum(len(ids) for ids in input_ids)
+    return len(input_ids)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_cached_classes = {}
+
+
+def get_tokenization_cache() -> TokenizationCache:
+    """Return the process-wide cache shared by every pipeline's tokenizer"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = AI_CONFIG['tokenization']
+                _cache = TokenizationCache(settings['max_entries'], settings['max_tokens'])
+    return _cache
+
+
+def enable_tokenization_cache(tokenizer):
+    """Route a tokenizer's calls through the shared cache.
+
+    The instance is switched to a subclass of its own class that only
+    overrides ``__call__``, so isinstance checks and every other tokenizer
+    method the pipelines rely on are unchanged.
+    """
+    if tokenizer is None or getattr(tokenizer, '_tokenization_cached', False):
+        return tokenizer
+
+    base = type(tokenizer)
+    with _cache_lock:
+        cached_class = _cached_classes.get(base)
+        if cached_class is None:
+            def __call__(self, text=None, *args, **kwargs):
+                if args:
+                    return base.__call__(self, text, *args, **kwargs)
+                return get_tokenization_cache().encode(
+                    self, lambda value, **options: base.__call__(self, value, **options), text, kwargs
+                )
+
+            cached_class = type(f"Cached{base.__name__}", (base,), {
+                '__call__': __call__,
+                '_tokenization_cached': True
+            })
+            _cached_classes[base] = cached_class
+
+    tokenizer.__class__ = cached_class
+    if not getattr(tokenizer, 'is_fast', False):
+        logger.warning("Tokenizer %s is not a fast tokenizer; batches are encoded in Python",
+                       getattr(tokenizer, 'name_or_path', base.__name__))
+    return tokenizer
@@ -0,0 +1,132 @@
+import time
+import logging
+import threading
+from config.ai_config import AI_CONFIG
+from utils.metrics import WARMUP_SECONDS
+from utils.readiness import READINESS
+
+logger = logging.getLogger(__name__)
+
+_WARMUP_WORDS = ('the', 'quiz', 'covers', 'science', 'history', 'and', 'language', 'topics')
+
+
+def _dummy_text(tokens: int) -> str:
+    # Roughly one token per word; leave room for the special tokens
+    count = max(1, tokens - 2)
+    return ' '.join(_WARMUP_WORDS[i % len(_WARMUP_WORDS)] for i in range(count))
+
+
+class WarmUp:
+    """Loads models and runs representative dummy batches before readiness.
+
+    Each step is timed and reported through /ready and the
+    ``ai_warmup_seconds`` gauge. A failing step is logged and recorded but
+    does not keep the worker out of service, since every feature has a
+    fallback path.
+    """
+
+    def __init__(self, analysis_controller, prediction_controller, settings=None):
+        self.analysis_controller = analysis_controller
+        self.prediction_controller = prediction_controller
+        self.settings = settings or AI_CONFIG['warmup']
+        self.timings = {}
+        self.errors = {}
+
+    def _step(self, name, func):
+        start = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            self.errors[name] = str(e)
+        elapsed = time.perf_counter() - start
+        self.timings[name] = round(elapsed, 4)
+        WARMUP_SECONDS.set(elapsed, name)
+
+    def _warm_language_detector(self):
+        from services.language_detection import get_language_detector
+        get_language_detector().detect('warming up the language detector')
+
+    def _warm_image_model(self):
+        from PIL import Image
+
+        image = Image.new('RGB', (256, 256), (120, 80, 40))
+        image_model = self.analysis_controller.image_model
+        image_model.analyze_all(image)
+        image_model.perceptual_hashes(image)
+
+    def _warm_recommendation_model(self):
+        model = self.prediction_controller.recommendation_model
+        if model.user_features is None:
+            model._load_model()
+
+    def _warm_model(self, name):
+        # Text generation is served by the prediction controller's service
+        if name.partition(':')[0] == 'text_generation':
+            hf_service = self.prediction_controller.hf_service
+        else:
+            hf_service = self.analysis_controller.hf_service
+        batch_size = max(1, self.settings.get('batch_size', 4))
+
+        self._step(f'load:{name}', lambda: hf_service.load_models([name]))
+        if name not in hf_service.loaded_models():
+            self.errors.setdefault(f'load:{name}', 'pipeline unavailable')
+            return
+
+        # The first passes at each length allocate kernels and buffers
+        # (and start the torch intra-op thread pool) outside of any request
+        for length in self.settings.get('sequence_lengths', []):
+            texts = [_dummy_text(length)] * batch_size
+            self._step(f'{name}:{length}', lambda: hf_service.warm_up(name, texts))
+
+    def _model_names(self):
+        names = list(self.settings.get('models', []))
+        # auto switches to the fast tier under load, which is the worst
+        # time to load a model
+        if AI_CONFIG['quality']['default'] != 'accurate':
+            names += [f"{name}:fast" for name in names if ':' not in name and f"{name}:fast" not in names]
+        return names
+
+    def run(self) -> dict:
+        start = time.perf_counter()
+        READINESS.mark_not_ready('warming up')
+
+        try:
+            self._step('language_detector', self._warm_language_detector)
+            self._step('image_model', self._warm_image_model)
+            self._step('recommendation_model', self._warm_recommendation_model)
+            for name in self._model_names():
+                self._warm_model(name)
+        except Exception as e:
+            logger.error("Warm-up aborted: %s", e)
+            self.errors['warmup'] = str(e)
+        finally:
+            total = time.perf_counter() - start
+            WARMUP_SECONDS.set(total, 'total')
+            report = {'total_seconds': round(total, 4), 'steps': self.timings}
+            if self.errors:
+                report['errors'] = self.errors
+
+            # A cold worker is still better than one that never takes traffic
+            READINESS.set_detail('warmup', report)
+            READINESS.mark_ready()
+
+        logger.info("Warm-up finished in %.2fs", total, extra={'warmup': report})
+        return report
+
+
+def start_warmup(analysis_controller, prediction_controller, settings=None):
+    """Warm up per configuration, then mark the worker ready"""
+    settings = settings or AI_CONFIG['warmup']
+    if not settings.get('enabled'):
+        READINESS.mark_ready()
+        return None
+
+    warmup = WarmUp(analysis_controller, prediction_controller, settings)
+    if settings.get('background', True):
+        thread = threading.Thread(target=warmup.run, name='warmup', daemon=True)
+        thread.start()
+        return thread
+
+    warmup.run()
+    return None
@@ -0,0 +1,18 @@
+def length_buckets(lengths, batch_size):
+    """Split input indices into batches of similar length, longest first"""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def length_cap(lengths, settings):
+    """Token limit for one request's inputs: the hard cap, or lower when a
+    dynamic length quantile is configured"""
+    cap = settings['max_sequence_length']
+    quantile = settings.get('dynamic_length_quantile')
+    if quantile and lengths:
+        ranked = sorted(lengths)
+        dynamic = ranked[min(len(ranked) - 1, int(quantile * len(ranked)))]
+        # Multiples of 8 give the matmul kernels friendlier shapes
+        dynamic = -(-dynamic // 8) * 8
+        cap = min(cap, max(settings['min_sequence_length'], dynamic))
+    return cap
@@ -16,7 +16,7 @@ class FileHandler:
         try:
             os.makedirs(path, exist_ok=True)
         except Exception as e:
-            logger.error(f"Failed to create directory {path}: {str(e)}")
+            logger.error("Failed to create directory %s: %s", path, e)
     
     def save_json(self, data: Dict[str, Any], filename: str) -> bool:
         """Save data as JSON file"""
@@ -24,10 +24,10 @@ class FileHandler:
             filepath = os.path.join(self.base_path, filename)
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"JSON data saved to {filepath}")
+            logger.info("JSON data saved to %s", filepath)
             return True
         except Exception as e:
-            logger.error(f"Failed to save JSON to {filename}: {str(e)}")
+            logger.error("Failed to save JSON to %s: %s", filename, e)
             return False
     
     def load_json(self, filename: str) -> Dict[str, Any]:
@@ -35,15 +35,15 @@ class FileHandler:
         try:
             filepath = os.path.join(self.base_path, filename)
             if not os.path.exists(filepath):
-                logger.warning(f"JSON file not found: {filepath}")
+                logger.warning("JSON file not found: %s", filepath)
                 return {}
             
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
-            logger.info(f"JSON data loaded from {filepath}")
+            logger.info("JSON data loaded from %s", filepath)
             return data
         except Exception as e:
-            logger.error(f"Failed to load JSON from {filename}: {str(e)}")
+            logger.error("Failed to load JSON from %s: %s", filename, e)
             return {}
     
     def save_pickle(self, data: Any, filename: str) -> bool:
@@ -52,10 +52,10 @@ class FileHandler:
             filepath = os.path.join(self.base_path, filename)
             with open(filepath, 'wb') as f:
                 pickle.dump(data, f)
-            logger.info(f"Pickle data saved to {filepath}")
+            logger.info("Pickle data saved to %s", filepath)
             return True
         except Exception as e:
-            logger.error(f"Failed to save pickle to {filename}: {str(e)}")
+            logger.error("Failed to save pickle to %s: %s", filename, e)
             return False
     
     def load_pickle(self, filename: str) -> Any:
@@ -63,15 +63,15 @@ class FileHandler:
         try:
             filepath = os.path.join(self.base_path, filename)
             if not os.path.exists(filepath):
-                logger.warning(f"Pickle file not found: {filepath}")
+                logger.warning("Pickle file not found: %s", filepath)
                 return None
             
             with open(filepath, 'rb') as f:
                 data = pickle.load(f)
-            logger.info(f"Pickle data loaded from {filepath}")
+            logger.info("Pickle data loaded from %s", filepath)
             return data
         except Exception as e:
-            logger.error(f"Failed to load pickle from {filename}: {str(e)}")
+            logger.error("Failed to load pickle from %s: %s", filename, e)
             return None
     
     def save_text(self, text: str, filename: str) -> bool:
@@ -80,10 +80,10 @@ class FileHandler:
             filepath = os.path.join(self.base_path, filename)
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(text)
-            logger.info(f"Text saved to {filepath}")
+            logger.info("Text saved to %s", filepath)
             return True
         except Exception as e:
-            logger.error(f"Failed to save text to {filename}: {str(e)}")
+            logger.error("Failed to save text to %s: %s", filename, e)
             return False
     
     def load_text(self, filename: str) -> str:
@@ -91,15 +91,15 @@ class FileHandler:
         try:
             filepath = os.path.join(self.base_path, filename)
             if not os.path.exists(filepath):
-                logger.warning(f"Text file not found: {filepath}")
+                logger.warning("Text file not found: %s", filepath)
                 return ""
             
             with open(filepath, 'r', encoding='utf-8') as f:
                 text = f.read()
-            logger.info(f"Text loaded from {filepath}")
+            logger.info("Text loaded from %s", filepath)
             return text
         except Exception as e:
-            logger.error(f"Failed to load text from {filename}: {str(e)}")
+            logger.error("Failed to load text from %s: %s", filename, e)
             return ""
     
     def list_files(self, extension: str = None) -> List[str]:
@@ -113,7 +113,7 @@ class FileHandler:
                         files.append(filename)
             return files
         except Exception as e:
-            logger.error(f"Failed to list files: {str(e)}")
+            logger.error("Failed to list files: %s", e)
             return []
     
     def delete_file(self, filename: str) -> bool:
@@ -122,13 +122,13 @@ class FileHandler:
             filepath = os.path.join(self.base_path, filename)
             if os.path.exists(filepath):
                 os.remove(filepath)
-                logger.info(f"File deleted: {filepath}")
+                logger.info("File deleted: %s", filepath)
                 return True
             else:
-                logger.warning(f"File not found for deletion: {filepath}")
+                logger.warning("File not found for deletion: %s", filepath)
                 return False
         except Exception as e:
-            logger.error(f"Failed to delete file {filename}: {str(e)}")
+            logger.error("Failed to delete file %s: %s", filename, e)
             return False
     
     def file_exists(self, filename: str) -> bool:
@@ -144,5 +144,5 @@ class FileHandler:
                 return os.path.getsize(filepath)
             return 0
         except Exception as e:
-            logger.error(f"Failed to get file size for {filename}: {str(e)}")
+            logger.error("Failed to get file size for %s: %s", filename, e)
             return 0
\ No newline at end of file
@@ -1,41 +1,152 @@
-import logging
 import os
-from datetime import datetime
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# Request id of the request being handled by the current thread/context
+request_id_var = contextvars.ContextVar('request_id', default=None)
+
+_listener = None
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id to every record"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO and DEBUG records; warnings always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with request id, timings and `extra` fields"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key != 'request_id':
+                entry[key] = value
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class DeferredFormatQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record):
+        # Only merge the %-args now, since they may change after the call
+        # returns; JSON encoding and traceback rendering happen off-thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _file_handler(log_file):
+    rotation = os.getenv('LOG_ROTATION', 'size').lower()
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', 5))
+
+    if rotation == 'time':
+        return TimedRotatingFileHandler(
+            log_file,
+            when=os.getenv('LOG_ROTATION_WHEN', 'midnight'),
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+
+    return RotatingFileHandler(
+        log_file,
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+
 
 def setup_logger():
-    """Setup logging configuration"""
-    
-    # Create logs directory if it doesn't exist
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    
+    """Setup logging configuration
+
+    Request threads only enqueue records; a QueueListener thread formats them
+    and writes to the rotating file and console handlers. Calling this again
+    is a no-op, so handlers are never duplicated.
+    """
+    global _listener
+
+    root_logger = logging.getLogger()
+    if _listener is not None:
+        return root_logger
+
     # Configure logging
-    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
-    
+    log_level = getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper())
+    log_file = os.getenv('LOG_FILE', 'logs/ai_service.log')
+
+    # Create logs directory if it doesn't exist
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    # Setup file handler
-    log_filename = f"{log_dir}/ai_service_{datetime.now().strftime('%Y%m%d')}.log"
-    file_handler = logging.FileHandler(log_filename)
-    file_handler.setLevel(getattr(logging, log_level))
+    if os.getenv('LOG_FORMAT', 'json').lower() == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+        )
+
+    file_handler = _file_handler(log_file)
     file_handler.setFormatter(formatter)
-    
-    # Setup console handler
+
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(getattr(logging, log_level))
     console_handler.setFormatter(formatter)
-    
+
+    # Request threads hand records to the queue and return immediately
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredFormatQueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    queue_handler.addFilter(SamplingFilter(float(os.getenv('LOG_INFO_SAMPLE_RATE', 1.0))))
+    queue_handler.addFilter(RequestContextFilter())
+
+    _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
     # Configure root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, log_level))
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(queue_handler)
+
     # Suppress some noisy loggers
     logging.getLogger('urllib3').setLevel(logging.WARNING)
     logging.getLogger('transformers').setLevel(logging.WARNING)
-    
-    return root_logger
\ No newline at end of file
+
+    return root_logger
@@ -0,0 +1,99 @@
+import os
+import sys
+import logging
+import threading
+from config.settings import get_config
+
+logger = logging.getLogger(__name__)
+
+# Thread-count variables read by OpenMP, MKL and OpenBLAS when they load
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+_torch_configured = False
+_torch_lock = threading.Lock()
+_plan = None
+
+
+def thread_plan(worker_index=None, config=None) -> dict:
+    """Thread counts and CPU set for one worker, derived from Config"""
+    config = config or get_config()
+    intra_op = max(1, config.TORCH_INTRA_OP_THREADS)
+
+    cpus = None
+    if config.CPU_AFFINITY and worker_index is not None and hasattr(os, 'sched_getaffinity'):
+        available = sorted(os.sched_getaffinity(0))
+        # Consecutive blocks of intra_op cores, wrapping when there are
+        # more workers than blocks
+        first = (worker_index * intra_op) % len(available)
+        cpus = [available[(first + i) % len(available)] for i in range(min(intra_op, len(available)))]
+
+    return {
+        'worker_index': worker_index,
+        'workers': config.WORKERS,
+        'cores': config.CPU_CORES,
+        'intra_op_threads': intra_op,
+        'inter_op_threads': max(1, config.TORCH_INTEROP_THREADS),
+        'cpus': cpus
+    }
+
+
+def configure_process(worker_index=None, config=None) -> dict:
+    """Apply the thread plan to this process.
+
+    Call as early as possible in each worker: the OpenMP/MKL/OpenBLAS
+    variables only take effect for libraries loaded afterwards. Variables
+    already set in the environment are left alone. Torch itself is configured
+    by configure_torch when it is first imported.
+    """
+    global _plan
+    plan = thread_plan(worker_index, config)
+
+    for name in THREAD_ENV_VARS:
+        os.environ.setdefault(name, str(plan['intra_op_threads']))
+
+    if plan['cpus']:
+        try:
+            os.sched_setaffinity(0, plan['cpus'])
+        except OSError as e:
+            logger.warning("Could not set CPU affinity %s: %s", plan['cpus'], e)
+            plan['cpus'] = None
+
+    _plan = plan
+    logger.info(
+        "Worker %s: %s intra-op / %s inter-op threads, cpus %s",
+        worker_index, plan['intra_op_threads'], plan['inter_op_threads'], plan['cpus'] or 'all'
+    )
+
+    # Torch may already be loaded (e.g. preloaded by the parent process)
+    if 'torch' in sys.modules:
+        configure_torch()
+    return plan
+
+
+def configure_torch():
+    """Set torch's thread pools once, right after torch is imported"""
+    global _torch_configured
+    if _torch_configured:
+        return
+
+    with _torch_lock:
+        if _torch_configured:
+            return
+        try:
+            import torch
+        except ImportError:
+            return
+
+        plan = _plan or thread_plan()
+        torch.set_num_threads(plan['intra_op_threads'])
+        try:
+            # Only allowed before any inter-op parallel work has started
+            torch.set_num_interop_threads(plan['inter_op_threads'])
+        except RuntimeError as e:
+            logger.warning("Could not set torch inter-op threads: %s", e)
+        _torch_configured = True
+
+
+def current_plan() -> dict:
+    """The plan applied to this process, for diagnostics"""
+    return dict(_plan) if _plan else thread_plan()
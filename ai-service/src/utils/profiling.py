@@ -0,0 +1,216 @@
+import os
+import sys
+import hmac
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import contextlib
+from collections import Counter
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _safe_name(value: str) -> str:
+    return ''.join(c if c.isalnum() or c in '-_' else '_' for c in value).strip('_')[:60] or 'root'
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Samples every thread's Python stack at a fixed interval.
+
+    Stacks are aggregated in the collapsed ``frame;frame;frame count``
+    format read by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, duration: float, interval: float, output_path: str):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.duration = duration
+        self.interval = interval
+        self.output_path = output_path
+        self.stacks = Counter()
+        self.samples = 0
+
+    def run(self):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + self.duration
+        names = {}
+
+        while time.monotonic() < deadline:
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+            self.samples += 1
+            time.sleep(self.interval)
+
+        with open(self.output_path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info("Stack sampling finished: %s samples written to %s", self.samples, self.output_path)
+
+
+class _TorchTrace:
+    """torch.profiler run around one model call, exported as a Chrome trace"""
+
+    def __init__(self, task: str, output_path: str):
+        self.task = task
+        self.output_path = output_path
+        self._profile = None
+
+    def __enter__(self):
+        try:
+            import torch
+            from torch.profiler import profile, ProfilerActivity
+
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self._profile = profile(activities=activities, record_shapes=True)
+            self._profile.__enter__()
+        except Exception as e:
+            logger.warning("Torch profiler unavailable for %s: %s", self.task, e)
+            self._profile = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._profile is not None:
+            self._profile.__exit__(*exc_info)
+            try:
+                self._profile.export_chrome_trace(self.output_path)
+                logger.info("Torch trace for %s written to %s", self.task, self.output_path)
+            except Exception as e:
+                logger.warning("Torch trace export failed for %s: %s", self.task, e)
+        return False
+
+
+class Profiler:
+    """Opt-in profiling surface for request handling and model calls.
+
+    Nothing is installed unless PROFILING_ENABLED is true. Once enabled,
+    profiling still only runs when armed: the next N requests under cProfile,
+    stack sampling for a time window, or torch traces of the next N model
+    calls. Output files go to ``output_dir`` and can be listed and
+    downloaded through the admin routes.
+    """
+
+    def __init__(self, enabled: bool = False, output_dir: str = 'logs/profiles', token: str = None):
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.token = token
+        self._lock = threading.Lock()
+        self._requests_remaining = 0
+        self._torch_remaining = 0
+        self._sampler: Optional[StackSampler] = None
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Whether a request may arm or read profiles; always False without a configured token"""
+        if not self.enabled or not self.token or not token:
+            return False
+        return hmac.compare_digest(token.encode('utf-8'), self.token.encode('utf-8'))
+
+    def arm_requests(self, count: int):
+        """Profile the next count requests with cProfile"""
+        with self._lock:
+            self._requests_remaining = max(0, int(count))
+
+    def arm_torch(self, count: int):
+        """Record torch profiler traces for the next count model calls"""
+        with self._lock:
+            self._torch_remaining = max(0, int(count))
+
+    def start_sampling(self, duration: float = 10.0, interval: float = 0.01) -> str:
+        """Sample all thread stacks for duration seconds in the background"""
+        with self._lock:
+            if self._sampler is not None and self._sampler.is_alive():
+                raise ValueError('Stack sampling is already running')
+            path = self._output_path('sample', 'folded')
+            self._sampler = StackSampler(duration, interval, path)
+            self._sampler.start()
+        return os.path.basename(path)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'requests_remaining': self._requests_remaining,
+                'torch_calls_remaining': self._torch_remaining,
+                'sampling': self._sampler is not None and self._sampler.is_alive()
+            }
+
+    def take_request(self, forced: bool = False) -> bool:
+        """Claim an armed request slot; forced requests always profile"""
+        if forced:
+            return True
+        if self._requests_remaining <= 0:
+            return False
+        with self._lock:
+            if self._requests_remaining <= 0:
+                return False
+            self._requests_remaining -= 1
+            return True
+
+    def save_request_profile(self, profile: cProfile.Profile, label: str) -> str:
+        """Dump a finished request profile as a pstats file"""
+        path = self._output_path(label, 'prof')
+        stats = pstats.Stats(profile)
+        stats.dump_stats(path)
+        logger.info("Request profile written to %s", path)
+        return os.path.basename(path)
+
+    def trace_model(self, task: str):
+        """Context manager around a model forward pass; a no-op unless armed"""
+        if self._torch_remaining <= 0:
+            return _NULL_CONTEXT
+        with self._lock:
+            if self._torch_remaining <= 0:
+                return _NULL_CONTEXT
+            self._torch_remaining -= 1
+        return _TorchTrace(task, self._output_path(f'torch_{task}', 'json'))
+
+    def list_profiles(self) -> List[dict]:
+        if not os.path.isdir(self.output_dir):
+            return []
+        entries = []
+        for name in sorted(os.listdir(self.output_dir), reverse=True):
+            path = os.path.join(self.output_dir, name)
+            entries.append({'name': name, 'size': os.path.getsize(path)})
+        return entries
+
+    def profile_path(self, name: str) -> Optional[str]:
+        """Path of a stored profile, or None if name is not one of ours"""
+        if os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.output_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def _output_path(self, label: str, extension: str) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return os.path.join(
+            self.output_dir, f"{stamp}-{time.time_ns() % 1_000_000:06d}-{_safe_name(label)}.{extension}"
+        )
+
+
+PROFILER = Profiler(
+    enabled=os.getenv('PROFILING_ENABLED', 'false').lower() == 'true',
+    output_dir=os.getenv('PROFILE_DIR', 'logs/profiles'),
+    token=os.getenv('PROFILING_TOKEN') or None
+)
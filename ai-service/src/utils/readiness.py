@@ -0,0 +1,55 @@
+import time
+import threading
+
+
+class Readiness:
+    """Whether this worker should receive traffic.
+
+    Liveness (/health) only says the process is up; readiness (/ready)
+    says it has finished starting and can serve requests without paying
+    start-up costs, so orchestrators can wait instead of restarting it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._reason = 'starting'
+        self._started_at = time.time()
+        self._ready_at = None
+        self._details = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def mark_ready(self):
+        with self._lock:
+            self._ready = True
+            self._reason = None
+            self._ready_at = time.time()
+
+    def mark_not_ready(self, reason: str):
+        with self._lock:
+            self._ready = False
+            self._reason = reason
+
+    def set_detail(self, key: str, value):
+        """Attach extra start-up information (e.g. warm-up timings) to status"""
+        with self._lock:
+            self._details[key] = value
+
+    def status(self) -> dict:
+        with self._lock:
+            status = {
+                'ready': self._ready,
+                'uptime_seconds': round(time.time() - self._started_at, 3)
+            }
+            if self._reason:
+                status['reason'] = self._reason
+            if self._ready_at is not None:
+                status['startup_seconds'] = round(self._ready_at - self._started_at, 3)
+            status.update(self._details)
+            return status
+
+
+READINESS = Readiness()
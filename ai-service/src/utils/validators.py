@@ -11,18 +11,18 @@ def validate_request(data: Dict[str, Any], required_fields: List[str]) -> bool:
         
         for field in required_fields:
             if field not in data or data[field] is None:
-                logger.warning(f"Missing required field: {field}")
+                logger.warning("Missing required field: %s", field)
                 return False
             
             # Check for empty strings
             if isinstance(data[field], str) and not data[field].strip():
-                logger.warning(f"Empty required field: {field}")
+                logger.warning("Empty required field: %s", field)
                 return False
         
         return True
         
     except Exception as e:
-        logger.error(f"Request validation failed: {str(e)}")
+        logger.error("Request validation failed: %s", e)
         return False
 
 def validate_text_input(text: str, min_length: int = 1, max_length: int = 10000) -> bool:
@@ -34,19 +34,91 @@ def validate_text_input(text: str, min_length: int = 1, max_length: int = 10000)
         text = text.strip()
         
         if len(text) < min_length:
-            logger.warning(f"Text too short: {len(text)} < {min_length}")
+            logger.warning("Text too short: %s < %s", len(text), min_length)
             return False
         
         if len(text) > max_length:
-            logger.warning(f"Text too long: {len(text)} > {max_length}")
+            logger.warning("Text too long: %s > %s", len(text), max_length)
             return False
         
         return True
         
     except Exception as e:
-        logger.error(f"Text validation failed: {str(e)}")
+        logger.error("Text validation failed: %s", e)
         return False
 
+def validate_text_batch(texts: Any, max_items: int) -> bool:
+    """Validate a list of texts for batched analysis"""
+    if not isinstance(texts, list) or not 1 <= len(texts) <= max_items:
+        logger.warning("Text batch must be a list of 1 to %s items", max_items)
+        return False
+    
+    return all(validate_text_input(text) for text in texts)
+
+def validate_quality_options(data: Dict[str, Any]) -> bool:
+    """Validate the optional 'quality' and 'deadline_ms' model tier fields"""
+    quality = data.get('quality')
+    if quality is not None and quality not in ('fast', 'accurate', 'auto'):
+        logger.warning("Invalid quality: %s", quality)
+        return False
+    
+    deadline_ms = data.get('deadline_ms')
+    if deadline_ms is not None and (isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float))
+                                    or deadline_ms <= 0):
+        logger.warning("Invalid deadline_ms: %s", deadline_ms)
+        return False
+    
+    return True
+
+def validate_limit(limit: Any) -> bool:
+    """Validate a result limit: a positive integer"""
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 1:
+        logger.warning("Invalid limit: %s", limit)
+        return False
+    
+    return True
+
+def validate_search_posts(posts: Any, max_items: int) -> bool:
+    """Validate posts submitted for semantic indexing"""
+    if not isinstance(posts, list) or not 1 <= len(posts) <= max_items:
+        logger.warning("Posts must be a list of 1 to %s items", max_items)
+        return False
+    
+    for post in posts:
+        if not isinstance(post, dict) or post.get('id') in (None, ''):
+            logger.warning("Each post needs an id")
+            return False
+        # Length is not limited: the embedder truncates long posts itself
+        if not any(isinstance(post.get(field), str) and post[field].strip()
+                   for field in ('title', 'content', 'text')):
+            logger.warning("Post %s has no text", post.get('id'))
+            return False
+    
+    return True
+
+def validate_catalog_items(items: Any, max_items: int) -> bool:
+    """Validate item metadata submitted to the recommendation catalog"""
+    if not isinstance(items, list) or not 1 <= len(items) <= max_items:
+        logger.warning("Items must be a list of 1 to %s items", max_items)
+        return False
+    
+    for item in items:
+        if not isinstance(item, dict) or item.get('id') in (None, ''):
+            logger.warning("Each item needs an id")
+            return False
+        
+        if 'tags' in item and not isinstance(item['tags'], list):
+            logger.warning("Tags of item %s must be a list", item['id'])
+            return False
+        
+        popularity = item.get('popularity')
+        if popularity is not None and (isinstance(popularity, bool) or not isinstance(popularity, (int, float))
+                                       or popularity < 0):
+            logger.warning("Invalid popularity for item %s", item['id'])
+            return False
+    
+    return True
+
 def validate_quiz_parameters(data: Dict[str, Any]) -> bool:
     """Validate quiz generation parameters"""
     try:
@@ -57,20 +129,20 @@ def validate_quiz_parameters(data: Dict[str, Any]) -> bool:
         # Check number of questions
         num_questions = data.get('num_questions', 5)
         if not isinstance(num_questions, int) or num_questions < 1 or num_questions > 20:
-            logger.warning(f"Invalid number of questions: {num_questions}")
+            logger.warning("Invalid number of questions: %s", num_questions)
             return False
         
         # Check difficulty
         difficulty = data.get('difficulty', 'medium')
         valid_difficulties = ['easy', 'medium', 'hard']
         if difficulty not in valid_difficulties:
-            logger.warning(f"Invalid difficulty: {difficulty}")
+            logger.warning("Invalid difficulty: %s", difficulty)
             return False
         
         return True
         
     except Exception as e:
-        logger.error(f"Quiz parameters validation failed: {str(e)}")
+        logger.error("Quiz parameters validation failed: %s", e)
         return False
 
 def validate_training_data(data: Dict[str, Any]) -> bool:
@@ -80,7 +152,7 @@ def validate_training_data(data: Dict[str, Any]) -> bool:
         model_type = data.get('model_type')
         valid_model_types = ['text_classification', 'sentiment_analysis', 'recommendation']
         if model_type not in valid_model_types:
-            logger.warning(f"Invalid model type: {model_type}")
+            logger.warning("Invalid model type: %s", model_type)
             return False
         
         # Check training data
@@ -90,7 +162,7 @@ def validate_training_data(data: Dict[str, Any]) -> bool:
             return False
         
         if len(training_data) < 10:
-            logger.warning(f"Insufficient training data: {len(training_data)} samples")
+            logger.warning("Insufficient training data: %s samples", len(training_data))
             return False
         
         # Validate training data structure based on model type
@@ -102,7 +174,7 @@ def validate_training_data(data: Dict[str, Any]) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"Training data validation failed: {str(e)}")
+        logger.error("Training data validation failed: %s", e)
         return False
 
 def validate_text_training_data(training_data: List[Dict]) -> bool:
@@ -110,25 +182,25 @@ def validate_text_training_data(training_data: List[Dict]) -> bool:
     try:
         for i, item in enumerate(training_data):
             if not isinstance(item, dict):
-                logger.warning(f"Training item {i} is not a dictionary")
+                logger.warning("Training item %s is not a dictionary", i)
                 return False
             
             if 'text' not in item or 'label' not in item:
-                logger.warning(f"Training item {i} missing 'text' or 'label' field")
+                logger.warning("Training item %s missing 'text' or 'label' field", i)
                 return False
             
             if not validate_text_input(item['text'], min_length=1, max_length=5000):
-                logger.warning(f"Invalid text in training item {i}")
+                logger.warning("Invalid text in training item %s", i)
                 return False
             
             if not item['label'] or not isinstance(item['label'], str):
-                logger.warning(f"Invalid label in training item {i}")
+                logger.warning("Invalid label in training item %s", i)
                 return False
         
         return True
         
     except Exception as e:
-        logger.error(f"Text training data validation failed: {str(e)}")
+        logger.error("Text training data validation failed: %s", e)
         return False
 
 def validate_recommendation_training_data(training_data: List[Dict]) -> bool:
@@ -136,28 +208,28 @@ def validate_recommendation_training_data(training_data: List[Dict]) -> bool:
     try:
         for i, item in enumerate(training_data):
             if not isinstance(item, dict):
-                logger.warning(f"Training item {i} is not a dictionary")
+                logger.warning("Training item %s is not a dictionary", i)
                 return False
             
             if 'user_id' not in item or 'item_id' not in item:
-                logger.warning(f"Training item {i} missing 'user_id' or 'item_id' field")
+                logger.warning("Training item %s missing 'user_id' or 'item_id' field", i)
                 return False
             
             if not item['user_id'] or not item['item_id']:
-                logger.warning(f"Empty user_id or item_id in training item {i}")
+                logger.warning("Empty user_id or item_id in training item %s", i)
                 return False
             
             # Validate rating if present
             if 'rating' in item:
                 rating = item['rating']
                 if not isinstance(rating, (int, float)) or rating < 0:
-                    logger.warning(f"Invalid rating in training item {i}")
+                    logger.warning("Invalid rating in training item %s", i)
                     return False
         
         return True
         
     except Exception as e:
-        logger.error(f"Recommendation training data validation failed: {str(e)}")
+        logger.error("Recommendation training data validation failed: %s", e)
         return False
 
 def validate_user_preferences(preferences: Dict[str, Any]) -> bool:
@@ -193,7 +265,7 @@ def validate_user_preferences(preferences: Dict[str, Any]) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"User preferences validation failed: {str(e)}")
+        logger.error("User preferences validation failed: %s", e)
         return False
 
 def sanitize_text(text: str) -> str:
@@ -215,7 +287,7 @@ def sanitize_text(text: str) -> str:
         return sanitized
         
     except Exception as e:
-        logger.error(f"Text sanitization failed: {str(e)}")
+        logger.error("Text sanitization failed: %s", e)
         return ""
 
 def validate_file_upload(file_data: Dict[str, Any]) -> bool:
@@ -228,7 +300,7 @@ def validate_file_upload(file_data: Dict[str, Any]) -> bool:
         required_fields = ['filename', 'content', 'content_type']
         for field in required_fields:
             if field not in file_data:
-                logger.warning(f"Missing file field: {field}")
+                logger.warning("Missing file field: %s", field)
                 return False
         
         # Validate filename
@@ -240,7 +312,7 @@ def validate_file_upload(file_data: Dict[str, Any]) -> bool:
         # Check file extension
         allowed_extensions = ['.txt', '.csv', '.json', '.pdf']
         if not any(filename.lower().endswith(ext) for ext in allowed_extensions):
-            logger.warning(f"Unsupported file type: {filename}")
+            logger.warning("Unsupported file type: %s", filename)
             return False
         
         # Check content size
@@ -252,5 +324,5 @@ def validate_file_upload(file_data: Dict[str, Any]) -> bool:
         return True
         
     except Exception as e:
-        logger.error(f"File upload validation failed: {str(e)}")
+        logger.error("File upload validation failed: %s", e)
         return False
\ No newline at end of file
@@ -50,7 +50,7 @@ echo - Frontend will run on http://localhost:3000
 echo - AI Service will run on http://localhost:8000
 echo.
 
-start "AI Service" cmd /k "cd ai-service\src && python app.py"
+start "AI Service" cmd /k "cd ai-service\src && python -m flask --app app run --host 0.0.0.0 --port 8000 --debug"
 timeout /t 3 /nobreak > nul
 
 start "Backend" cmd /k "cd ai_backend && npm run dev"